@@ -1,6 +1,39 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, FastingRecord, WeightRecord
+from django.utils import timezone
+from .models import CustomUser, FastingRecord, Job, WeightRecord
+from .pagination import EstimatedCountPaginator
+
+
+class UserEmailFilter(admin.SimpleListFilter):
+    """Filtro por email com autocompletar, sem listar todos os usuários na barra lateral."""
+
+    title = 'usuário'
+    parameter_name = 'user_email'
+    template = 'admin/core/user_email_filter.html'
+
+    def __init__(self, request, params, model, model_admin):
+        super().__init__(request, params, model, model_admin)
+        self.model_name = model._meta.model_name
+
+    def lookups(self, request, model_admin):
+        return [(self.value(), self.value())] if self.value() else []
+
+    def has_output(self):
+        return True
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(user__email=self.value())
+        return queryset
+
+    def choices(self, changelist):
+        yield {
+            'selected': self.value() is not None,
+            'value': self.value() or '',
+            'clear_query_string': changelist.get_query_string(remove=[self.parameter_name]),
+            'hidden_params': [(key, value) for key, value in changelist.params.items() if key != self.parameter_name],
+        }
 
 
 @admin.register(CustomUser)
@@ -15,7 +48,7 @@ class CustomUserAdmin(UserAdmin):
         (None, {'fields': ('email', 'password')}),
         ('Informações Pessoais', {'fields': ('name', 'fasting_goal_hours')}),
         ('Permissões', {'fields': ('is_active', 'is_staff', 'is_superuser', 'groups', 'user_permissions')}),
-        ('Datas Importantes', {'fields': ('last_login', 'created_at')}),
+        ('Datas Importantes', {'fields': ('last_login', 'created_at', 'archived_until')}),
     )
 
     add_fieldsets = (
@@ -25,14 +58,19 @@ class CustomUserAdmin(UserAdmin):
         }),
     )
 
-    readonly_fields = ['created_at', 'last_login']
+    readonly_fields = ['created_at', 'last_login', 'archived_until']
 
 
 @admin.register(FastingRecord)
 class FastingRecordAdmin(admin.ModelAdmin):
     list_display = ['user', 'start_time', 'end_time', 'duration_hours', 'fasting_type', 'created_at']
-    list_filter = ['fasting_type', 'created_at', 'user']
-    search_fields = ['user__email', 'user__name', 'notes']
+    list_filter = [UserEmailFilter, 'fasting_type']
+    list_select_related = ['user']
+    search_fields = ['=user__email']
+    date_hierarchy = 'start_time'
+    autocomplete_fields = ['user']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     ordering = ['-start_time']
     readonly_fields = ['duration_hours', 'created_at']
 
@@ -47,7 +85,31 @@ class FastingRecordAdmin(admin.ModelAdmin):
 @admin.register(WeightRecord)
 class WeightRecordAdmin(admin.ModelAdmin):
     list_display = ['user', 'weight', 'reference_month', 'created_at']
-    list_filter = ['reference_month', 'created_at', 'user']
-    search_fields = ['user__email', 'user__name']
-    ordering = ['-reference_month']
+    list_filter = [UserEmailFilter]
+    list_select_related = ['user']
+    search_fields = ['=user__email', '=reference_month']
+    date_hierarchy = 'reference_date'
+    autocomplete_fields = ['user']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ['-reference_date']
     readonly_fields = ['created_at']
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'task', 'user', 'status', 'priority', 'attempts', 'run_at', 'finished_at']
+    list_filter = ['status', 'task', UserEmailFilter]
+    list_select_related = ['user']
+    search_fields = ['=user__email']
+    autocomplete_fields = ['user']
+    ordering = ['-created_at']
+    readonly_fields = ['attempts', 'locked_by', 'locked_at', 'result', 'error', 'created_at', 'finished_at']
+    actions = ['retry_now']
+
+    @admin.action(description='Executar novamente agora')
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status=Job.RUNNING).update(
+            status=Job.PENDING, attempts=0, run_at=timezone.now(), finished_at=None
+        )
+        self.message_user(request, f'{updated} tarefa(s) devolvida(s) à fila.')
@@ -0,0 +1,177 @@
+import math
+from collections import deque
+from datetime import timedelta
+
+from django.db.models import Avg, Count, F, FloatField, Q, Sum
+from django.utils import timezone
+
+from .models import CustomUser, FastingRecord, UserStatistics, WeightRecord
+from .streaks import get_streaks
+from .summaries import local_midnight
+
+
+WINDOWS = (30, 90, 365)
+
+LEVEL_FIELDS = ['energy_level', 'focus_level', 'mood_level']
+
+
+def _window_aggregates(today, goal_hours):
+    aggregates = {}
+    for days in WINDOWS:
+        since = Q(start_time__gte=local_midnight(today - timedelta(days=days - 1)))
+        aggregates[f'avg_{days}'] = Avg('duration_hours', filter=since)
+        aggregates[f'count_{days}'] = Count('id', filter=since)
+        aggregates[f'hits_{days}'] = Count('id', filter=since & Q(duration_hours__gte=goal_hours))
+    return aggregates
+
+
+def _correlation_aggregates():
+    """Somas suficientes para a correlação de Pearson, calculadas pelo banco em uma única passada."""
+    duration = F('duration_hours')
+    aggregates = {
+        'fasting_count': Count('id'),
+        'total_hours': Sum('duration_hours'),
+    }
+    for field in LEVEL_FIELDS:
+        level = F(field)
+        present = Q(**{f'{field}__isnull': False})
+        aggregates.update({
+            f'{field}_n': Count('id', filter=present),
+            f'{field}_sx': Sum(level, filter=present, output_field=FloatField()),
+            f'{field}_sy': Sum(duration, filter=present, output_field=FloatField()),
+            f'{field}_sxy': Sum(level * duration, filter=present, output_field=FloatField()),
+            f'{field}_sxx': Sum(level * level, filter=present, output_field=FloatField()),
+            f'{field}_syy': Sum(duration * duration, filter=present, output_field=FloatField()),
+        })
+    return aggregates
+
+
+def _add_archived(user, totals):
+    """Soma aos agregados do banco os do período arquivado (uma linha, sem ler os arquivos)."""
+    from .archive import archived_totals
+
+    archived = archived_totals(user)
+    if archived is None:
+        return
+    totals['fasting_count'] += archived.fasting_count
+    totals['total_hours'] = (totals['total_hours'] or 0) + archived.total_hours
+    for field in LEVEL_FIELDS:
+        for key, value in zip(('n', 'sx', 'sy', 'sxy', 'sxx', 'syy'), archived.level_sums.get(field, ())):
+            totals[f'{field}_{key}'] = (totals[f'{field}_{key}'] or 0) + value
+
+
+def pearson(n, sx, sy, sxy, sxx, syy):
+    if n < 3:
+        return None
+    covariance = n * sxy - sx * sy
+    variance_x = n * sxx - sx * sx
+    variance_y = n * syy - sy * sy
+    if variance_x <= 0 or variance_y <= 0:
+        return None
+    return round(covariance / math.sqrt(variance_x * variance_y), 3)
+
+
+def weight_series(user, window=3):
+    """Série mensal de peso em colunas, com média móvel e reta de tendência calculadas em uma passada."""
+    months, offsets, weights, moving_average = [], [], [], []
+    recent = deque()
+    recent_sum = 0.0
+    n = sx = sy = sxy = sxx = 0.0
+    first_index = None
+
+    records = WeightRecord.objects.filter(user=user).order_by('reference_date').values_list('reference_date', 'weight')
+    for reference_date, weight in records.iterator(chunk_size=2000):
+        index = reference_date.year * 12 + reference_date.month - 1
+        if first_index is None:
+            first_index = index
+        x = index - first_index
+
+        months.append(reference_date.strftime('%Y-%m'))
+        offsets.append(x)
+        weights.append(weight)
+
+        recent.append(weight)
+        recent_sum += weight
+        if len(recent) > window:
+            recent_sum -= recent.popleft()
+        moving_average.append(round(recent_sum / len(recent), 2))
+
+        n += 1
+        sx += x
+        sy += weight
+        sxy += x * weight
+        sxx += x * x
+
+    slope = trend = None
+    variance = n * sxx - sx * sx
+    if n >= 2 and variance > 0:
+        slope = (n * sxy - sx * sy) / variance
+        intercept = (sy - slope * sx) / n
+        trend = [round(intercept + slope * x, 2) for x in offsets]
+        slope = round(slope, 3)
+
+    return {
+        'months': months,
+        'weights': weights,
+        'moving_average': moving_average,
+        'trend': trend,
+        'slope': slope,
+        'window': window,
+    }
+
+
+def compute_user_statistics(user, today=None):
+    today = today or timezone.localdate()
+    closed = FastingRecord.objects.filter(user=user, end_time__isnull=False)
+
+    windows = closed.filter(
+        start_time__gte=local_midnight(today - timedelta(days=WINDOWS[-1] - 1))
+    ).aggregate(**_window_aggregates(today, user.fasting_goal_hours))
+    totals = closed.aggregate(**_correlation_aggregates())
+    # As janelas de até 365 dias nunca chegam ao arquivo: só partições com mais de um ano são arquivadas.
+    if user.archived_until is not None:
+        _add_archived(user, totals)
+
+    values = {
+        'reference_date': today,
+        'fasting_count': totals['fasting_count'],
+        'total_hours': round(totals['total_hours'] or 0, 2),
+        'best_streak': get_streaks(user, today)['longest'],
+    }
+    for days in WINDOWS:
+        average = windows[f'avg_{days}']
+        count = windows[f'count_{days}']
+        values[f'avg_hours_{days}'] = round(average, 2) if average is not None else None
+        values[f'goal_rate_{days}'] = round(windows[f'hits_{days}'] / count, 3) if count else None
+    for field in LEVEL_FIELDS:
+        name = field.replace('_level', '_correlation')
+        values[name] = pearson(*(totals[f'{field}_{key}'] or 0 for key in ('n', 'sx', 'sy', 'sxy', 'sxx', 'syy')))
+    series = weight_series(user)
+    values['latest_weight'] = series['weights'][-1] if series['weights'] else None
+    values['weight_trend'] = series['slope']
+    return values
+
+
+def refresh_user_statistics(user, today=None):
+    """Recalcula e grava as estatísticas de um único usuário."""
+    if not isinstance(user, CustomUser):
+        user = CustomUser.objects.filter(pk=user).first()
+        if user is None:
+            return None
+    stats, _ = UserStatistics.objects.update_or_create(
+        user=user, defaults={**compute_user_statistics(user, today), 'stale': False}
+    )
+    return stats
+
+
+def mark_statistics_stale(user_id):
+    """Um UPDATE no lugar do recálculo: a próxima leitura das estatísticas refaz as contas."""
+    UserStatistics.objects.filter(user_id=user_id, stale=False).update(stale=True)
+
+
+def get_user_statistics(user):
+    """Lê as estatísticas pré-calculadas; só recalcula se não existirem, estiverem desatualizadas ou forem de outro dia."""
+    stats = UserStatistics.objects.filter(user=user).first()
+    if stats is None or stats.stale or stats.reference_date != timezone.localdate():
+        stats = refresh_user_statistics(user)
+    return stats
@@ -0,0 +1,177 @@
+import hashlib
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.urls import include, path
+from django.utils import timezone
+from django.utils.http import parse_etags
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import APIException
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.routers import DefaultRouter
+from rest_framework.views import APIView
+
+from .analytics import get_user_statistics, weight_series
+from .cache import cache_is_shared, get_dashboard_context, user_data_version
+from .importers import import_fastings, read_rows
+from .models import FastingConflict, FastingRecord, WeightRecord
+from .serializers import EndFastingSerializer, FastingRecordSerializer, UserStatisticsSerializer, WeightRecordSerializer
+from .streaks import get_streaks
+from .views import build_dashboard_context
+
+
+class NotModified(APIException):
+    status_code = status.HTTP_304_NOT_MODIFIED
+
+
+class ConditionalGetMixin:
+    """ETag derivado da versão dos dados do usuário: um If-None-Match válido vira 304 sem consultar o banco.
+
+    A versão só é confiável com cache compartilhado entre os workers; sem ele não há ETag nem 304.
+    """
+
+    def get_etag(self, request):
+        if not cache_is_shared():
+            return None
+        raw = f'{request.user.pk}:{user_data_version(request.user.pk)}:{timezone.localdate()}:{request.get_full_path()}'
+        return f'"{hashlib.md5(raw.encode()).hexdigest()}"'
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.etag = None
+        if request.method in ('GET', 'HEAD'):
+            self.etag = self.get_etag(request)
+            if self.etag and self.etag in parse_etags(request.headers.get('If-None-Match', '')):
+                raise NotModified
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, 'etag', None) and response.status_code in (200, 304):
+            response['ETag'] = self.etag
+        return response
+
+
+class FastingCursorPagination(CursorPagination):
+    ordering = ('-start_time', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class WeightCursorPagination(CursorPagination):
+    ordering = ('-reference_date',)
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class FastingRecordViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    serializer_class = FastingRecordSerializer
+    pagination_class = FastingCursorPagination
+
+    def get_queryset(self):
+        return FastingRecord.objects.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    @action(detail=False, methods=['post'])
+    def start(self, request):
+        try:
+            fasting = FastingRecord.start_now(request.user, request.data.get('fasting_type', 'intermittent'))
+        except FastingConflict as e:
+            return Response({'detail': e.messages[0]}, status=status.HTTP_409_CONFLICT)
+        except DjangoValidationError as e:
+            return Response({'non_field_errors': e.messages}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(fasting).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'])
+    def end(self, request):
+        serializer = EndFastingSerializer(data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        try:
+            fasting = FastingRecord.end_active(request.user, **serializer.validated_data)
+        except FastingConflict as e:
+            return Response({'detail': e.messages[0]}, status=status.HTTP_409_CONFLICT)
+        except DjangoValidationError as e:
+            return Response({'non_field_errors': e.messages}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(fasting).data)
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_records(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'detail': 'Envie o arquivo no campo "file".'}, status=status.HTTP_400_BAD_REQUEST)
+
+        import_format = request.data.get('format') or ('csv' if upload.name.lower().endswith('.csv') else 'json')
+        try:
+            result = import_fastings(request.user, read_rows(upload.file, import_format))
+        except ValueError as e:
+            return Response({'detail': f'Erro ao ler o arquivo: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(
+            {'created': result.created, 'errors': result.errors},
+            status=status.HTTP_201_CREATED if result.created else status.HTTP_400_BAD_REQUEST,
+        )
+
+
+class WeightRecordViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    serializer_class = WeightRecordSerializer
+    pagination_class = WeightCursorPagination
+
+    def get_queryset(self):
+        return WeightRecord.objects.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    @action(detail=False)
+    def series(self, request):
+        try:
+            window = min(max(int(request.query_params.get('window', 3)), 1), 12)
+        except ValueError:
+            window = 3
+        return Response(weight_series(request.user, window))
+
+
+class StatsView(ConditionalGetMixin, APIView):
+    def get(self, request):
+        context = get_dashboard_context(request.user, build_dashboard_context, 7)
+        active_fasting = context['active_fasting']
+        return Response({
+            'active_fasting': FastingRecordSerializer(active_fasting).data if active_fasting else None,
+            'avg_duration': context['avg_duration'],
+            'days_above_goal': context['days_above_goal'],
+            'streak': context['streak'],
+            'goal_hours': context['goal_hours'],
+            'chart': json.loads(context['chart_data']),
+        })
+
+
+class TrendsView(ConditionalGetMixin, APIView):
+    def get(self, request):
+        return Response(UserStatisticsSerializer(get_user_statistics(request.user)).data)
+
+
+class StreaksView(ConditionalGetMixin, APIView):
+    def get(self, request):
+        return Response(get_streaks(request.user))
+
+
+router = DefaultRouter()
+router.register('fastings', FastingRecordViewSet, basename='api-fasting')
+router.register('weights', WeightRecordViewSet, basename='api-weight')
+
+urlpatterns = [
+    path('stats/', StatsView.as_view(), name='api-stats'),
+    path('stats/trends/', TrendsView.as_view(), name='api-trends'),
+    path('stats/streaks/', StreaksView.as_view(), name='api-streaks'),
+    path('', include(router.urls)),
+]
@@ -0,0 +1,223 @@
+import gzip
+import heapq
+import itertools
+import json
+from datetime import date
+from functools import partial
+from operator import attrgetter, itemgetter
+
+from asgiref.sync import sync_to_async
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .backends import forget_cached_user
+from .cache import bump_user_data_version
+from .models import ArchivedFastingTotals, CustomUser, FastingRecord
+from .pagination import akeyset_page, decode_cursor, encode_cursor, keyset_page
+from .summaries import local_midnight
+
+
+ARCHIVE_FIELDS = [
+    'id', 'start_time', 'end_time', 'duration_hours', 'fasting_type',
+    'energy_level', 'focus_level', 'mood_level', 'notes', 'created_at',
+]
+DATETIME_FIELDS = ('start_time', 'end_time', 'created_at')
+LEVEL_FIELDS = ['energy_level', 'focus_level', 'mood_level']
+
+
+def period_label(start, interval):
+    return timezone.localtime(start).strftime('%Y-%m' if interval == 'month' else '%Y')
+
+
+def label_start(label):
+    year, _, month = label.partition('-')
+    return local_midnight(date(int(year), int(month or 1), 1))
+
+
+def archive_path(user_id, label=''):
+    return f'fastings/{user_id}/{label}.ndjson.gz' if label else f'fastings/{user_id}'
+
+
+def _encode(values):
+    return {field: value.isoformat() if field in DATETIME_FIELDS and value else value for field, value in values.items()}
+
+
+def _decode(values):
+    return {field: parse_datetime(value) if field in DATETIME_FIELDS and value else value for field, value in values.items()}
+
+
+def _add_to_totals(totals, values):
+    duration = values['duration_hours'] or 0.0
+    totals.fasting_count += 1
+    totals.total_hours += duration
+    for field in LEVEL_FIELDS:
+        level = values[field]
+        if level is None:
+            continue
+        sums = totals.level_sums.setdefault(field, [0] * 6)
+        for index, value in enumerate((1, level, duration, level * duration, level * level, duration * duration)):
+            sums[index] += value
+    latest = totals.latest_fasting
+    if latest is None or values['start_time'] > parse_datetime(latest['start_time']):
+        totals.latest_fasting = _encode(values)
+
+
+def write_archives(start, end, label):
+    """Grava os jejuns com início em [start, end), um arquivo gzip por usuário; retorna {user_id: quantidade}.
+
+    Os agregados de cada usuário (ArchivedFastingTotals) são atualizados na mesma transação.
+    """
+    storage = storages['archive']
+    rows = (
+        FastingRecord.objects.filter(start_time__gte=start, start_time__lt=end)
+        .order_by('user_id', '-start_time', '-id')
+        .values('user_id', *ARCHIVE_FIELDS)
+        .iterator(chunk_size=2000)
+    )
+    counts = {}
+    try:
+        for user_id, records in itertools.groupby(rows, key=itemgetter('user_id')):
+            totals = ArchivedFastingTotals.objects.filter(user_id=user_id).first() or ArchivedFastingTotals(user_id=user_id)
+            lines = []
+            for values in records:
+                del values['user_id']
+                _add_to_totals(totals, values)
+                lines.append(json.dumps(_encode(values), ensure_ascii=False) + '\n')
+
+            name = archive_path(user_id, label)
+            # Uma execução anterior interrompida pode ter deixado o arquivo: sobrescreve em vez de renomear.
+            storage.delete(name)
+            storage.save(name, ContentFile(gzip.compress(''.join(lines).encode(), mtime=0)))
+            counts[user_id] = len(lines)
+            totals.save()
+    except Exception:
+        remove_archives(counts, label)
+        raise
+    return counts
+
+
+def remove_archives(user_ids, label):
+    storage = storages['archive']
+    for user_id in user_ids:
+        storage.delete(archive_path(user_id, label))
+
+
+def mark_archived(user_ids, until):
+    """Registra nos usuários até quando o histórico está no arquivo; caches são renovados após o commit."""
+    CustomUser.objects.filter(pk__in=user_ids).filter(
+        Q(archived_until__isnull=True) | Q(archived_until__lt=until)
+    ).update(archived_until=until)
+    for user_id in user_ids:
+        transaction.on_commit(partial(forget_cached_user, user_id))
+        transaction.on_commit(partial(bump_user_data_version, user_id))
+
+
+def _labels(user_id):
+    try:
+        _, files = storages['archive'].listdir(archive_path(user_id))
+    except FileNotFoundError:
+        return []
+    return sorted(name.removesuffix('.ndjson.gz') for name in files if name.endswith('.ndjson.gz'))
+
+
+def _read(user_id, label):
+    """Valores de um arquivo, em ordem (start_time, id) decrescente."""
+    with storages['archive'].open(archive_path(user_id, label)) as file:
+        data = gzip.decompress(file.read())
+    return [_decode(json.loads(line)) for line in data.decode().splitlines()]
+
+
+def archived_values(user_id, ascending=False):
+    """Todos os jejuns arquivados do usuário, período a período."""
+    labels = _labels(user_id)
+    for label in labels if ascending else reversed(labels):
+        rows = _read(user_id, label)
+        yield from reversed(rows) if ascending else rows
+
+
+def _as_record(user_id, values):
+    record = FastingRecord(user_id=user_id, **values)
+    record.archived = True
+    return record
+
+
+def archived_fastings(user_id, ascending=False):
+    """Jejuns arquivados como FastingRecord somente leitura; os arquivos são lidos à medida que a iteração avança."""
+    return (_as_record(user_id, values) for values in archived_values(user_id, ascending))
+
+
+def archived_totals(user):
+    """Agregados do período arquivado; só monta a linha a partir dos arquivos se ela ainda não existir."""
+    if user.archived_until is None:
+        return None
+    totals = ArchivedFastingTotals.objects.filter(user_id=user.pk).first()
+    if totals is None:
+        totals = ArchivedFastingTotals(user_id=user.pk)
+        for values in archived_values(user.pk):
+            _add_to_totals(totals, values)
+        ArchivedFastingTotals.objects.bulk_create([totals], ignore_conflicts=True)
+    return totals
+
+
+def latest_archived(user):
+    """Último jejum arquivado do usuário (o único que pode avançar sobre o período ainda no banco)."""
+    totals = archived_totals(user)
+    if totals is None or totals.latest_fasting is None:
+        return None
+    return _as_record(user.pk, _decode(totals.latest_fasting))
+
+
+def archived_records(user_id, before=None, limit=None):
+    """Jejuns arquivados anteriores a `before` (start_time, pk), do mais recente ao mais antigo, somente leitura."""
+    records = []
+    for label in reversed(_labels(user_id)):
+        if limit is not None and len(records) >= limit:
+            break
+        if before and label_start(label) > before[0]:
+            continue
+        for values in _read(user_id, label):
+            if before and (values['start_time'], values['id']) >= before:
+                continue
+            records.append(_as_record(user_id, values))
+    return records[:limit]
+
+
+def _merge_archived(user, cursor, page_size, records, next_cursor):
+    if user.archived_until is None:
+        return records, next_cursor
+    # Página cheia e mais nova que tudo que foi arquivado: o arquivo não entra nela.
+    if next_cursor is not None and records[-1].start_time >= user.archived_until:
+        return records, next_cursor
+
+    seen = {record.pk for record in records}
+    archived = [
+        record for record in archived_records(user.pk, decode_cursor(cursor), page_size + 1)
+        if record.pk not in seen
+    ]
+    merged = list(itertools.islice(
+        heapq.merge(records, archived, key=attrgetter('start_time', 'pk'), reverse=True), page_size + 1
+    ))
+    page = merged[:page_size]
+    has_more = next_cursor is not None or len(merged) > page_size
+    return page, encode_cursor(page[-1]) if has_more and page else None
+
+
+def _history_queryset(user):
+    return FastingRecord.objects.filter(user=user, end_time__isnull=False)
+
+
+def history_page(user, cursor, page_size):
+    """Página do histórico (keyset) que continua nos jejuns arquivados quando o usuário os tem."""
+    records, next_cursor = keyset_page(_history_queryset(user), cursor, page_size)
+    return _merge_archived(user, cursor, page_size, records, next_cursor)
+
+
+async def ahistory_page(user, cursor, page_size):
+    records, next_cursor = await akeyset_page(_history_queryset(user), cursor, page_size)
+    if user.archived_until is None:
+        return records, next_cursor
+    return await sync_to_async(_merge_archived)(user, cursor, page_size, records, next_cursor)
@@ -0,0 +1,114 @@
+import asyncio
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.contrib.auth.views import redirect_to_login
+from django.db.models import Avg
+from django.shortcuts import redirect, render
+from django.utils import timezone
+
+from .archive import ahistory_page
+from .cache import aget_dashboard_context, ahas_fragment, fragment_cache_context
+from .models import FastingConflict, FastingRecord
+from .summaries import adaily_hours
+from .views import (
+    HISTORY_PAGE_SIZE, chart_period, count_streak, end_fasting_fields, history_context, make_dashboard_context,
+    parse_chart_days, recent_fastings, streak_totals,
+)
+
+
+def async_login_required(view):
+    """Equivalente assíncrono de login_required (o do Django 5.0 só aceita views síncronas)."""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        # Evita que templates e mensagens resolvam request.user de forma síncrona.
+        request.user = user
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+async def acalculate_streak(user):
+    today = timezone.now().date()
+    daily_totals = {day: total async for day, total in streak_totals(user, today)}
+    return count_streak(daily_totals, today, user.fasting_goal_hours)
+
+
+async def abuild_dashboard_context(user, chart_days):
+    recent = recent_fastings(user)
+
+    active_fasting, average, days_above_goal, streak, daily = await asyncio.gather(
+        FastingRecord.objects.filter(user=user, end_time__isnull=True).afirst(),
+        recent.aaggregate(Avg('duration_hours')),
+        recent.filter(duration_hours__gte=user.fasting_goal_hours).acount(),
+        acalculate_streak(user),
+        adaily_hours(user, *chart_period(chart_days)),
+    )
+
+    return make_dashboard_context(
+        user,
+        chart_days,
+        active_fasting=active_fasting,
+        avg_duration=average['duration_hours__avg'],
+        days_above_goal=days_above_goal,
+        streak=streak,
+        daily=daily,
+    )
+
+
+@async_login_required
+async def dashboard_view(request):
+    context = await aget_dashboard_context(
+        request.user, abuild_dashboard_context, parse_chart_days(request), refresh='fresh' in request.GET
+    )
+    return render(request, 'dashboard/dashboard.html', context)
+
+
+@async_login_required
+async def start_fasting_view(request):
+    if request.method == 'POST':
+        try:
+            await sync_to_async(FastingRecord.start_now)(request.user)
+            messages.success(request, 'Jejum iniciado com sucesso!')
+        except FastingConflict as e:
+            messages.error(request, e.messages[0])
+        except Exception as e:
+            messages.error(request, f'Erro ao iniciar jejum: {str(e)}')
+
+    return redirect('dashboard')
+
+
+@async_login_required
+async def end_fasting_view(request):
+    if request.method == 'POST':
+        try:
+            fasting = await sync_to_async(FastingRecord.end_active)(request.user, **end_fasting_fields(request.POST))
+            messages.success(request, f'Jejum encerrado! Duração: {fasting.duration_hours:.2f} horas')
+            return redirect('dashboard')
+        except FastingConflict as e:
+            messages.error(request, e.messages[0])
+            return redirect('dashboard')
+        except Exception as e:
+            messages.error(request, f'Erro ao encerrar jejum: {str(e)}')
+
+    active_fasting = await FastingRecord.objects.filter(user=request.user, end_time__isnull=True).afirst()
+    if not active_fasting:
+        messages.error(request, 'Não há jejum ativo para encerrar.')
+        return redirect('dashboard')
+
+    return render(request, 'fasting/end_fasting.html', {'active_fasting': active_fasting})
+
+
+@async_login_required
+async def history_view(request):
+    cursor = request.GET.get('cursor')
+    context = {'is_first_page': not cursor, **await sync_to_async(fragment_cache_context)(request.user.pk)}
+    if await ahas_fragment(context, 'history_page', request.user.pk, context['data_version'], cursor or ''):
+        # Tabela em cache: a página preguiçosa só seria buscada (na thread) se o fragmento expirasse no meio.
+        return await sync_to_async(lambda: render(request, 'fasting/history.html', history_context(request)))()
+
+    context['fastings'], context['next_cursor'] = await ahistory_page(request.user, cursor, HISTORY_PAGE_SIZE)
+    return render(request, 'fasting/history.html', context)
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+from .cache import cache_is_shared
+
+
+def _user_cache_key(user_id):
+    return f'auth-user:{user_id}'
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend que guarda o usuário da sessão no cache, evitando o SELECT em toda requisição.
+
+    Com cache local a cada processo e vários workers, uma troca de senha ou desativação só invalidaria a cópia
+    de um deles; nesse caso o usuário é sempre lido do banco.
+    """
+
+    def get_user(self, user_id):
+        if not cache_is_shared():
+            return super().get_user(user_id)
+        key = _user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache.set(key, user, timeout=settings.AUTH_USER_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
+
+
+def forget_cached_user(user_id):
+    cache.delete(_user_cache_key(user_id))
@@ -0,0 +1,399 @@
+import statistics
+import time
+from datetime import timedelta
+
+import django
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .models import CustomUser, FastingRecord, WeightRecord, month_start
+
+
+class _Rollback(Exception):
+    pass
+
+
+def seed_fasting_history(user, size, end=None, batch_size=5000):
+    """Cria `size` jejuns encerrados de 16h, um por dia, terminando antes de `end`."""
+    end = end or timezone.now()
+    first_start = end - timedelta(days=size)
+
+    records = (
+        FastingRecord(
+            user=user,
+            start_time=first_start + timedelta(days=i),
+            end_time=first_start + timedelta(days=i, hours=16),
+            duration_hours=16.0,
+            fasting_type='intermittent',
+        )
+        for i in range(size)
+    )
+    FastingRecord.objects.bulk_create(records, batch_size=batch_size)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(func, repeat):
+    """Executa `func` `repeat` vezes; retorna latências (ms) e o maior número de consultas."""
+    timings = []
+    queries = 0
+    for i in range(repeat):
+        with CaptureQueriesContext(connection) as captured:
+            began = time.perf_counter()
+            func(i)
+            timings.append((time.perf_counter() - began) * 1000)
+        queries = max(queries, len(captured))
+    return {
+        'repeat': repeat,
+        'queries': queries,
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+    }
+
+
+def _new_fasting_saver(user, first_start):
+    def save(i):
+        start = first_start + timedelta(days=i)
+        FastingRecord(
+            user=user,
+            start_time=start,
+            end_time=start + timedelta(hours=16),
+            fasting_type='intermittent',
+        ).save()
+    return save
+
+
+def time_fasting_save(size, repeat=20):
+    """Mede FastingRecord.save() de novos jejuns para um usuário com `size` jejuns no histórico.
+
+    Tudo roda em uma transação desfeita ao final, sem deixar dados no banco.
+    """
+    result = {}
+    try:
+        with transaction.atomic():
+            user = CustomUser.objects.create_user(
+                email=f'benchmark-save-{size}@example.com',
+                password=None,
+                name='Benchmark',
+            )
+            now = timezone.now()
+            seed_fasting_history(user, size, end=now)
+
+            result = {'history_size': size, **measure(_new_fasting_saver(user, now), repeat)}
+            raise _Rollback
+    except _Rollback:
+        pass
+    return result
+
+
+BENCHMARK_SCENARIOS = ['dashboard', 'dashboard_cached', 'history', 'weight', 'calculate_streak', 'fasting_save']
+
+
+def seed_benchmark_data(size, max_user_history=3650):
+    """Cria `size` jejuns: o usuário medido recebe até `max_user_history` e o resto vai para usuários de preenchimento."""
+    from .summaries import rebuild_daily_summaries
+
+    user = CustomUser.objects.create_user(email='benchmark@example.com', password=None, name='Benchmark')
+    now = timezone.now()
+    user_history = min(size, max_user_history)
+    seed_fasting_history(user, user_history, end=now)
+    rebuild_daily_summaries(user)
+
+    months = [f'{now.year - (i // 12)}-{12 - i % 12:02d}' for i in range(min(user_history // 30, 240))]
+    WeightRecord.objects.bulk_create([
+        WeightRecord(user=user, weight=80 - i * 0.1, reference_month=month, reference_date=month_start(month))
+        for i, month in enumerate(months)
+    ])
+
+    remaining = size - user_history
+    filler = 0
+    while remaining > 0:
+        filler += 1
+        other = CustomUser.objects.create_user(email=f'benchmark-{filler}@example.com', password=None, name='Benchmark')
+        seed_fasting_history(other, min(remaining, max_user_history), end=now)
+        remaining -= max_user_history
+
+    return user
+
+
+def run_benchmarks(sizes, repeat=20, scenarios=None, max_user_history=3650):
+    """Roda os cenários para cada tamanho de histórico, em transações desfeitas ao final."""
+    from django.test import Client
+    from django.test.utils import override_settings
+
+    from .cache import bump_user_data_version
+    from .views import calculate_streak
+
+    scenarios = scenarios or BENCHMARK_SCENARIOS
+    results = []
+
+    for size in sizes:
+        try:
+            with transaction.atomic(), override_settings(ALLOWED_HOSTS=['testserver']):
+                user = seed_benchmark_data(size, max_user_history)
+                client = Client()
+                client.force_login(user)
+
+                def get(url, fresh=False):
+                    def request(i):
+                        if fresh:
+                            bump_user_data_version(user.pk)
+                        response = client.get(url)
+                        assert response.status_code == 200, f'{url}: {response.status_code}'
+                    return request
+
+                runners = {
+                    'dashboard': get('/dashboard/', fresh=True),
+                    'dashboard_cached': get('/dashboard/'),
+                    'history': get('/fasting/history/'),
+                    'weight': get('/weight/'),
+                    'calculate_streak': lambda i: calculate_streak(user),
+                    'fasting_save': _new_fasting_saver(user, timezone.now() + timedelta(days=1)),
+                }
+                for name in scenarios:
+                    results.append({'scenario': name, 'history_size': size, **measure(runners[name], repeat)})
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    return {
+        'meta': {
+            'vendor': connection.vendor,
+            'django': django.get_version(),
+            'created_at': timezone.now().isoformat(),
+            'repeat': repeat,
+            'max_user_history': max_user_history,
+        },
+        'results': results,
+    }
+
+
+HTML_PAGES = ['/dashboard/', '/fasting/history/', '/weight/']
+
+
+def measure_html_pages(size, repeat=20, max_user_history=3650, paths=None):
+    """Bytes na rede (sem compressão, gzip e brotli) e tempo por página com fragmentos frios e quentes.
+
+    "Frio" troca a versão dos dados antes de cada requisição, como se não houvesse cache de fragmentos.
+    """
+    from django.test import Client
+    from django.test.utils import override_settings
+
+    from .cache import bump_user_data_version
+
+    rows = []
+    try:
+        with transaction.atomic(), override_settings(ALLOWED_HOSTS=['testserver']):
+            user = seed_benchmark_data(size, max_user_history)
+            client = Client()
+            client.force_login(user)
+
+            for path in paths or HTML_PAGES:
+                sizes = {
+                    encoding: len(client.get(path, HTTP_ACCEPT_ENCODING=encoding).content)
+                    for encoding in ('identity', 'gzip', 'br')
+                }
+
+                def cold(i):
+                    bump_user_data_version(user.pk)
+                    client.get(path)
+
+                cold_result = measure(cold, repeat)
+                client.get(path)
+                warm_result = measure(lambda i: client.get(path), repeat)
+                rows.append({
+                    'path': path,
+                    'history_size': size,
+                    'bytes_identity': sizes['identity'],
+                    'bytes_gzip': sizes['gzip'],
+                    'bytes_br': sizes['br'],
+                    'cold_p50_ms': cold_result['p50_ms'],
+                    'warm_p50_ms': warm_result['p50_ms'],
+                    'cold_queries': cold_result['queries'],
+                    'warm_queries': warm_result['queries'],
+                })
+            raise _Rollback
+    except _Rollback:
+        pass
+
+    return rows
+
+
+def compare_benchmarks(current, baseline, threshold=1.2):
+    """Compara com um resultado anterior; devolve as linhas de comparação e as regressões."""
+    previous = {(r['scenario'], r['history_size']): r for r in baseline['results']}
+    rows = []
+    regressions = []
+    for result in current['results']:
+        before = previous.get((result['scenario'], result['history_size']))
+        if before is None:
+            continue
+        ratio = result['p50_ms'] / before['p50_ms'] if before['p50_ms'] else 1.0
+        row = {
+            'scenario': result['scenario'],
+            'history_size': result['history_size'],
+            'p50_ratio': round(ratio, 2),
+            'queries_before': before['queries'],
+            'queries_after': result['queries'],
+        }
+        rows.append(row)
+        if ratio > threshold or result['queries'] > before['queries']:
+            regressions.append(row)
+    return rows, regressions
+
+
+def time_request_cycles(requests=200, sql='SELECT 1'):
+    """Simula ciclos de requisição (request_started/finished) executando uma consulta em cada um.
+
+    Os sinais disparam close_old_connections, então o resultado reflete CONN_MAX_AGE,
+    CONN_HEALTH_CHECKS exatamente como em uma requisição real.
+    """
+    from django.core.signals import request_finished, request_started
+    from django.db.backends.signals import connection_created
+
+    opened = []
+
+    def count_connection(sender, connection, **kwargs):
+        opened.append(connection.alias)
+
+    connection_created.connect(count_connection)
+    try:
+        timings = []
+        for _ in range(requests):
+            began = time.perf_counter()
+            request_started.send(sender=__name__)
+            with connection.cursor() as cursor:
+                cursor.execute(sql)
+                cursor.fetchall()
+            request_finished.send(sender=__name__)
+            timings.append((time.perf_counter() - began) * 1000)
+    finally:
+        connection_created.disconnect(count_connection)
+
+    return {
+        'vendor': connection.vendor,
+        'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+        'requests': requests,
+        'connections_opened': len(opened),
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+    }
+
+
+def _login_opener(base_url, email, password):
+    import http.cookiejar
+    import urllib.parse
+    import urllib.request
+
+    jar = http.cookiejar.CookieJar()
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(jar))
+    opener.open(f'{base_url}/login/').read()
+    csrf_token = next(cookie.value for cookie in jar if cookie.name == 'csrftoken')
+    data = urllib.parse.urlencode({
+        'username': email,
+        'password': password,
+        'csrfmiddlewaretoken': csrf_token,
+    }).encode()
+    opener.addheaders = [('Referer', f'{base_url}/login/')]
+    opener.open(f'{base_url}/login/', data).read()
+    if not any(cookie.name == 'sessionid' for cookie in jar):
+        raise ValueError('Falha no login: verifique email e senha.')
+    return opener
+
+
+def run_load_test(base_url, email, password, paths, requests=200, concurrency=20):
+    """Dispara `requests` GETs por caminho com `concurrency` clientes simultâneos contra um servidor em execução."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    base_url = base_url.rstrip('/')
+    opener = _login_opener(base_url, email, password)
+    results = []
+
+    def fetch(url):
+        began = time.perf_counter()
+        try:
+            with opener.open(url) as response:
+                response.read()
+                ok = response.status == 200
+        except OSError:
+            ok = False
+        return (time.perf_counter() - began) * 1000, ok
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for path in paths:
+            began = time.perf_counter()
+            samples = list(executor.map(fetch, [base_url + path] * requests))
+            elapsed = time.perf_counter() - began
+            timings = [timing for timing, _ in samples]
+            results.append({
+                'path': path,
+                'requests': requests,
+                'concurrency': concurrency,
+                'errors': sum(1 for _, ok in samples if not ok),
+                'rps': round(requests / elapsed, 1),
+                'p50_ms': round(statistics.median(timings), 3),
+                'p95_ms': round(percentile(timings, 95), 3),
+            })
+    return results
+
+
+GUNICORN_PROFILES = {
+    'sync': {'GUNICORN_WORKER_CLASS': 'sync', 'GUNICORN_PRELOAD': 'False'},
+    'sync-preload': {'GUNICORN_WORKER_CLASS': 'sync', 'GUNICORN_PRELOAD': 'True'},
+    'gthread': {'GUNICORN_WORKER_CLASS': 'gthread', 'GUNICORN_PRELOAD': 'True'},
+    'uvicorn': {'GUNICORN_WORKER_CLASS': 'uvicorn.workers.UvicornWorker', 'GUNICORN_PRELOAD': 'True', 'ASYNC_VIEWS': 'True'},
+}
+
+
+def _wait_until_ready(url, process, timeout=60):
+    import urllib.request
+
+    began = time.perf_counter()
+    while time.perf_counter() - began < timeout:
+        if process.poll() is not None:
+            raise RuntimeError(f'O gunicorn encerrou durante a inicialização (código {process.returncode}).')
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return (time.perf_counter() - began) * 1000
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f'{url} não respondeu em {timeout}s.')
+
+
+def compare_gunicorn_profiles(profiles, email, password, paths, workers=3, port=4100, requests=200, concurrency=20):
+    """Sobe o gunicorn com cada perfil de gunicorn.conf.py, mede o tempo até a primeira resposta e roda o teste de carga."""
+    import os
+    import subprocess
+    import sys
+
+    from django.conf import settings
+
+    base_url = f'http://127.0.0.1:{port}'
+    results = []
+    for name in profiles:
+        env = {
+            **os.environ,
+            **GUNICORN_PROFILES[name],
+            'GUNICORN_BIND': f'127.0.0.1:{port}',
+            'GUNICORN_WORKERS': str(workers),
+        }
+        began = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py'],
+            cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            _wait_until_ready(f'{base_url}/login/', process)
+            startup_ms = (time.perf_counter() - began) * 1000
+            load = run_load_test(base_url, email, password, paths, requests, concurrency)
+        finally:
+            process.terminate()
+            process.wait(timeout=60)
+        results.append({'profile': name, 'workers': workers, 'startup_ms': round(startup_ms), 'results': load})
+    return results
@@ -0,0 +1,127 @@
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import InvalidCacheBackendError, cache, caches
+from django.core.cache.utils import make_template_fragment_key
+from django.utils import timezone
+
+
+DASHBOARD_HITS_KEY = 'dashboard-cache:hits'
+DASHBOARD_MISSES_KEY = 'dashboard-cache:misses'
+
+PROCESS_LOCAL_CACHES = {'django.core.cache.backends.locmem.LocMemCache'}
+
+
+def cache_is_shared():
+    """Indica se uma invalidação feita em um processo vale para todos os outros.
+
+    Um cache em memória nunca vale: além dos workers web, comandos (import_fastings, rebuild_daily_summaries,
+    partition_fastings) e o run_workers gravam dados em processos próprios.
+    """
+    return settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHES
+
+
+def _version_key(user_id):
+    return f'user-data-version:{user_id}'
+
+
+def user_data_version(user_id):
+    """Versão dos dados do usuário; muda sempre que um registro dele é alterado."""
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(_version_key(user_id), version, timeout=None):
+            version = cache.get(_version_key(user_id), version)
+    return version
+
+
+def bump_user_data_version(user_id):
+    version = time.time_ns()
+    cache.set(_version_key(user_id), version, timeout=None)
+    return version
+
+
+def fragment_cache_context(user_id):
+    """Variáveis dos blocos {% cache %} por usuário: a versão dos dados entra na chave e invalida o fragmento.
+
+    Sem cache compartilhado o tempo é 0 e o fragmento é sempre renderizado.
+    """
+    return {
+        'data_version': user_data_version(user_id),
+        'fragment_cache_timeout': settings.FRAGMENT_CACHE_TIMEOUT if cache_is_shared() else 0,
+    }
+
+
+async def ahas_fragment(context, name, *vary_on):
+    """Indica se o bloco {% cache %} `name` já está no cache, com as mesmas chaves que o template usa."""
+    if not context['fragment_cache_timeout']:
+        return False
+    try:
+        fragment_cache = caches['template_fragments']
+    except InvalidCacheBackendError:
+        fragment_cache = cache
+    return await fragment_cache.ahas_key(make_template_fragment_key(name, vary_on))
+
+
+def _count(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def dashboard_cache_key(user_id, chart_days):
+    return f'dashboard:{user_id}:{timezone.localdate().isoformat()}:{chart_days}:{user_data_version(user_id)}'
+
+
+def get_dashboard_context(user, build, chart_days, refresh=False):
+    """Contexto do dashboard em cache por versão dos dados; sem cache compartilhado é sempre montado na hora.
+
+    `refresh` ignora a cópia em cache e grava uma nova.
+    """
+    if not cache_is_shared():
+        return build(user, chart_days)
+
+    key = dashboard_cache_key(user.pk, chart_days)
+    context = None if refresh else cache.get(key)
+    if context is not None:
+        _count(DASHBOARD_HITS_KEY)
+        return context
+
+    _count(DASHBOARD_MISSES_KEY)
+    context = build(user, chart_days)
+    cache.set(key, context, timeout=settings.DASHBOARD_CACHE_TIMEOUT)
+    return context
+
+
+async def aget_dashboard_context(user, abuild, chart_days, refresh=False):
+    if not cache_is_shared():
+        return await abuild(user, chart_days)
+
+    key = await sync_to_async(dashboard_cache_key)(user.pk, chart_days)
+    context = None if refresh else await cache.aget(key)
+    if context is not None:
+        await sync_to_async(_count)(DASHBOARD_HITS_KEY)
+        return context
+
+    await sync_to_async(_count)(DASHBOARD_MISSES_KEY)
+    context = await abuild(user, chart_days)
+    await cache.aset(key, context, timeout=settings.DASHBOARD_CACHE_TIMEOUT)
+    return context
+
+
+def dashboard_cache_stats():
+    hits = cache.get(DASHBOARD_HITS_KEY, 0)
+    misses = cache.get(DASHBOARD_MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 4) if total else 0.0,
+    }
+
+
+def reset_dashboard_cache_stats():
+    cache.delete_many([DASHBOARD_HITS_KEY, DASHBOARD_MISSES_KEY])
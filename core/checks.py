@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+from .cache import PROCESS_LOCAL_CACHES
+
+
+@register()
+def shared_cache_check(app_configs, **kwargs):
+    # Com um processo web só (desenvolvimento) o cache local apenas deixa os caches por usuário desligados.
+    if settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHES or settings.WEB_CONCURRENCY <= 1:
+        return []
+    return [Warning(
+        'LocMemCache com mais de um processo web: os caches por usuário (dashboard, tabelas, sequências, '
+        'usuário da sessão) ficam desligados.',
+        hint='Configure CACHE_BACKEND com um cache compartilhado (serviço redis do docker-compose).',
+        id='core.W001',
+    )]
@@ -83,3 +83,15 @@ class WeightRecordForm(forms.ModelForm):
             'weight': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.1', 'placeholder': 'Peso (kg)'}),
             'reference_month': forms.TextInput(attrs={'class': 'form-control', 'type': 'month', 'placeholder': 'YYYY-MM'}),
         }
+
+
+class FastingImportForm(forms.Form):
+    file = forms.FileField(
+        label='Arquivo',
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,.json,.ndjson'})
+    )
+    format = forms.ChoiceField(
+        label='Formato',
+        choices=[('csv', 'CSV'), ('json', 'JSON / NDJSON')],
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
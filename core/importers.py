@@ -0,0 +1,235 @@
+import bisect
+import csv
+import io
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .archive import latest_archived
+from .models import FastingRecord
+from .signals import invalidate_user_data
+from .summaries import local_days, refresh_daily_summaries
+
+
+IMPORT_FORMATS = ('csv', 'json')
+
+DATETIME_INPUT_FORMATS = ['%d/%m/%Y %H:%M', '%d/%m/%Y %H:%M:%S']
+
+VALID_FASTING_TYPES = {value for value, _ in FastingRecord.FASTING_TYPE_CHOICES}
+VALID_LEVELS = {value for value, _ in FastingRecord.LEVEL_CHOICES}
+
+
+class RowError(ValueError):
+    pass
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    errors: list = field(default_factory=list)
+
+    def add_error(self, row, message):
+        self.errors.append({'row': row, 'message': message})
+
+
+def read_rows(file, import_format):
+    """Lê um arquivo (bytes ou texto) e gera (número da linha, dicionário)."""
+    if import_format not in IMPORT_FORMATS:
+        raise ValueError('Formato inválido. Use csv ou json.')
+
+    stream = io.TextIOWrapper(file, encoding='utf-8-sig') if not isinstance(file, io.TextIOBase) else file
+
+    if import_format == 'csv':
+        for number, row in enumerate(csv.DictReader(stream), start=2):
+            yield number, row
+        return
+
+    content = stream.read().strip()
+    if content.startswith('['):
+        for number, row in enumerate(json.loads(content), start=1):
+            yield number, row
+    else:
+        for number, line in enumerate(content.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                yield number, json.loads(line)
+            except ValueError:
+                yield number, None
+
+
+def _text(value, label):
+    """Campo de texto opcional; números, listas e objetos do JSON são recusados."""
+    if value is None:
+        return ''
+    if not isinstance(value, str):
+        raise RowError(f'{label} deve ser texto.')
+    return value.strip()
+
+
+def _parse_datetime(value, label):
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        value = _text(value, label)
+        if not value:
+            raise RowError(f'{label} é obrigatório.')
+        try:
+            parsed = parse_datetime(value)
+        except ValueError:
+            # Formato certo, valores fora da faixa (mês 13, hora 25...).
+            raise RowError(f'{label} inválido: {value}.')
+        for input_format in DATETIME_INPUT_FORMATS:
+            if parsed is not None:
+                break
+            try:
+                parsed = datetime.strptime(value, input_format)
+            except ValueError:
+                pass
+        if parsed is None:
+            raise RowError(f'{label} inválido: {value}.')
+
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _parse_level(value, label):
+    if value in (None, ''):
+        return None
+    level = None
+    if isinstance(value, int) and not isinstance(value, bool):
+        level = value
+    elif isinstance(value, str) and value.strip().isdigit():
+        level = int(value)
+    if level not in VALID_LEVELS:
+        raise RowError(f'{label} deve ser 1, 2 ou 3.')
+    return level
+
+
+def build_record(user, row):
+    """Valida uma linha importada e devolve um FastingRecord ainda não salvo."""
+    if not isinstance(row, dict):
+        raise RowError('Linha inválida.')
+
+    start_time = _parse_datetime(row.get('start_time'), 'Início')
+    end_time = _parse_datetime(row.get('end_time'), 'Fim')
+    if start_time >= end_time:
+        raise RowError('O horário de término deve ser posterior ao horário de início.')
+    if user.archived_until is not None and start_time < user.archived_until:
+        raise RowError(
+            f'Jejuns anteriores a {timezone.localtime(user.archived_until).strftime("%d/%m/%Y")} estão arquivados.'
+        )
+
+    fasting_type = _text(row.get('fasting_type'), 'Tipo de jejum') or 'intermittent'
+    if fasting_type not in VALID_FASTING_TYPES:
+        raise RowError(f'Tipo de jejum inválido: {fasting_type}.')
+
+    notes = _text(row.get('notes'), 'Observações')
+    if len(notes) > 255:
+        raise RowError('Observações limitadas a 255 caracteres.')
+
+    return FastingRecord(
+        user=user,
+        start_time=start_time,
+        end_time=end_time,
+        duration_hours=round((end_time - start_time).total_seconds() / 3600, 2),
+        fasting_type=fasting_type,
+        energy_level=_parse_level(row.get('energy_level'), 'Nível de energia'),
+        focus_level=_parse_level(row.get('focus_level'), 'Nível de foco'),
+        mood_level=_parse_level(row.get('mood_level'), 'Nível de humor'),
+        notes=notes,
+    )
+
+
+def _check_batch(user, candidates, result):
+    """Varredura ordenada por início: descarta linhas que se sobrepõem ao banco ou ao próprio lote."""
+    candidates.sort(key=lambda item: item[1].start_time)
+    first_start = candidates[0][1].start_time
+    last_end = max(record.end_time for _, record in candidates)
+
+    active = FastingRecord.objects.filter(user=user, end_time__isnull=True).only('start_time').first()
+    existing = list(
+        FastingRecord.objects.filter(
+            user=user,
+            end_time__isnull=False,
+            start_time__lt=last_end,
+            end_time__gt=first_start,
+        )
+        .only('start_time', 'end_time')
+        .order_by('start_time')
+    )
+    # O último jejum arquivado pode avançar sobre o período ainda no banco.
+    tail = latest_archived(user)
+    if tail is not None and tail.end_time > first_start:
+        existing.insert(0, tail)
+    existing_starts = [record.start_time for record in existing]
+
+    accepted = []
+    previous = None
+    for number, record in candidates:
+        if active is not None:
+            result.add_error(number, 'Já existe um jejum ativo. Encerre-o antes de iniciar um novo.')
+            continue
+
+        index = bisect.bisect_left(existing_starts, record.end_time) - 1
+        if index >= 0 and existing[index].end_time > record.start_time:
+            other = existing[index]
+            result.add_error(
+                number,
+                f'Este jejum se sobrepõe ao jejum de {timezone.localtime(other.start_time).strftime("%d/%m/%Y %H:%M")} '
+                f'a {timezone.localtime(other.end_time).strftime("%d/%m/%Y %H:%M")}.'
+            )
+            continue
+
+        if previous is not None and previous[1].end_time > record.start_time:
+            result.add_error(number, f'Este jejum se sobrepõe ao jejum da linha {previous[0]}.')
+            continue
+
+        accepted.append(record)
+        previous = (number, record)
+
+    return accepted
+
+
+def import_fastings(user, rows, batch_size=500, dry_run=False):
+    """Importa jejuns encerrados em lotes: valida, varre sobreposições e grava com bulk_create.
+
+    Cada lote é gravado em uma transação própria; linhas inválidas são relatadas e ignoradas.
+    """
+    result = ImportResult()
+    batch = []
+
+    def flush():
+        if not batch:
+            return
+        with transaction.atomic():
+            accepted = _check_batch(user, batch, result)
+            if accepted and not dry_run:
+                FastingRecord.objects.bulk_create(accepted, batch_size=batch_size)
+                days = set()
+                for record in accepted:
+                    days |= local_days(record.start_time, record.end_time)
+                refresh_daily_summaries(user, days)
+                invalidate_user_data(user.pk)
+        result.created += len(accepted)
+        batch.clear()
+
+    for number, row in rows:
+        try:
+            batch.append((number, build_record(user, row)))
+        except RowError as e:
+            result.add_error(number, str(e))
+        except (TypeError, ValueError, OverflowError) as e:
+            # Qualquer outro valor inesperado invalida só a linha, não a importação.
+            result.add_error(number, f'Linha inválida: {e}')
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+
+    result.errors.sort(key=lambda error: error['row'])
+    return result
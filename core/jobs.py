@@ -0,0 +1,233 @@
+import logging
+import os
+import socket
+import tempfile
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import CustomUser, Job
+
+
+logger = logging.getLogger('core.jobs')
+
+TASKS = {}
+
+
+def task(name, max_attempts=3):
+    """Registra uma função `func(job)` como tarefa; o retorno (serializável em JSON) vira job.result."""
+    def register(func):
+        TASKS[name] = (func, max_attempts)
+        return func
+    return register
+
+
+def enqueue(task_name, user_id=None, payload=None, priority=0, run_at=None, unique=False):
+    """Cria um job pendente. Com unique=True reaproveita um job pendente igual do mesmo usuário."""
+    if task_name not in TASKS:
+        raise ValueError(f'Tarefa desconhecida: {task_name}')
+
+    payload = payload or {}
+    if unique:
+        existing = Job.objects.filter(user_id=user_id, task=task_name, payload=payload, status=Job.PENDING).first()
+        if existing is not None:
+            return existing
+
+    return Job.objects.create(
+        user_id=user_id,
+        task=task_name,
+        payload=payload,
+        priority=priority,
+        max_attempts=TASKS[task_name][1],
+        run_at=run_at or timezone.now(),
+    )
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+
+
+def claim_next(worker, per_user_limit=None):
+    """Marca como em execução o próximo job pendente (maior prioridade, mais antigo) e o retorna.
+
+    O limite por usuário é verificado na escolha: dois workers simultâneos podem ultrapassá-lo em um job.
+    """
+    per_user_limit = per_user_limit or settings.JOBS_PER_USER_LIMIT
+    now = timezone.now()
+    running = (
+        Job.objects.filter(user=OuterRef('user'), status=Job.RUNNING)
+        .values('user')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    candidates = (
+        Job.objects.filter(status=Job.PENDING, run_at__lte=now)
+        .annotate(running=Coalesce(Subquery(running, output_field=IntegerField()), Value(0)))
+        .filter(Q(user__isnull=True) | Q(running__lt=per_user_limit))
+        .order_by('-priority', 'run_at', 'id')
+    )
+
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True, of=('self',))
+        for job in candidates[:10]:
+            claimed = Job.objects.filter(pk=job.pk, status=Job.PENDING).update(
+                status=Job.RUNNING, locked_by=worker, locked_at=now, attempts=job.attempts + 1,
+            )
+            if claimed:
+                job.refresh_from_db()
+                return job
+    return None
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(settings.JOBS_RETRY_BACKOFF * 2 ** (attempts - 1), settings.JOBS_MAX_BACKOFF))
+
+
+def run_job(job):
+    """Executa um job já reservado e grava o resultado; falhas voltam para a fila com backoff exponencial."""
+    func, _ = TASKS.get(job.task, (None, None))
+    try:
+        if func is None:
+            raise LookupError(f'Tarefa desconhecida: {job.task}')
+        result = func(job)
+    except Exception:
+        error = traceback.format_exc(limit=5)
+        if job.attempts < job.max_attempts:
+            job.status = Job.PENDING
+            job.run_at = timezone.now() + retry_delay(job.attempts)
+            logger.warning('Job %s (%s) falhou na tentativa %d; nova tentativa em %s.',
+                           job.pk, job.task, job.attempts, job.run_at)
+        else:
+            job.status = Job.FAILED
+            job.finished_at = timezone.now()
+            logger.error('Job %s (%s) falhou definitivamente após %d tentativas.', job.pk, job.task, job.attempts)
+        job.error = error
+        job.save(update_fields=['status', 'run_at', 'finished_at', 'error'])
+        return job
+
+    job.status = Job.SUCCEEDED
+    job.result = result
+    job.error = ''
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'error', 'finished_at'])
+    return job
+
+
+def requeue_stale_jobs(stale_after=None):
+    """Devolve à fila jobs presos em execução (worker encerrado no meio da tarefa).
+
+    A tentativa interrompida conta: um job que já esgotou max_attempts falha em vez de derrubar outro worker.
+    """
+    stale_after = stale_after or settings.JOBS_STALE_AFTER
+    now = timezone.now()
+    stale = Job.objects.filter(status=Job.RUNNING, locked_at__lt=now - timedelta(seconds=stale_after))
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED, locked_by='', locked_at=None, finished_at=now,
+        error='Worker encerrado durante a execução; tentativas esgotadas.',
+    )
+    if failed:
+        logger.error('%d job(s) travado(s) falharam definitivamente.', failed)
+    return stale.update(status=Job.PENDING, locked_by='', locked_at=None, run_at=now)
+
+
+def export_expires_at(job):
+    return job.finished_at + timedelta(seconds=settings.JOBS_EXPORT_TTL)
+
+
+def purge_jobs(now=None):
+    """Apaga os arquivos de exportações vencidas e os jobs encerrados há mais de JOBS_RETENTION.
+
+    Retorna (arquivos apagados, jobs apagados).
+    """
+    from django.core.files.storage import storages
+
+    now = now or timezone.now()
+    storage = storages['exports']
+    retention_cutoff = now - timedelta(seconds=settings.JOBS_RETENTION)
+    # O arquivo sai junto com o job mesmo que a retenção seja menor que a validade do download.
+    expired = Job.objects.filter(
+        task='export_fastings', status=Job.SUCCEEDED, result__has_key='file',
+        finished_at__lt=max(now - timedelta(seconds=settings.JOBS_EXPORT_TTL), retention_cutoff),
+    )
+
+    removed = 0
+    for job in expired.iterator():
+        storage.delete(job.result['file'])
+        job.result = {key: value for key, value in job.result.items() if key != 'file'}
+        job.save(update_fields=['result'])
+        removed += 1
+
+    deleted, _ = Job.objects.filter(
+        status__in=(Job.SUCCEEDED, Job.FAILED), finished_at__lt=retention_cutoff
+    ).delete()
+    return removed, deleted
+
+
+def housekeeping():
+    """Manutenção periódica da fila, feita pelo processo de `run_workers`."""
+    requeued = requeue_stale_jobs()
+    removed, deleted = purge_jobs()
+    return {'requeued': requeued, 'exports_removed': removed, 'jobs_deleted': deleted}
+
+
+def work(stop, per_user_limit=None, poll_interval=1.0, burst=False, between_jobs=None):
+    """Laço de um worker: pega e executa jobs até `stop` ser sinalizado (ou a fila esvaziar, com burst)."""
+    worker = worker_name()
+    processed = 0
+    while not stop.is_set():
+        if between_jobs:
+            between_jobs()
+        job = claim_next(worker, per_user_limit)
+        if job is None:
+            if burst:
+                break
+            stop.wait(poll_interval)
+            continue
+        run_job(job)
+        processed += 1
+    return processed
+
+
+def run_worker_thread(stop, per_user_limit=None, poll_interval=1.0, burst=False):
+    """Worker de longa duração: como uma requisição, descarta conexões velhas entre um job e outro."""
+    try:
+        return work(stop, per_user_limit, poll_interval, burst, between_jobs=close_old_connections)
+    finally:
+        connection.close()
+
+
+def run_pending(per_user_limit=None):
+    """Executa na thread atual todos os jobs prontos; útil em testes e em cron sem worker dedicado."""
+    return work(threading.Event(), per_user_limit, burst=True)
+
+
+@task('refresh_statistics')
+def refresh_statistics_task(job):
+    from .analytics import refresh_user_statistics
+
+    stats = refresh_user_statistics(job.user_id)
+    return {'reference_date': stats.reference_date.isoformat()} if stats else None
+
+
+@task('export_fastings')
+def export_fastings_task(job):
+    from django.core.files import File
+    from django.core.files.storage import storages
+
+    from .views import export_lines
+
+    export_format = job.payload.get('format', 'csv')
+    user = CustomUser.objects.get(pk=job.user_id)
+    with tempfile.TemporaryFile() as buffer:
+        for line in export_lines(user, export_format):
+            buffer.write(line.encode())
+        buffer.seek(0)
+        name = storages['exports'].save(f'{job.user_id}/jejuns-{job.pk}.{export_format}', File(buffer))
+    return {'file': name, 'format': export_format}
@@ -0,0 +1,167 @@
+import asyncio
+import json
+import threading
+from datetime import datetime, timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import FastingRecord
+
+
+KEEPALIVE_SECONDS = 25
+
+
+class Subscription:
+    def __init__(self, user_id, maxsize=100):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def put(self, event):
+        def deliver():
+            # Cliente lento: descarta o evento em vez de acumular memória.
+            if not self.queue.full():
+                self.queue.put_nowait(event)
+
+        self.loop.call_soon_threadsafe(deliver)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class Broadcaster:
+    """Interface dos backends de atualização ao vivo (LIVE_UPDATES_BACKEND)."""
+
+    def subscribe(self, user_id):
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+    def publish(self, user_id, event):
+        raise NotImplementedError
+
+
+class InProcessBroadcaster(Broadcaster):
+    """Entrega eventos às conexões abertas no próprio processo.
+
+    Com vários processos/servidores é preciso um backend compartilhado (ex.: Redis pub/sub)
+    que implemente a mesma interface.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+
+    def subscribe(self, user_id):
+        subscription = Subscription(user_id)
+        with self._lock:
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(subscription.user_id, None)
+
+    def publish(self, user_id, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            subscription.put(event)
+
+    def connection_count(self):
+        with self._lock:
+            return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+
+_broadcasters = {}
+_broadcasters_lock = threading.Lock()
+
+
+def get_broadcaster():
+    path = settings.LIVE_UPDATES_BACKEND
+    with _broadcasters_lock:
+        if path not in _broadcasters:
+            _broadcasters[path] = import_string(path)()
+        return _broadcasters[path]
+
+
+def goal_at(start_time, goal_hours):
+    return (start_time + timedelta(hours=goal_hours)).isoformat()
+
+
+def fasting_started_event(fasting, goal_hours):
+    return {
+        'type': 'fasting_started',
+        'id': fasting.pk,
+        'start_time': fasting.start_time.isoformat(),
+        'goal_at': goal_at(fasting.start_time, goal_hours),
+    }
+
+
+def fasting_ended_event(fasting):
+    return {
+        'type': 'fasting_ended',
+        'id': fasting.pk,
+        'duration_hours': fasting.duration_hours,
+    }
+
+
+def publish(user_id, event):
+    get_broadcaster().publish(user_id, event)
+
+
+def format_event(event):
+    return f'event: {event["type"]}\ndata: {json.dumps(event)}\n\n'
+
+
+def _snapshot(user):
+    active = FastingRecord.objects.filter(user=user, end_time__isnull=True).only('start_time').first()
+    if active is None:
+        return {'type': 'snapshot', 'active': None}
+    return {'type': 'snapshot', 'active': fasting_started_event(active, user.fasting_goal_hours)}
+
+
+def _goal_deadline(event):
+    if event['type'] == 'snapshot':
+        event = event['active']
+    if event and event['type'] == 'fasting_started':
+        return datetime.fromisoformat(event['goal_at'])
+    return None
+
+
+async def event_stream(user, keepalive=KEEPALIVE_SECONDS):
+    """Gera o fluxo SSE do usuário: estado inicial, início/fim de jejum e meta atingida."""
+    broadcaster = get_broadcaster()
+    subscription = broadcaster.subscribe(user.pk)
+    try:
+        snapshot = await sync_to_async(_snapshot)(user)
+        deadline = _goal_deadline(snapshot)
+        yield format_event(snapshot)
+
+        while True:
+            timeout = keepalive
+            if deadline is not None:
+                timeout = min(timeout, max((deadline - timezone.now()).total_seconds(), 0))
+
+            try:
+                event = await asyncio.wait_for(subscription.get(), timeout)
+            except asyncio.TimeoutError:
+                if deadline is not None and deadline <= timezone.now():
+                    deadline = None
+                    yield format_event({'type': 'goal_reached'})
+                else:
+                    yield ': keepalive\n\n'
+                continue
+
+            if event['type'] in ('fasting_started', 'fasting_ended'):
+                deadline = _goal_deadline(event)
+            yield format_event(event)
+    finally:
+        broadcaster.unsubscribe(subscription)
@@ -0,0 +1,53 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarks import BENCHMARK_SCENARIOS, compare_benchmarks, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Roda a suíte de benchmarks das views e models principais e grava o resultado em JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='100,10000',
+                            help='Quantidades de FastingRecord no banco, separadas por vírgula (100 a 1000000).')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--scenarios', default=','.join(BENCHMARK_SCENARIOS))
+        parser.add_argument('--max-user-history', type=int, default=3650,
+                            help='Máximo de jejuns do usuário medido; o excedente vai para outros usuários.')
+        parser.add_argument('--output', help='Arquivo JSON de saída.')
+        parser.add_argument('--baseline', help='Arquivo JSON de um resultado anterior para comparação.')
+        parser.add_argument('--threshold', type=float, default=1.2,
+                            help='Razão de p50 acima da qual um cenário é considerado regressão.')
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',') if size]
+        scenarios = [name for name in options['scenarios'].split(',') if name]
+        unknown = set(scenarios) - set(BENCHMARK_SCENARIOS)
+        if unknown:
+            raise CommandError(f"Cenários desconhecidos: {', '.join(sorted(unknown))}")
+
+        report = run_benchmarks(sizes, options['repeat'], scenarios, options['max_user_history'])
+
+        self.stdout.write(f"{'cenário':<18} {'registros':>10} {'consultas':>10} {'p50 (ms)':>10} {'p95 (ms)':>10}")
+        for result in report['results']:
+            self.stdout.write(
+                f"{result['scenario']:<18} {result['history_size']:>10} {result['queries']:>10} "
+                f"{result['p50_ms']:>10} {result['p95_ms']:>10}"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(report, file, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Resultado gravado em {options['output']}"))
+
+        if options['baseline']:
+            with open(options['baseline']) as file:
+                rows, regressions = compare_benchmarks(report, json.load(file), options['threshold'])
+            for row in rows:
+                self.stdout.write(
+                    f"{row['scenario']:<18} {row['history_size']:>10} p50 x{row['p50_ratio']} "
+                    f"consultas {row['queries_before']} -> {row['queries_after']}"
+                )
+            if regressions:
+                raise CommandError(f'{len(regressions)} regressão(ões) em relação ao baseline.')
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from core.benchmarks import time_fasting_save
+
+
+class Command(BaseCommand):
+    help = 'Mede a latência de FastingRecord.save() para históricos de tamanhos diferentes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10,1000,10000,100000',
+                            help='Tamanhos de histórico separados por vírgula.')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',') if size]
+
+        self.stdout.write(f"{'histórico':>10} {'consultas':>10} {'p50 (ms)':>10} {'p95 (ms)':>10}")
+        for size in sizes:
+            result = time_fasting_save(size, repeat=options['repeat'])
+            self.stdout.write(
+                f"{result['history_size']:>10} {result['queries']:>10} "
+                f"{result['p50_ms']:>10} {result['p95_ms']:>10}"
+            )
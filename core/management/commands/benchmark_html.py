@@ -0,0 +1,35 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.benchmarks import HTML_PAGES, measure_html_pages
+
+
+class Command(BaseCommand):
+    help = 'Mede bytes transferidos (sem compressão/gzip/brotli) e tempo de render das páginas HTML com e sem cache de fragmentos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=3650, help='Quantidade de FastingRecord do usuário medido.')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--paths', default=','.join(HTML_PAGES))
+        parser.add_argument('--output', help='Arquivo JSON de saída.')
+
+    def handle(self, *args, **options):
+        paths = [path for path in options['paths'].split(',') if path]
+        rows = measure_html_pages(options['size'], options['repeat'], paths=paths)
+
+        self.stdout.write(
+            f"{'página':<18} {'bytes':>8} {'gzip':>8} {'brotli':>8} "
+            f"{'frio p50 (ms)':>14} {'quente p50 (ms)':>16} {'consultas':>10}"
+        )
+        for row in rows:
+            self.stdout.write(
+                f"{row['path']:<18} {row['bytes_identity']:>8} {row['bytes_gzip']:>8} {row['bytes_br']:>8} "
+                f"{row['cold_p50_ms']:>14} {row['warm_p50_ms']:>16} "
+                f"{row['cold_queries']:>4} -> {row['warm_queries']:<3}"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(rows, file, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Resultado gravado em {options['output']}"))
@@ -0,0 +1,48 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarks import GUNICORN_PROFILES, compare_gunicorn_profiles
+
+
+class Command(BaseCommand):
+    help = 'Compara perfis do gunicorn.conf.py (sync, preload, gthread, uvicorn): tempo de inicialização e vazão.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', required=True, help='Email de um usuário existente.')
+        parser.add_argument('--password', required=True)
+        parser.add_argument('--profiles', default=','.join(GUNICORN_PROFILES))
+        parser.add_argument('--paths', default='/dashboard/,/fasting/history/')
+        parser.add_argument('--workers', type=int, default=3)
+        parser.add_argument('--port', type=int, default=4100)
+        parser.add_argument('--requests', type=int, default=200, help='Requisições por caminho.')
+        parser.add_argument('--concurrency', type=int, default=20, help='Clientes simultâneos.')
+        parser.add_argument('--output', help='Arquivo JSON de saída.')
+
+    def handle(self, *args, **options):
+        profiles = [name for name in options['profiles'].split(',') if name]
+        unknown = set(profiles) - set(GUNICORN_PROFILES)
+        if unknown:
+            raise CommandError(f"Perfis desconhecidos: {', '.join(sorted(unknown))}")
+
+        paths = [path for path in options['paths'].split(',') if path]
+        try:
+            results = compare_gunicorn_profiles(
+                profiles, options['email'], options['password'], paths,
+                options['workers'], options['port'], options['requests'], options['concurrency'],
+            )
+        except (OSError, RuntimeError, ValueError, StopIteration) as e:
+            raise CommandError(f'Falha ao comparar os perfis: {e}')
+
+        self.stdout.write(f"{'perfil':<14} {'início (ms)':>12} {'caminho':<20} {'req/s':>8} {'p95 (ms)':>10} {'erros':>6}")
+        for profile in results:
+            for row in profile['results']:
+                self.stdout.write(
+                    f"{profile['profile']:<14} {profile['startup_ms']:>12} {row['path']:<20} "
+                    f"{row['rps']:>8} {row['p95_ms']:>10} {row['errors']:>6}"
+                )
+
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(results, file, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Resultado gravado em {options['output']}"))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from core.cache import dashboard_cache_stats, reset_dashboard_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Mostra os contadores de acertos/falhas do cache do dashboard.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Zera os contadores após exibir.')
+
+    def handle(self, *args, **options):
+        stats = dashboard_cache_stats()
+        self.stdout.write(
+            f"acertos: {stats['hits']}  falhas: {stats['misses']}  taxa de acerto: {stats['hit_rate']:.2%}"
+        )
+        if options['reset']:
+            reset_dashboard_cache_stats()
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from core.benchmarks import time_request_cycles
+
+
+class Command(BaseCommand):
+    help = 'Mede a latência de banco por requisição com a configuração de conexões atual.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--sql', default='SELECT 1', help='Consulta executada em cada requisição.')
+
+    def handle(self, *args, **options):
+        result = time_request_cycles(options['requests'], options['sql'])
+        self.stdout.write(
+            f"{result['vendor']} CONN_MAX_AGE={result['conn_max_age']}: "
+            f"{result['requests']} requisições, {result['connections_opened']} conexões abertas, "
+            f"p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms"
+        )
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.importers import IMPORT_FORMATS, import_fastings, read_rows
+from core.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = 'Importa jejuns históricos (CSV ou JSON/NDJSON) para um usuário.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='Email do usuário que receberá os jejuns.')
+        parser.add_argument('path', help='Arquivo a importar.')
+        parser.add_argument('--format', choices=IMPORT_FORMATS,
+                            help='Formato do arquivo (padrão: deduzido pela extensão).')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help='Apenas valida, sem gravar.')
+
+    def handle(self, *args, **options):
+        try:
+            user = CustomUser.objects.get(email=options['email'])
+        except CustomUser.DoesNotExist:
+            raise CommandError(f"Usuário {options['email']} não encontrado.")
+
+        import_format = options['format'] or ('csv' if options['path'].lower().endswith('.csv') else 'json')
+
+        try:
+            with open(options['path'], encoding='utf-8-sig') as file:
+                result = import_fastings(
+                    user,
+                    read_rows(file, import_format),
+                    batch_size=options['batch_size'],
+                    dry_run=options['dry_run'],
+                )
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Erro ao ler o arquivo: {e}')
+
+        for error in result.errors:
+            self.stderr.write(f"linha {error['row']}: {error['message']}")
+
+        action = 'validados' if options['dry_run'] else 'importados'
+        self.stdout.write(self.style.SUCCESS(
+            f'{result.created} jejum(ns) {action}, {len(result.errors)} linha(s) com erro.'
+        ))
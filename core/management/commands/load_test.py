@@ -0,0 +1,40 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarks import run_load_test
+
+
+class Command(BaseCommand):
+    help = 'Mede vazão e latência de um servidor em execução com clientes simultâneos (compara WSGI e ASGI).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://localhost:8000', help='Endereço do servidor.')
+        parser.add_argument('--email', required=True, help='Email de um usuário existente.')
+        parser.add_argument('--password', required=True)
+        parser.add_argument('--paths', default='/dashboard/,/fasting/history/')
+        parser.add_argument('--requests', type=int, default=200, help='Requisições por caminho.')
+        parser.add_argument('--concurrency', type=int, default=20, help='Clientes simultâneos.')
+        parser.add_argument('--output', help='Arquivo JSON de saída.')
+
+    def handle(self, *args, **options):
+        paths = [path for path in options['paths'].split(',') if path]
+        try:
+            results = run_load_test(
+                options['url'], options['email'], options['password'], paths,
+                options['requests'], options['concurrency'],
+            )
+        except (OSError, ValueError, StopIteration) as e:
+            raise CommandError(f'Não foi possível conectar/autenticar em {options["url"]}: {e}')
+
+        self.stdout.write(f"{'caminho':<22} {'req/s':>8} {'p50 (ms)':>10} {'p95 (ms)':>10} {'erros':>6}")
+        for result in results:
+            self.stdout.write(
+                f"{result['path']:<22} {result['rps']:>8} {result['p50_ms']:>10} "
+                f"{result['p95_ms']:>10} {result['errors']:>6}"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(results, file, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Resultado gravado em {options['output']}"))
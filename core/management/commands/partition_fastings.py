@@ -0,0 +1,75 @@
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, NotSupportedError
+from django.utils import timezone
+
+from core.partitioning import (
+    DEFAULT_PARTITION, INTERVALS, TABLE, archive_partitions, check_postgresql, convert_to_partitioned,
+    ensure_partitions, is_partitioned, list_partitions,
+)
+from core.summaries import local_midnight
+
+
+class Command(BaseCommand):
+    help = (
+        'Particiona a tabela de jejuns por start_time (PostgreSQL). Ações: status, convert (migra a tabela atual), '
+        'create (partições futuras; agende uma vez por mês) e archive (move partições antigas para o arquivo frio).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['status', 'convert', 'create', 'archive'])
+        parser.add_argument('--interval', choices=INTERVALS, default=settings.FASTING_PARTITION_INTERVAL,
+                            help='Tamanho de cada partição.')
+        parser.add_argument('--ahead', type=int, default=settings.FASTING_PARTITIONS_AHEAD,
+                            help='Quantos períodos futuros manter criados.')
+        parser.add_argument('--older-than-months', type=int, default=settings.FASTING_ARCHIVE_AFTER_MONTHS,
+                            help='archive: arquiva partições encerradas há mais de N meses (mínimo 12).')
+
+    def handle(self, *args, **options):
+        try:
+            check_postgresql()
+            if options['action'] == 'convert':
+                copied, created = convert_to_partitioned(options['interval'], options['ahead'])
+                self.stdout.write(self.style.SUCCESS(
+                    f'{TABLE} particionada: {copied} jejum(ns) copiado(s) para {len(created)} partição(ões) + DEFAULT.'
+                ))
+                return
+
+            if not is_partitioned():
+                raise CommandError(f'{TABLE} ainda não é particionada; rode "partition_fastings convert" antes.')
+
+            if options['action'] == 'create':
+                created = ensure_partitions(options['interval'], options['ahead'])
+                self.stdout.write(self.style.SUCCESS(
+                    f"Partições criadas: {', '.join(created)}" if created else 'Nenhuma partição nova.'
+                ))
+            elif options['action'] == 'archive':
+                archived, skipped = archive_partitions(self.archive_cutoff(options['older_than_months']))
+                for label, total in archived:
+                    self.stdout.write(f'{label}: {total} jejum(ns) arquivado(s).')
+                for label in skipped:
+                    self.stdout.write(self.style.WARNING(f'{label}: há jejum em andamento, partição mantida.'))
+                self.stdout.write(self.style.SUCCESS(f'{len(archived)} partição(ões) arquivada(s).'))
+            else:
+                self.write_status()
+        except (NotSupportedError, ValueError) as e:
+            raise CommandError(str(e))
+        except DatabaseError as e:
+            raise CommandError(f'Falha no banco (nenhuma alteração foi mantida): {e}')
+
+    def archive_cutoff(self, months):
+        today = timezone.localdate()
+        index = today.year * 12 + today.month - 1 - months
+        return local_midnight(date(index // 12, index % 12 + 1, 1))
+
+    def write_status(self):
+        partitions = list_partitions()
+        self.stdout.write(f"{'partição':<32} {'início':<12} {'fim':<12} {'linhas (estimativa)':>20}")
+        for partition in partitions:
+            self.stdout.write(
+                f"{partition['name']:<32} {partition['start'].date().isoformat():<12} "
+                f"{partition['end'].date().isoformat():<12} {partition['rows']:>20}"
+            )
+        self.stdout.write(f'{DEFAULT_PARTITION} recebe jejuns fora dessas faixas.')
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import CustomUser
+from core.summaries import rebuild_daily_summaries
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói a tabela de resumos diários de jejum a partir dos registros existentes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', help='Reconstrói apenas o usuário com este email.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        users = CustomUser.objects.order_by('pk')
+        if options['email']:
+            users = users.filter(email=options['email'])
+            if not users.exists():
+                raise CommandError(f"Usuário {options['email']} não encontrado.")
+
+        total_users = 0
+        total_days = 0
+        for user in users.iterator():
+            total_days += rebuild_daily_summaries(user, batch_size=options['batch_size'])
+            total_users += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{total_days} resumos diários gerados para {total_users} usuário(s).'
+        ))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.analytics import refresh_user_statistics
+from core.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = 'Recalcula as estatísticas pré-calculadas dos usuários (agende uma vez por dia, após a meia-noite).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', help='Recalcula apenas o usuário com este email.')
+        parser.add_argument('--stale-only', action='store_true',
+                            help='Ignora usuários cujas estatísticas já foram calculadas hoje e continuam atualizadas.')
+
+    def handle(self, *args, **options):
+        users = CustomUser.objects.order_by('pk')
+        if options['email']:
+            users = users.filter(email=options['email'])
+            if not users.exists():
+                raise CommandError(f"Usuário {options['email']} não encontrado.")
+        if options['stale_only']:
+            users = users.exclude(statistics__reference_date=timezone.localdate(), statistics__stale=False)
+
+        total_users = 0
+        for user in users.iterator():
+            refresh_user_statistics(user)
+            total_users += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Estatísticas recalculadas para {total_users} usuário(s).'))
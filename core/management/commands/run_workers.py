@@ -0,0 +1,64 @@
+import signal
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.jobs import TASKS, housekeeping, run_worker_thread
+
+
+class Command(BaseCommand):
+    help = 'Executa as tarefas em segundo plano da tabela Job (sem broker externo). Rode mais de um processo para escalar.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=2, help='Workers (threads) neste processo.')
+        parser.add_argument('--per-user-limit', type=int, default=settings.JOBS_PER_USER_LIMIT,
+                            help='Máximo de jobs do mesmo usuário executando ao mesmo tempo.')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Segundos de espera com a fila vazia.')
+        parser.add_argument('--burst', action='store_true', help='Encerra quando não houver mais jobs prontos.')
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: stop.set())
+
+        self.housekeeping()
+        self.stdout.write(
+            f"{options['threads']} worker(s); tarefas: {', '.join(sorted(TASKS))}; "
+            f"limite por usuário: {options['per_user_limit']}"
+        )
+
+        worker_args = (stop, options['per_user_limit'], options['poll_interval'], options['burst'])
+        threads = [
+            threading.Thread(target=run_worker_thread, args=worker_args, name=f'job-worker-{i}', daemon=True)
+            for i in range(options['threads'])
+        ]
+        for thread in threads:
+            thread.start()
+        # join com timeout mantém o processo responsivo aos sinais; entre um e outro, a manutenção da fila.
+        next_housekeeping = time.monotonic() + settings.JOBS_HOUSEKEEPING_INTERVAL
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(timeout=0.5)
+            if time.monotonic() >= next_housekeeping and not stop.is_set():
+                self.housekeeping()
+                next_housekeeping = time.monotonic() + settings.JOBS_HOUSEKEEPING_INTERVAL
+
+        self.stdout.write(self.style.SUCCESS('Workers encerrados.'))
+
+    def housekeeping(self):
+        """Devolve jobs travados, apaga exportações vencidas e jobs antigos; uma falha não derruba os workers."""
+        close_old_connections()
+        try:
+            done = housekeeping()
+        except Exception as e:
+            self.stderr.write(f'Falha na manutenção da fila: {e}')
+            return
+        if done['requeued']:
+            self.stdout.write(f"{done['requeued']} job(s) travado(s) devolvido(s) à fila.")
+        if done['exports_removed'] or done['jobs_deleted']:
+            self.stdout.write(
+                f"{done['exports_removed']} exportação(ões) vencida(s) e {done['jobs_deleted']} job(s) antigo(s) apagados."
+            )
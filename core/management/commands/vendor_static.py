@@ -0,0 +1,94 @@
+import base64
+import hashlib
+import re
+import urllib.request
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+# caminho em static/vendor/ -> (url, sha384 no formato SRI do arquivo como o CDN o entrega).
+# None = ainda sem hash fixado: o comando baixa, avisa e mostra o sha384 a copiar para cá.
+VENDOR_ASSETS = {
+    'bootstrap/css/bootstrap.min.css': (
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css',
+        'sha384-9ndCyUaIbzAi2FUVXJi0CjmCapSmO7SnpJef0486qhLnuZ2cdeRhO02iuK6FUUVM',
+    ),
+    'bootstrap/js/bootstrap.bundle.min.js': (
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js',
+        'sha384-geWF76RCwLtnZ8qwWowPQNguL3RmwHVBC9FhGdlKrxdiJJigb/j/68SIy3Te4Bkz',
+    ),
+    'bootstrap-icons/bootstrap-icons.min.css': (
+        'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.0/font/bootstrap-icons.min.css',
+        None,
+    ),
+    'bootstrap-icons/fonts/bootstrap-icons.woff2': (
+        'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.0/font/fonts/bootstrap-icons.woff2',
+        None,
+    ),
+    'bootstrap-icons/fonts/bootstrap-icons.woff': (
+        'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.0/font/fonts/bootstrap-icons.woff',
+        None,
+    ),
+    'chart.js/chart.umd.min.js': (
+        'https://cdn.jsdelivr.net/npm/chart.js@4.4.0/dist/chart.umd.min.js',
+        None,
+    ),
+}
+
+# Os .map não são baixados; sem a referência o collectstatic não procura por eles.
+SOURCE_MAP_COMMENT = re.compile(rb'\n?/[/*]# sourceMappingURL=[^\n]*')
+
+
+def strip_source_map(content):
+    return SOURCE_MAP_COMMENT.sub(b'', content)
+
+
+def sri_digest(content):
+    return 'sha384-' + base64.b64encode(hashlib.sha384(content).digest()).decode()
+
+
+class Command(BaseCommand):
+    help = 'Baixa Bootstrap, Bootstrap Icons e Chart.js (versões fixas) para static/vendor/, antes do collectstatic.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Baixa novamente os arquivos já existentes.')
+        parser.add_argument('--timeout', type=int, default=30)
+
+    def handle(self, *args, **options):
+        vendor_dir = Path(settings.STATICFILES_DIRS[0]) / 'vendor'
+
+        downloaded = 0
+        for relative_path, (url, expected) in VENDOR_ASSETS.items():
+            target = vendor_dir / relative_path
+            if target.exists() and not options['force']:
+                continue
+            try:
+                with urllib.request.urlopen(url, timeout=options['timeout']) as response:
+                    content = response.read()
+            except OSError as e:
+                raise CommandError(f'Falha ao baixar {url}: {e}')
+
+            # O hash é do arquivo original, antes de remover o sourceMappingURL.
+            digest = sri_digest(content)
+            if expected is None:
+                self.stderr.write(self.style.WARNING(
+                    f'{relative_path} sem hash fixado em VENDOR_ASSETS; baixado com {digest}'
+                ))
+            elif digest != expected:
+                raise CommandError(
+                    f'{url} não confere com o hash fixado (esperado {expected}, recebido {digest}); '
+                    f'{relative_path} não foi gravado.'
+                )
+
+            if target.suffix in ('.css', '.js'):
+                content = strip_source_map(content)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(content)
+            downloaded += 1
+            self.stdout.write(f'{relative_path} ({len(content) / 1024:.0f} KiB)')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{downloaded} arquivo(s) baixado(s); {len(VENDOR_ASSETS) - downloaded} já existiam em {vendor_dir}.'
+        ))
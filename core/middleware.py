@@ -0,0 +1,229 @@
+import logging
+import re
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # instalado junto com whitenoise[brotli]; sem ele fica só o gzip
+    brotli = None
+
+
+logger = logging.getLogger('core.performance')
+
+_current_stats = ContextVar('request_performance_stats', default=None)
+_template_patch_lock = threading.Lock()
+_template_patched = False
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+
+    def record_query(self, execute, sql, params, many, context):
+        began = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_seconds += time.perf_counter() - began
+
+
+class MetricsRegistry:
+    """Acumula, por processo, as métricas de cada view (nome da URL)."""
+
+    FIELDS = ['requests', 'seconds', 'db_seconds', 'template_seconds', 'queries', 'over_budget']
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def observe(self, view, seconds, stats, over_budget):
+        with self._lock:
+            metrics = self._views.setdefault(view, dict.fromkeys(self.FIELDS, 0))
+            metrics['requests'] += 1
+            metrics['seconds'] += seconds
+            metrics['db_seconds'] += stats.db_seconds
+            metrics['template_seconds'] += stats.template_seconds
+            metrics['queries'] += stats.queries
+            metrics['over_budget'] += int(over_budget)
+
+    def snapshot(self):
+        with self._lock:
+            return {view: dict(metrics) for view, metrics in self._views.items()}
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+registry = MetricsRegistry()
+
+
+def _patch_template_render():
+    """Mede o tempo de renderização dos templates Django enquanto houver uma requisição instrumentada."""
+    global _template_patched
+
+    from django.template.backends.django import Template
+
+    with _template_patch_lock:
+        if _template_patched:
+            return
+        original_render = Template.render
+
+        def render(self, context=None, request=None):
+            stats = _current_stats.get()
+            if stats is None:
+                return original_render(self, context, request)
+            began = time.perf_counter()
+            try:
+                return original_render(self, context, request)
+            finally:
+                stats.template_seconds += time.perf_counter() - began
+
+        Template.render = render
+        _template_patched = True
+
+
+def query_budget(view):
+    return settings.PERF_QUERY_BUDGETS.get(view, settings.PERF_DEFAULT_QUERY_BUDGET)
+
+
+class PerformanceMiddleware:
+    """Conta consultas, tempo de banco, de template e total por requisição.
+
+    Desligado (PERF_INSTRUMENTATION=False) o middleware é removido da cadeia na inicialização.
+    Atende sync e async: sob ASGI fica na cadeia assíncrona sem forçar uma troca de thread por requisição.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PERF_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        _patch_template_render()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _current_stats.set(stats)
+        began = time.perf_counter()
+        try:
+            with connection.execute_wrapper(stats.record_query):
+                response = self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        return self.finish(request, response, stats, time.perf_counter() - began)
+
+    async def __acall__(self, request):
+        # As conexões são por thread: o wrapper vai para a conexão da thread onde o ORM async (sync_to_async) roda.
+        stats = RequestStats()
+        token = _current_stats.set(stats)
+        began = time.perf_counter()
+        await sync_to_async(lambda: connection.execute_wrappers.append(stats.record_query))()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(lambda: connection.execute_wrappers.remove(stats.record_query))()
+            _current_stats.reset(token)
+        return self.finish(request, response, stats, time.perf_counter() - began)
+
+    def finish(self, request, response, stats, seconds):
+        match = request.resolver_match
+        view = (match.view_name if match else None) or 'unresolved'
+        budget = query_budget(view)
+        over_budget = stats.queries > budget
+        if over_budget:
+            logger.warning(
+                'View %s executou %d consultas (orçamento: %d) em %.1f ms.',
+                view, stats.queries, budget, seconds * 1000,
+            )
+        registry.observe(view, seconds, stats, over_budget)
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.queries} queries"',
+            f'tpl;dur={stats.template_seconds * 1000:.1f}',
+            f'total;dur={seconds * 1000:.1f}',
+        ])
+        return response
+
+
+def render_prometheus():
+    from .cache import dashboard_cache_stats
+
+    metrics = [
+        ('fasting_http_requests_total', 'counter', 'Requisições atendidas por view.', 'requests'),
+        ('fasting_http_request_duration_seconds_total', 'counter', 'Tempo total de resposta por view.', 'seconds'),
+        ('fasting_db_query_duration_seconds_total', 'counter', 'Tempo gasto em consultas SQL por view.', 'db_seconds'),
+        ('fasting_template_render_duration_seconds_total', 'counter', 'Tempo de renderização de templates por view.', 'template_seconds'),
+        ('fasting_db_queries_total', 'counter', 'Consultas SQL executadas por view.', 'queries'),
+        ('fasting_query_budget_exceeded_total', 'counter', 'Requisições acima do orçamento de consultas.', 'over_budget'),
+    ]
+    snapshot = registry.snapshot()
+
+    lines = []
+    for name, kind, description, field in metrics:
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+        for view, values in sorted(snapshot.items()):
+            value = values[field]
+            lines.append(f'{name}{{view="{view}"}} {round(value, 6) if isinstance(value, float) else value}')
+
+    cache_stats = dashboard_cache_stats()
+    lines.append('# HELP fasting_dashboard_cache_total Acertos e falhas do cache do dashboard.')
+    lines.append('# TYPE fasting_dashboard_cache_total counter')
+    lines.append(f'fasting_dashboard_cache_total{{result="hit"}} {cache_stats["hits"]}')
+    lines.append(f'fasting_dashboard_cache_total{{result="miss"}} {cache_stats["misses"]}')
+
+    return '\n'.join(lines) + '\n'
+
+
+_accepts_brotli = re.compile(r'\bbr\b')
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """Comprime respostas HTML com brotli (quando o cliente aceita) ou gzip.
+
+    JSON fica de fora para não enfraquecer os ETags da API; streaming (SSE, exportações) também.
+    """
+
+    def __init__(self, get_response):
+        if not settings.RESPONSE_COMPRESSION:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def process_response(self, request, response):
+        if response.streaming or not response.get('Content-Type', '').startswith('text/html'):
+            return response
+        if brotli is None or not _accepts_brotli.search(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+            return super().process_response(request, response)
+
+        if len(response.content) < 200 or response.has_header('Content-Encoding'):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        compressed = brotli.compress(response.content, quality=settings.BROTLI_QUALITY)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = 'br'
+        return response
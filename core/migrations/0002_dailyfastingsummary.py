@@ -0,0 +1,36 @@
+# Generated by Django 5.0.14 on 2026-10-18 14:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyFastingSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Dia')),
+                ('total_hours', models.FloatField(default=0, verbose_name='Total de Horas')),
+                ('fasting_count', models.PositiveIntegerField(default=0, verbose_name='Quantidade de Jejuns')),
+                ('goal_met', models.BooleanField(default=False, verbose_name='Meta Atingida')),
+                ('avg_energy_level', models.FloatField(blank=True, null=True, verbose_name='Energia Média')),
+                ('avg_focus_level', models.FloatField(blank=True, null=True, verbose_name='Foco Médio')),
+                ('avg_mood_level', models.FloatField(blank=True, null=True, verbose_name='Humor Médio')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_summaries', to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Resumo Diário de Jejum',
+                'verbose_name_plural': 'Resumos Diários de Jejum',
+                'ordering': ['-date'],
+                'unique_together': {('user', 'date')},
+            },
+        ),
+    ]
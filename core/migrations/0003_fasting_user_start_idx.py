@@ -0,0 +1,17 @@
+# Generated by Django 5.0.14 on 2026-10-18 14:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_dailyfastingsummary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='fastingrecord',
+            index=models.Index(fields=['user', 'start_time'], name='fasting_user_start_idx'),
+        ),
+    ]
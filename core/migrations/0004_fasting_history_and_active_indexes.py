@@ -0,0 +1,40 @@
+# Generated by Django 5.0.14 on 2026-10-18 14:49
+
+from django.db import migrations, models
+
+
+def close_duplicate_active_fastings(apps, schema_editor):
+    FastingRecord = apps.get_model('core', 'FastingRecord')
+
+    duplicated_users = (
+        FastingRecord.objects.filter(end_time__isnull=True)
+        .values('user')
+        .annotate(total=models.Count('id'))
+        .filter(total__gt=1)
+        .values_list('user', flat=True)
+    )
+    for user_id in duplicated_users:
+        active = list(FastingRecord.objects.filter(user_id=user_id, end_time__isnull=True).order_by('start_time'))
+        for record, next_record in zip(active, active[1:]):
+            record.end_time = next_record.start_time
+            record.duration_hours = round((record.end_time - record.start_time).total_seconds() / 3600, 2)
+            record.save(update_fields=['end_time', 'duration_hours'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_fasting_user_start_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(close_duplicate_active_fastings, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='fastingrecord',
+            index=models.Index(condition=models.Q(('end_time__isnull', False)), fields=['user', '-start_time'], include=('end_time', 'duration_hours', 'fasting_type', 'energy_level', 'focus_level', 'mood_level'), name='fasting_history_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='fastingrecord',
+            constraint=models.UniqueConstraint(condition=models.Q(('end_time__isnull', True)), fields=('user',), name='unique_active_fasting_per_user', violation_error_message='Já existe um jejum ativo. Encerre-o antes de iniciar um novo.'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.0.14 on 2026-10-18 15:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_fasting_history_and_active_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStatistics',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='statistics', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+                ('reference_date', models.DateField(verbose_name='Calculado para')),
+                ('fasting_count', models.PositiveIntegerField(default=0, verbose_name='Total de Jejuns')),
+                ('total_hours', models.FloatField(default=0, verbose_name='Total de Horas')),
+                ('avg_hours_30', models.FloatField(blank=True, null=True, verbose_name='Média 30 dias (h)')),
+                ('avg_hours_90', models.FloatField(blank=True, null=True, verbose_name='Média 90 dias (h)')),
+                ('avg_hours_365', models.FloatField(blank=True, null=True, verbose_name='Média 365 dias (h)')),
+                ('goal_rate_30', models.FloatField(blank=True, null=True, verbose_name='Taxa de Meta 30 dias')),
+                ('goal_rate_90', models.FloatField(blank=True, null=True, verbose_name='Taxa de Meta 90 dias')),
+                ('goal_rate_365', models.FloatField(blank=True, null=True, verbose_name='Taxa de Meta 365 dias')),
+                ('best_streak', models.PositiveIntegerField(default=0, verbose_name='Melhor Sequência')),
+                ('energy_correlation', models.FloatField(blank=True, null=True, verbose_name='Correlação Energia x Duração')),
+                ('focus_correlation', models.FloatField(blank=True, null=True, verbose_name='Correlação Foco x Duração')),
+                ('mood_correlation', models.FloatField(blank=True, null=True, verbose_name='Correlação Humor x Duração')),
+                ('latest_weight', models.FloatField(blank=True, null=True, verbose_name='Último Peso (kg)')),
+                ('weight_trend', models.FloatField(blank=True, null=True, verbose_name='Tendência de Peso (kg/mês)')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+            ],
+            options={
+                'verbose_name': 'Estatísticas do Usuário',
+                'verbose_name_plural': 'Estatísticas dos Usuários',
+            },
+        ),
+    ]
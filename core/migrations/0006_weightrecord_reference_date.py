@@ -0,0 +1,54 @@
+# Generated by Django 5.0.14 on 2026-10-18 16:10
+
+import django.core.validators
+from datetime import date
+
+from django.db import migrations, models
+
+
+def fill_reference_date(apps, schema_editor):
+    WeightRecord = apps.get_model('core', 'WeightRecord')
+
+    records = list(WeightRecord.objects.filter(reference_date__isnull=True).only('id', 'reference_month', 'created_at'))
+    for record in records:
+        try:
+            year, month = record.reference_month.split('-')
+            record.reference_date = date(int(year), int(month), 1)
+        except ValueError:
+            # Mês legado fora do formato AAAA-MM: usa o mês em que o registro foi criado.
+            record.reference_date = record.created_at.date().replace(day=1)
+    WeightRecord.objects.bulk_update(records, ['reference_date'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_userstatistics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='weightrecord',
+            name='reference_date',
+            field=models.DateField(editable=False, null=True, verbose_name='Data de Referência'),
+        ),
+        migrations.RunPython(fill_reference_date, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='weightrecord',
+            name='reference_date',
+            field=models.DateField(editable=False, verbose_name='Data de Referência'),
+        ),
+        migrations.AlterField(
+            model_name='weightrecord',
+            name='reference_month',
+            field=models.CharField(max_length=7, validators=[django.core.validators.RegexValidator('^\\d{4}-(0[1-9]|1[0-2])$', 'Informe o mês no formato AAAA-MM.')], verbose_name='Mês de Referência'),
+        ),
+        migrations.AlterModelOptions(
+            name='weightrecord',
+            options={'ordering': ['-reference_date'], 'verbose_name': 'Registro de Peso', 'verbose_name_plural': 'Registros de Peso'},
+        ),
+        migrations.AddIndex(
+            model_name='weightrecord',
+            index=models.Index(fields=['user', 'reference_date'], name='weight_user_date_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-18 15:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='archived_until',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Histórico arquivado até'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-18 16:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_customuser_archived_until'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userstatistics',
+            name='stale',
+            field=models.BooleanField(default=False, verbose_name='Desatualizadas'),
+        ),
+    ]
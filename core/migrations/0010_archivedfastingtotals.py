@@ -0,0 +1,30 @@
+# Generated by Django 5.0.14 on 2026-10-18 16:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_userstatistics_stale'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedFastingTotals',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='archived_totals', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+                ('fasting_count', models.PositiveIntegerField(default=0, verbose_name='Total de Jejuns')),
+                ('total_hours', models.FloatField(default=0, verbose_name='Total de Horas')),
+                ('level_sums', models.JSONField(blank=True, default=dict, verbose_name='Somas dos Níveis')),
+                ('latest_fasting', models.JSONField(blank=True, null=True, verbose_name='Último Jejum Arquivado')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+            ],
+            options={
+                'verbose_name': 'Totais Arquivados',
+                'verbose_name_plural': 'Totais Arquivados',
+            },
+        ),
+    ]
@@ -0,0 +1,59 @@
+from django.db import migrations
+
+from core.summaries import split_by_local_day
+
+
+LEVEL_FIELDS = ['energy_level', 'focus_level', 'mood_level']
+
+
+def backfill_daily_summaries(apps, schema_editor):
+    """Monta o resumo diário de quem ainda não tem nenhum (jejuns anteriores à tabela de resumo)."""
+    CustomUser = apps.get_model('core', 'CustomUser')
+    FastingRecord = apps.get_model('core', 'FastingRecord')
+    DailyFastingSummary = apps.get_model('core', 'DailyFastingSummary')
+
+    summarized = DailyFastingSummary.objects.values('user_id')
+    users = CustomUser.objects.exclude(pk__in=summarized).only('pk', 'fasting_goal_hours')
+    for user in users.iterator(chunk_size=500):
+        records = (
+            FastingRecord.objects.filter(user=user, end_time__isnull=False)
+            .values('start_time', 'end_time', *LEVEL_FIELDS)
+            .iterator(chunk_size=2000)
+        )
+        buckets = {}
+        for record in records:
+            for day, hours in split_by_local_day(record['start_time'], record['end_time']):
+                bucket = buckets.setdefault(day, {'hours': 0.0, 'count': 0, 'levels': {field: [0, 0] for field in LEVEL_FIELDS}})
+                bucket['hours'] += hours
+                bucket['count'] += 1
+                for field in LEVEL_FIELDS:
+                    if record[field] is not None:
+                        bucket['levels'][field][0] += record[field]
+                        bucket['levels'][field][1] += 1
+
+        summaries = []
+        for day, bucket in buckets.items():
+            total_hours = round(bucket['hours'], 2)
+            summary = DailyFastingSummary(
+                user=user,
+                date=day,
+                total_hours=total_hours,
+                fasting_count=bucket['count'],
+                goal_met=total_hours >= user.fasting_goal_hours,
+            )
+            for field, (total, count) in bucket['levels'].items():
+                if count:
+                    setattr(summary, f'avg_{field}', round(total / count, 2))
+            summaries.append(summary)
+        DailyFastingSummary.objects.bulk_create(summaries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_archivedfastingtotals'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_daily_summaries, migrations.RunPython.noop),
+    ]
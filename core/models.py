@@ -1,9 +1,36 @@
-from django.db import models
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import Q, Subquery
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.core.exceptions import ValidationError
+from django.core.validators import RegexValidator
 from django.utils import timezone
-from datetime import timedelta
+from datetime import date, timedelta
 from decimal import Decimal
+from contextlib import contextmanager
+
+
+class FastingConflict(ValidationError):
+    """Início/encerramento recusado pelo estado atual do jejum (clique duplo, outro dispositivo)."""
+
+
+# Namespace do pg_advisory_xact_lock(namespace, user_id) que serializa os inícios de jejum de um usuário.
+ACTIVE_FASTING_LOCK = 1001
+
+
+@contextmanager
+def active_fasting_lock(user_id):
+    """Transação em que só um jejum ativo do usuário é criado por vez (PostgreSQL).
+
+    Com a tabela particionada, a constraint de jejum ativo vale dentro de cada partição e um início informado
+    no passado cai em outra partição; a verificação feita sob este lock cobre esse caso.
+    """
+    if connection.vendor != 'postgresql':
+        yield
+        return
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s, %s)', [ACTIVE_FASTING_LOCK, user_id])
+        yield
 
 
 class CustomUserManager(BaseUserManager):
@@ -29,6 +56,8 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Criado em')
+    # Fim do período mais recente movido para o arquivo frio (core.archive); None se nada foi arquivado.
+    archived_until = models.DateTimeField(null=True, blank=True, editable=False, verbose_name='Histórico arquivado até')
 
     objects = CustomUserManager()
 
@@ -42,6 +71,13 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     def __str__(self):
         return self.email
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'fasting_goal_hours' in update_fields:
+            self.daily_summaries.update(goal_met=Q(total_hours__gte=self.fasting_goal_hours))
+
 
 class FastingRecord(models.Model):
     FASTING_TYPE_CHOICES = [
@@ -71,49 +107,266 @@ class FastingRecord(models.Model):
         verbose_name = 'Registro de Jejum'
         verbose_name_plural = 'Registros de Jejum'
         ordering = ['-start_time']
+        indexes = [
+            models.Index(fields=['user', 'start_time'], name='fasting_user_start_idx'),
+            models.Index(
+                fields=['user', '-start_time'],
+                name='fasting_history_idx',
+                condition=Q(end_time__isnull=False),
+                include=['end_time', 'duration_hours', 'fasting_type', 'energy_level', 'focus_level', 'mood_level'],
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user'],
+                condition=Q(end_time__isnull=True),
+                name='unique_active_fasting_per_user',
+                violation_error_message='Já existe um jejum ativo. Encerre-o antes de iniciar um novo.',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.email} - {self.start_time.strftime('%d/%m/%Y %H:%M')}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_interval = (
+            instance.__dict__.get('start_time'),
+            instance.__dict__.get('end_time'),
+        )
+        return instance
+
+    def _summary_days(self, start_time, end_time):
+        from .summaries import local_days
+
+        if start_time is None or end_time is None:
+            return set()
+        return local_days(start_time, end_time)
+
     def clean(self):
         super().clean()
         
         if self.end_time and self.start_time >= self.end_time:
             raise ValidationError('O horário de término deve ser posterior ao horário de início.')
         
-        overlapping = FastingRecord.objects.filter(user=self.user).exclude(pk=self.pk)
-        
-        for record in overlapping:
-            if record.end_time is None:
-                if self.start_time <= record.start_time:
-                    raise ValidationError('Já existe um jejum ativo. Encerre-o antes de iniciar um novo.')
-                if self.end_time and self.end_time > record.start_time:
-                    raise ValidationError('Este jejum se sobrepõe a um jejum ativo existente.')
-            else:
-                if self.start_time < record.end_time and (self.end_time is None or self.end_time > record.start_time):
-                    raise ValidationError(f'Este jejum se sobrepõe ao jejum de {record.start_time.strftime("%d/%m/%Y %H:%M")} a {record.end_time.strftime("%d/%m/%Y %H:%M")}.')
+        if self.user_id is None or self.start_time is None:
+            return
+
+        archived_until = self.user.archived_until
+        if archived_until is not None and self.start_time < archived_until:
+            raise ValidationError(
+                f'Jejuns anteriores a {timezone.localtime(archived_until).strftime("%d/%m/%Y")} estão arquivados '
+                'e não podem ser criados ou alterados.'
+            )
+
+        # Como os jejuns de um usuário não se sobrepõem, basta olhar o último jejum que começa
+        # antes do fim deste e o jejum ativo: duas buscas pelo índice (user, start_time).
+        others = FastingRecord.objects.filter(user_id=self.user_id).exclude(pk=self.pk).order_by('-start_time')
+        latest_before_end = others.filter(start_time__lt=self.end_time) if self.end_time else others
+        active = others.filter(end_time__isnull=True, start_time__gte=self.start_time)
+
+        candidates = list(FastingRecord.objects.filter(
+            Q(pk=Subquery(latest_before_end.values('pk')[:1])) | Q(pk=Subquery(active.values('pk')[:1]))
+        ).only('start_time', 'end_time'))
+
+        # Sem jejum anterior no banco, o último arquivado pode terminar depois do início deste.
+        if archived_until is not None and not any(record.start_time < self.start_time for record in candidates):
+            from .archive import latest_archived
+
+            candidates += filter(None, [latest_archived(self.user)])
+
+        for record in candidates:
+            message = self._overlap_message(record)
+            if message:
+                raise ValidationError(message)
+
+    def _overlap_message(self, record):
+        if record.end_time is None:
+            if self.end_time is None or self.start_time <= record.start_time:
+                return 'Já existe um jejum ativo. Encerre-o antes de iniciar um novo.'
+            if self.end_time and self.end_time > record.start_time:
+                return 'Este jejum se sobrepõe a um jejum ativo existente.'
+        elif self.start_time < record.end_time and (self.end_time is None or self.end_time > record.start_time):
+            return f'Este jejum se sobrepõe ao jejum de {record.start_time.strftime("%d/%m/%Y %H:%M")} a {record.end_time.strftime("%d/%m/%Y %H:%M")}.'
+        return None
 
     def save(self, *args, **kwargs):
-        self.full_clean()
+        if self.end_time is not None:
+            return self._save(*args, **kwargs)
+        with active_fasting_lock(self.user_id):
+            return self._save(*args, **kwargs)
+
+    def _save(self, *args, **kwargs):
+        # O usuário já vem carregado dos chamadores; evita a consulta de existência da FK.
+        self.full_clean(exclude=['user'] if self.user_id and 'user' in self._state.fields_cache else None)
         
         if self.end_time and self.start_time:
             duration = self.end_time - self.start_time
             self.duration_hours = round(duration.total_seconds() / 3600, 2)
         
-        super().save(*args, **kwargs)
+        from .summaries import refresh_daily_summaries
+
+        days = self._summary_days(*getattr(self, '_loaded_interval', (None, None)))
+        days |= self._summary_days(self.start_time, self.end_time)
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            refresh_daily_summaries(self.user, days)
+        self._loaded_interval = (self.start_time, self.end_time)
+
+    def delete(self, *args, **kwargs):
+        from .summaries import refresh_daily_summaries
+
+        days = self._summary_days(self.start_time, self.end_time)
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            refresh_daily_summaries(self.user, days)
+        return result
+
+    @classmethod
+    def start_now(cls, user, fasting_type='intermittent'):
+        """Inicia um jejum com um único INSERT condicional.
+
+        O INSERT só acontece se não houver jejum ativo nem jejum que termine depois de agora;
+        a constraint unique_active_fasting_per_user (e, no PostgreSQL, o active_fasting_lock) barra a corrida
+        entre duas requisições.
+        """
+        from .signals import invalidate_user_data, publish_on_commit
+        from .live import fasting_started_event
+
+        if fasting_type not in dict(cls.FASTING_TYPE_CHOICES):
+            raise ValidationError('Tipo de jejum inválido.')
+
+        now = timezone.now()
+        table = connection.ops.quote_name(cls._meta.db_table)
+        value = connection.ops.adapt_datetimefield_value(now)
+        sql = (
+            f'INSERT INTO {table} (user_id, start_time, fasting_type, notes, created_at) '
+            f'SELECT %s, %s, %s, %s, %s WHERE NOT EXISTS ('
+            f'SELECT 1 FROM {table} WHERE user_id = %s AND (end_time IS NULL OR end_time > %s))'
+        )
+        returning = connection.features.can_return_columns_from_insert
+        if returning:
+            sql += ' RETURNING id'
+
+        pk = None
+        try:
+            with transaction.atomic(), active_fasting_lock(user.pk), connection.cursor() as cursor:
+                cursor.execute(sql, [user.pk, value, fasting_type, '', value, user.pk, value])
+                if returning:
+                    row = cursor.fetchone()
+                    pk = row[0] if row else None
+                elif cursor.rowcount == 1:
+                    pk = connection.ops.last_insert_id(cursor, cls._meta.db_table, 'id')
+        except IntegrityError:
+            pass
+
+        if pk is None:
+            if cls.objects.filter(user=user, end_time__isnull=True).exists():
+                raise FastingConflict('Já existe um jejum ativo. Encerre-o antes de iniciar um novo.')
+            raise FastingConflict('Já existe um jejum que termina depois de agora.')
+
+        fasting = cls(id=pk, user=user, start_time=now, fasting_type=fasting_type, created_at=now)
+        fasting._state.adding = False
+        fasting._state.db = connection.alias
+        fasting._loaded_interval = (now, None)
+
+        invalidate_user_data(user.pk, keep_streaks=True)
+        publish_on_commit(user.pk, fasting_started_event(fasting, user.fasting_goal_hours))
+        return fasting
+
+    @classmethod
+    def end_active(cls, user, energy_level=None, focus_level=None, mood_level=None, notes=''):
+        """Encerra o jejum ativo: uma leitura e um UPDATE condicionado a end_time IS NULL."""
+        from .signals import invalidate_user_data, publish_on_commit
+        from .live import fasting_ended_event
+        from .summaries import refresh_daily_summaries
+
+        changes = {}
+        valid_levels = dict(cls.LEVEL_CHOICES)
+        for name, level in [('energy_level', energy_level), ('focus_level', focus_level), ('mood_level', mood_level)]:
+            if level is None:
+                continue
+            if level not in valid_levels:
+                raise ValidationError(f'{cls._meta.get_field(name).verbose_name} deve ser 1, 2 ou 3.')
+            changes[name] = level
+        if notes:
+            if len(notes) > 255:
+                raise ValidationError('Observações limitadas a 255 caracteres.')
+            changes['notes'] = notes
+
+        fasting = cls.objects.filter(user=user, end_time__isnull=True).first()
+        if fasting is None:
+            raise FastingConflict('Não há jejum ativo para encerrar.')
+
+        end_time = timezone.now()
+        if end_time <= fasting.start_time:
+            raise ValidationError('O horário de término deve ser posterior ao horário de início.')
+        changes['end_time'] = end_time
+        changes['duration_hours'] = round((end_time - fasting.start_time).total_seconds() / 3600, 2)
+
+        with transaction.atomic():
+            if not cls.objects.filter(pk=fasting.pk, end_time__isnull=True).update(**changes):
+                raise FastingConflict('Este jejum já foi encerrado.')
+            refresh_daily_summaries(user, fasting._summary_days(fasting.start_time, end_time))
+
+            for name, value in changes.items():
+                setattr(fasting, name, value)
+            fasting._loaded_interval = (fasting.start_time, end_time)
+
+            invalidate_user_data(user.pk, closed_interval=(fasting.start_time, end_time))
+            publish_on_commit(user.pk, fasting_ended_event(fasting))
+        return fasting
+
+
+class DailyFastingSummary(models.Model):
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='daily_summaries', verbose_name='Usuário')
+    date = models.DateField(verbose_name='Dia')
+    total_hours = models.FloatField(default=0, verbose_name='Total de Horas')
+    fasting_count = models.PositiveIntegerField(default=0, verbose_name='Quantidade de Jejuns')
+    goal_met = models.BooleanField(default=False, verbose_name='Meta Atingida')
+    avg_energy_level = models.FloatField(null=True, blank=True, verbose_name='Energia Média')
+    avg_focus_level = models.FloatField(null=True, blank=True, verbose_name='Foco Médio')
+    avg_mood_level = models.FloatField(null=True, blank=True, verbose_name='Humor Médio')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Atualizado em')
+
+    class Meta:
+        verbose_name = 'Resumo Diário de Jejum'
+        verbose_name_plural = 'Resumos Diários de Jejum'
+        unique_together = ['user', 'date']
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"{self.user.email} - {self.date.strftime('%d/%m/%Y')}: {self.total_hours}h"
+
+
+def month_start(reference_month):
+    """Primeiro dia do mês 'AAAA-MM'."""
+    year, month = reference_month.split('-')
+    return date(int(year), int(month), 1)
 
 
 class WeightRecord(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='weight_records', verbose_name='Usuário')
     weight = models.FloatField(verbose_name='Peso (kg)')
-    reference_month = models.CharField(max_length=7, verbose_name='Mês de Referência')
+    reference_month = models.CharField(
+        max_length=7,
+        validators=[RegexValidator(r'^\d{4}-(0[1-9]|1[0-2])$', 'Informe o mês no formato AAAA-MM.')],
+        verbose_name='Mês de Referência'
+    )
+    # Derivado de reference_month para consultas por intervalo e ordenação pelo índice.
+    reference_date = models.DateField(editable=False, verbose_name='Data de Referência')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Criado em')
 
     class Meta:
         verbose_name = 'Registro de Peso'
         verbose_name_plural = 'Registros de Peso'
         unique_together = ['user', 'reference_month']
-        ordering = ['-reference_month']
+        ordering = ['-reference_date']
+        indexes = [
+            models.Index(fields=['user', 'reference_date'], name='weight_user_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.email} - {self.reference_month}: {self.weight}kg"
@@ -123,3 +376,109 @@ class WeightRecord(models.Model):
         
         if self.weight <= 0:
             raise ValidationError('O peso deve ser maior que zero.')
+
+    def save(self, *args, **kwargs):
+        self.reference_date = month_start(self.reference_month)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'reference_month' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'reference_date'}
+        super().save(*args, **kwargs)
+
+
+class UserStatistics(models.Model):
+    user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, primary_key=True, related_name='statistics', verbose_name='Usuário')
+    reference_date = models.DateField(verbose_name='Calculado para')
+    fasting_count = models.PositiveIntegerField(default=0, verbose_name='Total de Jejuns')
+    total_hours = models.FloatField(default=0, verbose_name='Total de Horas')
+    avg_hours_30 = models.FloatField(null=True, blank=True, verbose_name='Média 30 dias (h)')
+    avg_hours_90 = models.FloatField(null=True, blank=True, verbose_name='Média 90 dias (h)')
+    avg_hours_365 = models.FloatField(null=True, blank=True, verbose_name='Média 365 dias (h)')
+    goal_rate_30 = models.FloatField(null=True, blank=True, verbose_name='Taxa de Meta 30 dias')
+    goal_rate_90 = models.FloatField(null=True, blank=True, verbose_name='Taxa de Meta 90 dias')
+    goal_rate_365 = models.FloatField(null=True, blank=True, verbose_name='Taxa de Meta 365 dias')
+    best_streak = models.PositiveIntegerField(default=0, verbose_name='Melhor Sequência')
+    energy_correlation = models.FloatField(null=True, blank=True, verbose_name='Correlação Energia x Duração')
+    focus_correlation = models.FloatField(null=True, blank=True, verbose_name='Correlação Foco x Duração')
+    mood_correlation = models.FloatField(null=True, blank=True, verbose_name='Correlação Humor x Duração')
+    latest_weight = models.FloatField(null=True, blank=True, verbose_name='Último Peso (kg)')
+    weight_trend = models.FloatField(null=True, blank=True, verbose_name='Tendência de Peso (kg/mês)')
+    stale = models.BooleanField(default=False, verbose_name='Desatualizadas')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Atualizado em')
+
+    class Meta:
+        verbose_name = 'Estatísticas do Usuário'
+        verbose_name_plural = 'Estatísticas dos Usuários'
+
+    def __str__(self):
+        return f"{self.user.email} - {self.reference_date.strftime('%d/%m/%Y')}"
+
+
+class ArchivedFastingTotals(models.Model):
+    """Agregados dos jejuns que foram para o arquivo frio, gravados junto com os arquivos.
+
+    Estatísticas, sequências e checagens de sobreposição leem esta linha em vez de descompactar os arquivos.
+    """
+
+    user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, primary_key=True, related_name='archived_totals', verbose_name='Usuário')
+    fasting_count = models.PositiveIntegerField(default=0, verbose_name='Total de Jejuns')
+    total_hours = models.FloatField(default=0, verbose_name='Total de Horas')
+    # {campo: [n, Σx, Σy, Σxy, Σx², Σy²]} para as correlações de energia, foco e humor com a duração.
+    level_sums = models.JSONField(default=dict, blank=True, verbose_name='Somas dos Níveis')
+    latest_fasting = models.JSONField(null=True, blank=True, verbose_name='Último Jejum Arquivado')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Atualizado em')
+
+    class Meta:
+        verbose_name = 'Totais Arquivados'
+        verbose_name_plural = 'Totais Arquivados'
+
+    def __str__(self):
+        return f"{self.user.email} - {self.fasting_count} jejum(ns) arquivado(s)"
+
+
+class Job(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pendente'),
+        (RUNNING, 'Executando'),
+        (SUCCEEDED, 'Concluído'),
+        (FAILED, 'Falhou'),
+    ]
+
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, null=True, blank=True, related_name='jobs', verbose_name='Usuário')
+    task = models.CharField(max_length=100, verbose_name='Tarefa')
+    payload = models.JSONField(default=dict, blank=True, verbose_name='Parâmetros')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING, verbose_name='Status')
+    priority = models.SmallIntegerField(default=0, verbose_name='Prioridade')
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name='Tentativas')
+    max_attempts = models.PositiveSmallIntegerField(default=3, verbose_name='Máximo de Tentativas')
+    run_at = models.DateTimeField(default=timezone.now, verbose_name='Executar a partir de')
+    locked_by = models.CharField(max_length=100, blank=True, verbose_name='Worker')
+    locked_at = models.DateTimeField(null=True, blank=True, verbose_name='Iniciado em')
+    result = models.JSONField(null=True, blank=True, verbose_name='Resultado')
+    error = models.TextField(blank=True, verbose_name='Último Erro')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Criado em')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Finalizado em')
+
+    class Meta:
+        verbose_name = 'Tarefa em Segundo Plano'
+        verbose_name_plural = 'Tarefas em Segundo Plano'
+        ordering = ['-created_at']
+        indexes = [
+            # Fila: só as pendentes entram no índice, na ordem em que os workers as pegam.
+            models.Index(
+                fields=['-priority', 'run_at', 'id'],
+                condition=Q(status='pending'),
+                name='job_queue_idx',
+            ),
+            models.Index(fields=['user', 'status'], name='job_user_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.get_status_display()})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.SUCCEEDED, self.FAILED)
@@ -0,0 +1,67 @@
+import base64
+import binascii
+from datetime import datetime
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+def encode_cursor(record):
+    raw = f'{record.start_time.isoformat()}|{record.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(value):
+    """Retorna (start_time, pk) do cursor ou None quando ausente/inválido."""
+    if not value:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)).decode()
+        start_time, pk = raw.split('|')
+        return datetime.fromisoformat(start_time), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+def _keyset_queryset(queryset, cursor, page_size):
+    queryset = queryset.order_by('-start_time', '-id')
+    position = decode_cursor(cursor)
+    if position:
+        start_time, pk = position
+        queryset = queryset.filter(Q(start_time__lt=start_time) | Q(start_time=start_time, id__lt=pk))
+    return queryset[:page_size + 1]
+
+
+def _split_page(records, page_size):
+    next_cursor = encode_cursor(records[page_size - 1]) if len(records) > page_size else None
+    return records[:page_size], next_cursor
+
+
+def keyset_page(queryset, cursor, page_size):
+    """Página em ordem (-start_time, -id) a partir do cursor; retorna (registros, próximo cursor)."""
+    return _split_page(list(_keyset_queryset(queryset, cursor, page_size)), page_size)
+
+
+async def akeyset_page(queryset, cursor, page_size):
+    records = [record async for record in _keyset_queryset(queryset, cursor, page_size)]
+    return _split_page(records, page_size)
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator do admin: sem filtros, tabelas grandes no PostgreSQL usam a estimativa do planejador em vez de COUNT(*)."""
+
+    estimate_threshold = 100000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT reltuples FROM pg_class WHERE relname = %s', [queryset.model._meta.db_table])
+                row = cursor.fetchone()
+            if row and row[0] >= self.estimate_threshold:
+                return int(row[0])
+        return super().count
@@ -0,0 +1,215 @@
+"""Particionamento declarativo por faixa de start_time da tabela de jejuns (somente PostgreSQL).
+
+O PostgreSQL exige que chaves únicas incluam a coluna de partição: a chave primária vira (id, start_time) e a
+constraint unique_active_fasting_per_user passa a existir em cada partição, sem enxergar as outras. Um jejum
+ativo criado pelo formulário ou pela API com início no passado cai em outra partição que o de start_now; por
+isso todo caminho que cria jejum ativo passa por models.active_fasting_lock, que serializa os inícios do
+usuário antes da verificação de jejum ativo.
+"""
+import re
+from datetime import timedelta
+
+from django.db import NotSupportedError, connection, transaction
+from django.utils import timezone
+
+from .analytics import WINDOWS
+from .archive import label_start, mark_archived, period_label, remove_archives, write_archives
+from .models import FastingRecord
+from .summaries import local_midnight
+
+
+TABLE = FastingRecord._meta.db_table
+DEFAULT_PARTITION = f'{TABLE}_default'
+INTERVALS = ('month', 'year')
+PARTITION_NAME = re.compile(rf'^{TABLE}_p(\d{{4}})(?:_(\d{{2}}))?$')
+
+
+def qn(name):
+    return connection.ops.quote_name(name)
+
+
+def check_postgresql():
+    if connection.vendor != 'postgresql':
+        raise NotSupportedError(f'Particionamento exige PostgreSQL (banco atual: {connection.vendor}).')
+
+
+def period_start(moment, interval):
+    day = timezone.localtime(moment).date()
+    return local_midnight(day.replace(day=1) if interval == 'month' else day.replace(month=1, day=1))
+
+
+def next_period(start, interval):
+    day = timezone.localtime(start).date()
+    if interval == 'month':
+        day = (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    else:
+        day = day.replace(year=day.year + 1)
+    return local_midnight(day)
+
+
+def partition_name(label):
+    return f"{TABLE}_p{label.replace('-', '_')}"
+
+
+def is_partitioned():
+    check_postgresql()
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass', [TABLE])
+        return cursor.fetchone() is not None
+
+
+def list_partitions():
+    """Partições por período em ordem cronológica: [{name, label, start, end, rows}]; a DEFAULT fica de fora."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname, c.reltuples FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+            'WHERE i.inhparent = %s::regclass',
+            [TABLE],
+        )
+        rows = cursor.fetchall()
+
+    partitions = []
+    for name, estimate in rows:
+        match = PARTITION_NAME.match(name)
+        if not match:
+            continue
+        year, month = match.groups()
+        label = f'{year}-{month}' if month else year
+        start = label_start(label)
+        partitions.append({
+            'name': name,
+            'label': label,
+            'start': start,
+            'end': next_period(start, 'month' if month else 'year'),
+            'rows': max(int(estimate), 0),
+        })
+    return sorted(partitions, key=lambda partition: partition['start'])
+
+
+def _create_active_index(cursor, name):
+    cursor.execute(
+        f'CREATE UNIQUE INDEX IF NOT EXISTS {qn(name + "_active_uniq")} ON {qn(name)} (user_id) WHERE end_time IS NULL'
+    )
+
+
+def create_partition(start, interval):
+    """Cria a partição do período que começa em `start`, trazendo da DEFAULT os jejuns que já caíram nele."""
+    end = next_period(start, interval)
+    name = partition_name(period_label(start, interval))
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'CREATE TABLE {qn(name)} (LIKE {qn(TABLE)})')
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM {qn(DEFAULT_PARTITION)} WHERE start_time >= %s AND start_time < %s RETURNING *) '
+            f'INSERT INTO {qn(name)} SELECT * FROM moved',
+            [start, end],
+        )
+        # No ATTACH o PostgreSQL cria na partição os índices e a FK da tabela-mãe.
+        cursor.execute(f'ALTER TABLE {qn(TABLE)} ATTACH PARTITION {qn(name)} FOR VALUES FROM (%s) TO (%s)', [start, end])
+        _create_active_index(cursor, name)
+    return name
+
+
+def ensure_partitions(interval, ahead, since=None):
+    """Cria as partições que faltam do período de `since` (padrão: o atual) até `ahead` períodos à frente."""
+    existing = {partition['label'] for partition in list_partitions()}
+    now = timezone.now()
+    start = period_start(since or now, interval)
+    last = period_start(now, interval)
+    for _ in range(ahead):
+        last = next_period(last, interval)
+
+    created = []
+    while start <= last:
+        if period_label(start, interval) not in existing:
+            created.append(create_partition(start, interval))
+        start = next_period(start, interval)
+    return created
+
+
+def convert_to_partitioned(interval, ahead):
+    """Recria a tabela como particionada e copia os jejuns, tudo em uma transação.
+
+    A tabela fica bloqueada (inclusive para leitura) durante a cópia: rode em janela de manutenção.
+    """
+    check_postgresql()
+    if is_partitioned():
+        raise ValueError(f'{TABLE} já é particionada.')
+
+    legacy = f'{TABLE}_unpartitioned'
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {qn(TABLE)} IN ACCESS EXCLUSIVE MODE')
+        # O PostgreSQL não remove tabela com checagens de FK adiadas pendentes (transação externa): rode-as agora.
+        cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        # Índices únicos (a PK e o de jejum ativo) não valem na tabela-mãe; os demais são recriados com o mesmo nome.
+        cursor.execute(
+            'SELECT pg_get_indexdef(indexrelid) FROM pg_index WHERE indrelid = %s::regclass AND NOT indisunique',
+            [TABLE],
+        )
+        indexes = [row[0] for row in cursor.fetchall()]
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+            [TABLE],
+        )
+        foreign_keys = cursor.fetchall()
+        cursor.execute(f'SELECT min(start_time) FROM {qn(TABLE)}')
+        first = cursor.fetchone()[0]
+
+        cursor.execute(f'ALTER TABLE {qn(TABLE)} RENAME TO {qn(legacy)}')
+        cursor.execute(f'CREATE TABLE {qn(TABLE)} (LIKE {qn(legacy)}) PARTITION BY RANGE (start_time)')
+        cursor.execute(f'CREATE TABLE {qn(DEFAULT_PARTITION)} PARTITION OF {qn(TABLE)} DEFAULT')
+        _create_active_index(cursor, DEFAULT_PARTITION)
+        created = ensure_partitions(interval, ahead, since=first)
+
+        cursor.execute(f'INSERT INTO {qn(TABLE)} SELECT * FROM {qn(legacy)}')
+        copied = cursor.rowcount
+        # Some junto a sequência (serial ou identity) da tabela antiga; a nova continua do maior id.
+        cursor.execute(f'DROP TABLE {qn(legacy)}')
+
+        sequence = f'{TABLE}_id_seq'
+        cursor.execute(f'CREATE SEQUENCE {qn(sequence)} OWNED BY {qn(TABLE)}.id')
+        cursor.execute(f"ALTER TABLE {qn(TABLE)} ALTER COLUMN id SET DEFAULT nextval('{sequence}')")
+        cursor.execute(
+            f"SELECT setval('{sequence}', coalesce(max(id), 1), max(id) IS NOT NULL) FROM {qn(TABLE)}"
+        )
+        cursor.execute(f'ALTER TABLE {qn(TABLE)} ADD CONSTRAINT {qn(TABLE + "_pkey")} PRIMARY KEY (id, start_time)')
+        for definition in indexes:
+            cursor.execute(definition)
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE {qn(TABLE)} ADD CONSTRAINT {qn(name)} {definition}')
+        cursor.execute(f'ANALYZE {qn(TABLE)}')
+    return copied, created
+
+
+def archive_partitions(older_than):
+    """Move para o arquivo frio as partições encerradas antes de `older_than` e sem jejum em andamento.
+
+    Cada partição é bloqueada para escrita, gravada em arquivos e removida na mesma transação; se algo falhar
+    os arquivos desta partição são apagados e os dados continuam no banco. Só partições com mais de um ano
+    podem sair: as janelas de 30/90/365 dias das estatísticas leem apenas o banco.
+    """
+    newest = local_midnight(timezone.localdate() - timedelta(days=WINDOWS[-1]))
+    if older_than > newest:
+        raise ValueError('Só partições encerradas há mais de um ano podem ser arquivadas.')
+    archived, skipped = [], []
+    for partition in list_partitions():
+        if partition['end'] > older_than:
+            continue
+        name, label = partition['name'], partition['label']
+        counts = {}
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(f'LOCK TABLE {qn(name)} IN EXCLUSIVE MODE')
+                cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+                cursor.execute(f'SELECT 1 FROM {qn(name)} WHERE end_time IS NULL LIMIT 1')
+                if cursor.fetchone():
+                    skipped.append(label)
+                    continue
+                counts = write_archives(partition['start'], partition['end'], label)
+                cursor.execute(f'ALTER TABLE {qn(TABLE)} DETACH PARTITION {qn(name)}')
+                cursor.execute(f'DROP TABLE {qn(name)}')
+                mark_archived(list(counts), partition['end'])
+        except Exception:
+            remove_archives(counts, label)
+            raise
+        archived.append((label, sum(counts.values())))
+    return archived, skipped
@@ -0,0 +1,70 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import serializers
+
+from .models import FastingRecord, UserStatistics, WeightRecord
+
+
+class SparseFieldsetsMixin:
+    """Permite `?fields=a,b` para devolver só os campos pedidos."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        requested = request.query_params.get('fields') if request else None
+        if requested:
+            allowed = {name.strip() for name in requested.split(',')}
+            for name in set(self.fields) - allowed:
+                self.fields.pop(name)
+
+
+class ModelValidationMixin:
+    """Converte o ValidationError levantado por Model.save()/full_clean() em erro 400 da API."""
+
+    def save(self, **kwargs):
+        try:
+            return super().save(**kwargs)
+        except DjangoValidationError as e:
+            raise serializers.ValidationError({'non_field_errors': e.messages})
+
+
+class FastingRecordSerializer(SparseFieldsetsMixin, ModelValidationMixin, serializers.ModelSerializer):
+    class Meta:
+        model = FastingRecord
+        fields = [
+            'id', 'start_time', 'end_time', 'duration_hours', 'fasting_type',
+            'energy_level', 'focus_level', 'mood_level', 'notes', 'created_at',
+        ]
+        read_only_fields = ['id', 'duration_hours', 'created_at']
+
+
+class EndFastingSerializer(ModelValidationMixin, serializers.ModelSerializer):
+    class Meta:
+        model = FastingRecord
+        fields = ['energy_level', 'focus_level', 'mood_level', 'notes']
+
+
+class WeightRecordSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = WeightRecord
+        fields = ['id', 'weight', 'reference_month', 'reference_date', 'created_at']
+        read_only_fields = ['id', 'reference_date', 'created_at']
+
+    def validate_weight(self, value):
+        if value <= 0:
+            raise serializers.ValidationError('O peso deve ser maior que zero.')
+        return value
+
+    def validate_reference_month(self, value):
+        request = self.context['request']
+        duplicated = WeightRecord.objects.filter(user=request.user, reference_month=value)
+        if self.instance is not None:
+            duplicated = duplicated.exclude(pk=self.instance.pk)
+        if duplicated.exists():
+            raise serializers.ValidationError('Já existe um registro de peso para este mês.')
+        return value
+
+
+class UserStatisticsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UserStatistics
+        exclude = ['user']
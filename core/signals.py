@@ -0,0 +1,104 @@
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .analytics import mark_statistics_stale
+from .backends import forget_cached_user
+from .cache import bump_user_data_version, user_data_version
+from .jobs import enqueue
+from .live import fasting_ended_event, fasting_started_event, publish
+from .models import CustomUser, FastingRecord, WeightRecord
+from .streaks import carry_streaks
+
+
+def refresh_statistics_soon(user_id):
+    """Recalcula no worker; sem ele, só marca as estatísticas para o recálculo na próxima leitura."""
+    if settings.STATISTICS_IN_BACKGROUND:
+        enqueue('refresh_statistics', user_id=user_id, unique=True)
+    else:
+        mark_statistics_stale(user_id)
+
+
+def renew_data_version(user_id, keep_streaks=False, closed_interval=None):
+    previous = user_data_version(user_id)
+    version = bump_user_data_version(user_id)
+    if keep_streaks or closed_interval:
+        carry_streaks(user_id, previous, version, closed_interval)
+
+
+def invalidate_user_data(user_id, keep_streaks=False, closed_interval=None):
+    """Renova a versão dos dados do usuário após o commit.
+
+    As sequências em cache seguem para a nova versão quando a alteração não mexe em jejuns encerrados
+    (`keep_streaks`) ou só encerra um jejum (`closed_interval`); nos demais casos são recalculadas.
+    """
+    transaction.on_commit(partial(renew_data_version, user_id, keep_streaks, closed_interval))
+    # Estatísticas são um complemento: uma falha ao recalculá-las não deve derrubar a requisição.
+    transaction.on_commit(lambda: refresh_statistics_soon(user_id), robust=True)
+
+
+def publish_on_commit(user_id, event):
+    transaction.on_commit(partial(publish, user_id, event))
+
+
+@receiver(post_save, sender=FastingRecord)
+def fasting_saved(sender, instance, created, **kwargs):
+    previous_start, previous_end = getattr(instance, '_loaded_interval', (None, None))
+
+    if instance.end_time is None and (created or (previous_start, previous_end) != (instance.start_time, None)):
+        publish_on_commit(instance.user_id, fasting_started_event(instance, instance.user.fasting_goal_hours))
+    elif instance.end_time is not None and not created and previous_start is not None and previous_end is None:
+        publish_on_commit(instance.user_id, fasting_ended_event(instance))
+
+    if (previous_start, previous_end) == (instance.start_time, instance.end_time):
+        invalidate_user_data(instance.user_id, keep_streaks=True)
+    elif instance.end_time is None and previous_end is None:
+        # Jejum em andamento não entra nas sequências.
+        invalidate_user_data(instance.user_id, keep_streaks=True)
+    elif previous_end is None:
+        invalidate_user_data(instance.user_id, closed_interval=(instance.start_time, instance.end_time))
+    else:
+        invalidate_user_data(instance.user_id)
+
+
+@receiver(post_delete, sender=FastingRecord)
+def fasting_deleted(sender, instance, **kwargs):
+    if instance.end_time is None:
+        publish_on_commit(instance.user_id, fasting_ended_event(instance))
+        invalidate_user_data(instance.user_id, keep_streaks=True)
+    else:
+        invalidate_user_data(instance.user_id)
+
+
+@receiver(post_save, sender=WeightRecord)
+@receiver(post_delete, sender=WeightRecord)
+def weight_changed(sender, instance, **kwargs):
+    invalidate_user_data(instance.user_id, keep_streaks=True)
+
+
+@receiver(post_save, sender=CustomUser)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'fasting_goal_hours' in update_fields:
+        # Com outra meta o cache das sequências é descartado na leitura.
+        invalidate_user_data(instance.pk, keep_streaks=True)
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def user_auth_changed(sender, instance, **kwargs):
+    # Apaga já e de novo no commit: uma leitura concorrente não pode recolocar no cache o usuário antigo.
+    forget_cached_user(instance.pk)
+    transaction.on_commit(partial(forget_cached_user, instance.pk))
+
+
+@receiver(m2m_changed, sender=CustomUser.groups.through)
+@receiver(m2m_changed, sender=CustomUser.user_permissions.through)
+def user_permissions_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    user_ids = (pk_set or []) if reverse else [instance.pk]
+    for user_id in user_ids:
+        forget_cached_user(user_id)
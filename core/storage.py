@@ -0,0 +1,16 @@
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+class StaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """Nomes com hash + variantes .gz/.br geradas no collectstatic.
+
+    Sem manifesto (testes, ambiente sem collectstatic) devolve o nome original em vez de levantar erro.
+    """
+
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
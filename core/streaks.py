@@ -0,0 +1,147 @@
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .cache import cache_is_shared, user_data_version
+from .models import DailyFastingSummary, FastingRecord
+from .summaries import split_by_local_day
+
+
+STREAK_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+@dataclass
+class StreakTracker:
+    """Acumula, em uma passada, as horas de jejum por dia local e as sequências de dias na meta.
+
+    Os intervalos precisam chegar em ordem de início; sobreposições são mescladas antes da divisão
+    nas meias-noites, então cada hora de jejum conta uma única vez.
+    """
+
+    goal_hours: float
+    runs: list = field(default_factory=list)
+    merged_end: object = None
+    open_day: object = None
+    open_hours: float = 0.0
+
+    def add(self, start_time, end_time):
+        if self.merged_end is not None:
+            start_time = max(start_time, self.merged_end)
+        if end_time <= start_time:
+            return
+
+        for day, hours in split_by_local_day(start_time, end_time):
+            self.add_day(day, hours)
+        self.merged_end = end_time
+
+    def add_day(self, day, hours):
+        """Soma horas já totalizadas de um dia local (o resumo diário do período arquivado)."""
+        if day != self.open_day:
+            self._close_day()
+            self.open_day = day
+            self.open_hours = 0.0
+        self.open_hours += hours
+
+    def accepts(self, start_time):
+        """Indica se o intervalo pode ser somado sem reprocessar o histórico."""
+        return self.merged_end is None or start_time >= self.merged_end
+
+    def _close_day(self):
+        if self.open_day is not None and self.open_hours >= self.goal_hours:
+            _extend_runs(self.runs, self.open_day)
+
+    def all_runs(self):
+        runs = [list(run) for run in self.runs]
+        if self.open_day is not None and self.open_hours >= self.goal_hours:
+            _extend_runs(runs, self.open_day)
+        return runs
+
+    def summary(self, today=None):
+        today = today or timezone.localdate()
+        runs = self.all_runs()
+        current = 0
+        if runs and runs[-1][1] >= today - timedelta(days=1):
+            current = _length(runs[-1])
+        return {
+            'current': current,
+            'longest': max((_length(run) for run in runs), default=0),
+            'runs': [{'start': first, 'end': last, 'days': _length([first, last])} for first, last in runs],
+        }
+
+
+def _extend_runs(runs, day):
+    if runs and runs[-1][1] + timedelta(days=1) == day:
+        runs[-1][1] = day
+    else:
+        runs.append([day, day])
+
+
+def _length(run):
+    return (run[1] - run[0]).days + 1
+
+
+def _cache_key(user_id, version):
+    return f'streaks:{user_id}:{version}'
+
+
+def build_tracker(user):
+    tracker = StreakTracker(goal_hours=user.fasting_goal_hours)
+    if user.archived_until is not None:
+        from .archive import latest_archived
+
+        # O resumo diário sobrevive ao arquivamento: os dias anteriores ao corte vêm dele, sem ler os arquivos.
+        archived_days = DailyFastingSummary.objects.filter(
+            user=user, date__lt=timezone.localtime(user.archived_until).date()
+        ).order_by('date').values_list('date', 'total_hours')
+        for day, hours in archived_days.iterator(chunk_size=2000):
+            tracker.add_day(day, hours)
+        latest = latest_archived(user)
+        if latest is not None and latest.end_time > user.archived_until:
+            tracker.add(user.archived_until, latest.end_time)
+
+    intervals = (
+        FastingRecord.objects.filter(user=user, end_time__isnull=False)
+        .order_by('start_time')
+        .values_list('start_time', 'end_time')
+    )
+    for start_time, end_time in intervals.iterator(chunk_size=2000):
+        tracker.add(start_time, end_time)
+    return tracker
+
+
+def get_tracker(user):
+    """Sequências da versão atual dos dados do usuário, do cache quando ele é compartilhado entre os workers."""
+    if not cache_is_shared():
+        return build_tracker(user)
+
+    key = _cache_key(user.pk, user_data_version(user.pk))
+    tracker = cache.get(key)
+    if tracker is None or tracker.goal_hours != user.fasting_goal_hours:
+        tracker = build_tracker(user)
+        cache.set(key, tracker, timeout=STREAK_CACHE_TIMEOUT)
+    return tracker
+
+
+def get_streaks(user, today=None):
+    """Sequência atual (terminando hoje ou ontem), a mais longa e o histórico de sequências."""
+    return get_tracker(user).summary(today)
+
+
+def carry_streaks(user_id, previous_version, version, closed_interval=None):
+    """Leva as sequências em cache da versão anterior dos dados para a nova.
+
+    `closed_interval` é um jejum recém-encerrado a somar; se ele não for o mais recente do cache nada é
+    copiado e a nova versão é recalculada na próxima leitura.
+    """
+    if not cache_is_shared():
+        return
+    tracker = cache.get(_cache_key(user_id, previous_version))
+    if tracker is None:
+        return
+    if closed_interval:
+        if not tracker.accepts(closed_interval[0]):
+            return
+        tracker.add(*closed_interval)
+    cache.set(_cache_key(user_id, version), tracker, timeout=STREAK_CACHE_TIMEOUT)
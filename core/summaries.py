@@ -0,0 +1,167 @@
+import itertools
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import DailyFastingSummary, FastingRecord
+
+
+LEVEL_FIELDS = ['energy_level', 'focus_level', 'mood_level']
+
+
+def local_midnight(day):
+    return datetime.combine(day, time.min, tzinfo=timezone.get_default_timezone())
+
+
+def split_by_local_day(start_time, end_time):
+    """Divide um intervalo em fatias (dia local, horas) nas meias-noites de TIME_ZONE."""
+    current = start_time.astimezone(dt_timezone.utc)
+    end = end_time.astimezone(dt_timezone.utc)
+
+    while current < end:
+        day = timezone.localtime(current).date()
+        next_midnight = local_midnight(day + timedelta(days=1)).astimezone(dt_timezone.utc)
+        chunk_end = min(next_midnight, end)
+        yield day, (chunk_end - current).total_seconds() / 3600
+        current = chunk_end
+
+
+def local_days(start_time, end_time):
+    return {day for day, _ in split_by_local_day(start_time, end_time)}
+
+
+def _contiguous_spans(days):
+    spans = []
+    for day in sorted(days):
+        if spans and spans[-1][1] + timedelta(days=1) == day:
+            spans[-1][1] = day
+        else:
+            spans.append([day, day])
+    return spans
+
+
+def _build_summaries(user, buckets):
+    summaries = []
+    for day, bucket in buckets.items():
+        summary = DailyFastingSummary(
+            user=user,
+            date=day,
+            total_hours=round(bucket['hours'], 2),
+            fasting_count=bucket['count'],
+        )
+        summary.goal_met = summary.total_hours >= user.fasting_goal_hours
+        for field, (total, count) in bucket['levels'].items():
+            if count:
+                setattr(summary, f'avg_{field}', round(total / count, 2))
+        summaries.append(summary)
+    return summaries
+
+
+def _add_to_buckets(buckets, record, days=None):
+    for day, hours in split_by_local_day(record.start_time, record.end_time):
+        if days is not None and day not in days:
+            continue
+        bucket = buckets.setdefault(day, {
+            'hours': 0.0,
+            'count': 0,
+            'levels': {field: [0, 0] for field in LEVEL_FIELDS},
+        })
+        bucket['hours'] += hours
+        bucket['count'] += 1
+        for field in LEVEL_FIELDS:
+            level = getattr(record, field)
+            if level is not None:
+                bucket['levels'][field][0] += level
+                bucket['levels'][field][1] += 1
+
+
+def _latest_archived(user, span_end):
+    from .archive import latest_archived
+
+    latest = latest_archived(user)
+    if latest is not None and latest.start_time < span_end:
+        yield latest
+
+
+def refresh_daily_summaries(user, days):
+    """Recalcula apenas os dias locais informados a partir dos jejuns encerrados que os tocam."""
+    days = set(days)
+    if not days:
+        return
+
+    buckets = {}
+    for first_day, last_day in _contiguous_spans(days):
+        span_start = local_midnight(first_day)
+        span_end = local_midnight(last_day + timedelta(days=1))
+        records = (
+            FastingRecord.objects.filter(
+                user=user,
+                start_time__lt=span_end,
+                end_time__isnull=False,
+            )
+            .only('start_time', 'end_time', *LEVEL_FIELDS)
+            .order_by('-start_time')
+            .iterator(chunk_size=50)
+        )
+        if user.archived_until is not None:
+            # O período arquivado é somente leitura; só o último jejum arquivado pode cruzar para o intervalo.
+            records = itertools.chain(records, _latest_archived(user, span_end))
+        # Jejuns não se sobrepõem: o primeiro que termina antes do intervalo encerra a busca.
+        for record in records:
+            if record.end_time <= span_start:
+                break
+            _add_to_buckets(buckets, record, days)
+
+    with transaction.atomic():
+        DailyFastingSummary.objects.filter(user=user, date__in=days).delete()
+        DailyFastingSummary.objects.bulk_create(_build_summaries(user, buckets))
+
+
+def rebuild_daily_summaries(user, batch_size=1000):
+    """Reconstrói todo o resumo diário do usuário, inclusive dos jejuns arquivados; retorna a quantidade de dias gerados."""
+    records = (
+        FastingRecord.objects.filter(user=user, end_time__isnull=False)
+        .only('start_time', 'end_time', *LEVEL_FIELDS)
+        .order_by('start_time')
+        .iterator(chunk_size=batch_size)
+    )
+    if user.archived_until is not None:
+        from .archive import archived_fastings
+
+        records = itertools.chain(archived_fastings(user.pk, ascending=True), records)
+
+    buckets = {}
+    for record in records:
+        _add_to_buckets(buckets, record)
+
+    summaries = _build_summaries(user, buckets)
+    with transaction.atomic():
+        DailyFastingSummary.objects.filter(user=user).delete()
+        DailyFastingSummary.objects.bulk_create(summaries, batch_size=batch_size)
+    return len(summaries)
+
+
+def _daily_totals(user, start_date, end_date):
+    return DailyFastingSummary.objects.filter(
+        user=user, date__gte=start_date, date__lte=end_date
+    ).values_list('date', 'total_hours')
+
+
+def _zero_filled(totals, start_date, end_date):
+    result = []
+    day = start_date
+    while day <= end_date:
+        result.append((day, totals.get(day, 0)))
+        day += timedelta(days=1)
+    return result
+
+
+def daily_hours(user, start_date, end_date):
+    """Horas de jejum por dia local no intervalo, com os dias sem registro zerados."""
+    return _zero_filled(dict(_daily_totals(user, start_date, end_date)), start_date, end_date)
+
+
+async def adaily_hours(user, start_date, end_date):
+    totals = {day: hours async for day, hours in _daily_totals(user, start_date, end_date)}
+    return _zero_filled(totals, start_date, end_date)
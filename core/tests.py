@@ -1,10 +1,23 @@
-from django.test import TestCase, Client
+import os
+import tempfile
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase, Client, override_settings
 from django.utils import timezone
 from datetime import timedelta
 from core.models import CustomUser, FastingRecord, WeightRecord
 from django.core.exceptions import ValidationError
 
 
+# Cache visto por todos os processos (o Redis em produção), para os testes dos caches por usuário.
+SHARED_CACHE = {'default': {
+    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    'LOCATION': os.path.join(tempfile.gettempdir(), 'fasting-life-test-cache'),
+}}
+LOCAL_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
 class CustomUserModelTest(TestCase):
     def setUp(self):
         self.user = CustomUser.objects.create_user(
@@ -79,6 +92,54 @@ class FastingRecordModelTest(TestCase):
         with self.assertRaises(ValidationError):
             fasting2.save()
 
+    def test_overlap_messages(self):
+        start = timezone.now() - timedelta(days=2)
+        FastingRecord.objects.create(
+            user=self.user,
+            start_time=start,
+            end_time=start + timedelta(hours=16),
+            fasting_type='intermittent'
+        )
+
+        fasting = FastingRecord(user=self.user, start_time=start + timedelta(hours=2), end_time=start + timedelta(hours=4))
+        with self.assertRaisesMessage(ValidationError, 'Este jejum se sobrepõe ao jejum de'):
+            fasting.clean()
+
+        active = FastingRecord.objects.create(
+            user=self.user,
+            start_time=start + timedelta(days=1),
+            fasting_type='intermittent'
+        )
+
+        fasting = FastingRecord(user=self.user, start_time=start - timedelta(hours=4), end_time=start - timedelta(hours=2))
+        with self.assertRaisesMessage(ValidationError, 'Já existe um jejum ativo'):
+            fasting.clean()
+
+        fasting = FastingRecord(user=self.user, start_time=active.start_time + timedelta(hours=1), end_time=active.start_time + timedelta(hours=2))
+        with self.assertRaisesMessage(ValidationError, 'Este jejum se sobrepõe a um jejum ativo existente.'):
+            fasting.clean()
+
+    def test_overlap_check_uses_single_query(self):
+        start = timezone.now() - timedelta(days=30)
+        FastingRecord.objects.bulk_create([
+            FastingRecord(
+                user=self.user,
+                start_time=start + timedelta(days=i),
+                end_time=start + timedelta(days=i, hours=16),
+                duration_hours=16.0
+            )
+            for i in range(20)
+        ])
+
+        fasting = FastingRecord(
+            user=self.user,
+            start_time=start + timedelta(days=5, hours=10),
+            end_time=start + timedelta(days=5, hours=20)
+        )
+        with self.assertNumQueries(1):
+            with self.assertRaises(ValidationError):
+                fasting.clean()
+
     def test_end_time_before_start_time_validation(self):
         start = timezone.now()
         end = start - timedelta(hours=1)
@@ -248,3 +309,2102 @@ class StreakCalculationTest(TestCase):
         streak = calculate_streak(self.user)
 
         self.assertEqual(streak, 1)
+
+    def test_streak_uses_single_query(self):
+        today = timezone.now()
+
+        for i in range(3):
+            day = today - timedelta(days=i)
+            FastingRecord.objects.create(
+                user=self.user,
+                start_time=day.replace(hour=20, minute=0),
+                end_time=day.replace(hour=12, minute=0) + timedelta(days=1),
+                fasting_type='intermittent'
+            )
+
+        from core.views import calculate_streak
+        with self.assertNumQueries(1):
+            streak = calculate_streak(self.user)
+
+        self.assertEqual(streak, 3)
+
+    def test_streak_is_capped(self):
+        today = timezone.now().replace(hour=12, minute=0)
+
+        FastingRecord.objects.bulk_create([
+            FastingRecord(
+                user=self.user,
+                start_time=today - timedelta(days=i),
+                end_time=today - timedelta(days=i) + timedelta(hours=20),
+                duration_hours=20.0,
+                fasting_type='intermittent'
+            )
+            for i in range(400)
+        ])
+
+        from core.views import calculate_streak
+        self.assertEqual(calculate_streak(self.user), 366)
+
+
+class DailyFastingSummaryTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='Test User',
+            fasting_goal_hours=16.0
+        )
+        self.tz = timezone.get_default_timezone()
+
+    def local(self, *args):
+        from datetime import datetime
+        return datetime(*args, tzinfo=self.tz)
+
+    def summaries(self):
+        from core.models import DailyFastingSummary
+        return {
+            s.date.isoformat(): s
+            for s in DailyFastingSummary.objects.filter(user=self.user)
+        }
+
+    def test_fasting_crossing_midnight_is_split(self):
+        FastingRecord.objects.create(
+            user=self.user,
+            start_time=self.local(2026, 1, 10, 20, 0),
+            end_time=self.local(2026, 1, 11, 12, 0),
+            energy_level=3,
+            fasting_type='intermittent'
+        )
+
+        summaries = self.summaries()
+        self.assertEqual(summaries['2026-01-10'].total_hours, 4.0)
+        self.assertEqual(summaries['2026-01-11'].total_hours, 12.0)
+        self.assertEqual(summaries['2026-01-11'].avg_energy_level, 3)
+        self.assertFalse(summaries['2026-01-11'].goal_met)
+
+    def test_migration_backfills_existing_fastings(self):
+        import importlib
+        from django.apps import apps
+        from core.summaries import rebuild_daily_summaries
+
+        backfill = importlib.import_module('core.migrations.0011_backfill_daily_summaries').backfill_daily_summaries
+        # Jejuns gravados antes da tabela de resumo (sem sinais).
+        FastingRecord.objects.bulk_create([
+            FastingRecord(user=self.user, start_time=self.local(2026, 1, day, 20, 0),
+                          end_time=self.local(2026, 1, day + 1, 14, 0), duration_hours=18.0, mood_level=day % 5 + 1)
+            for day in range(10, 14)
+        ])
+        self.assertEqual(self.summaries(), {})
+
+        def rows():
+            return {day: (s.total_hours, s.fasting_count, s.goal_met, s.avg_mood_level) for day, s in self.summaries().items()}
+
+        backfill(apps, None)
+        backfilled = rows()
+        self.assertEqual(len(backfilled), 5)
+        backfill(apps, None)
+        self.assertEqual(rows(), backfilled)
+
+        rebuild_daily_summaries(self.user)
+        self.assertEqual(rows(), backfilled)
+
+    def test_summary_follows_edit_and_delete(self):
+        fasting = FastingRecord.objects.create(
+            user=self.user,
+            start_time=self.local(2026, 1, 10, 2, 0),
+            end_time=self.local(2026, 1, 10, 20, 0),
+            fasting_type='intermittent'
+        )
+        self.assertTrue(self.summaries()['2026-01-10'].goal_met)
+
+        fasting = FastingRecord.objects.get(pk=fasting.pk)
+        fasting.start_time = self.local(2026, 1, 12, 2, 0)
+        fasting.end_time = self.local(2026, 1, 12, 10, 0)
+        fasting.save()
+
+        summaries = self.summaries()
+        self.assertNotIn('2026-01-10', summaries)
+        self.assertEqual(summaries['2026-01-12'].total_hours, 8.0)
+
+        fasting.delete()
+        self.assertEqual(self.summaries(), {})
+
+    def test_goal_change_updates_goal_met(self):
+        FastingRecord.objects.create(
+            user=self.user,
+            start_time=self.local(2026, 1, 10, 2, 0),
+            end_time=self.local(2026, 1, 10, 14, 0),
+            fasting_type='intermittent'
+        )
+        self.assertFalse(self.summaries()['2026-01-10'].goal_met)
+
+        self.user.fasting_goal_hours = 12.0
+        self.user.save()
+
+        self.assertTrue(self.summaries()['2026-01-10'].goal_met)
+
+    def test_rebuild_command(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from core.models import DailyFastingSummary
+
+        FastingRecord.objects.create(
+            user=self.user,
+            start_time=self.local(2026, 1, 10, 20, 0),
+            end_time=self.local(2026, 1, 11, 12, 0),
+            fasting_type='intermittent'
+        )
+        expected = {day: s.total_hours for day, s in self.summaries().items()}
+        DailyFastingSummary.objects.all().delete()
+
+        call_command('rebuild_daily_summaries', stdout=StringIO())
+
+        self.assertEqual({day: s.total_hours for day, s in self.summaries().items()}, expected)
+
+
+class FastingIndexUsageTest(TestCase):
+    INDEX_NAMES = ['fasting_user_start_idx', 'fasting_history_idx', 'unique_active_fasting_per_user']
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.client = Client()
+        self.user = CustomUser.objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='Test User'
+        )
+        start = timezone.now() - timedelta(days=30)
+        FastingRecord.objects.bulk_create([
+            FastingRecord(
+                user=self.user,
+                start_time=start + timedelta(days=i),
+                end_time=start + timedelta(days=i, hours=16),
+                duration_hours=16.0
+            )
+            for i in range(30)
+        ])
+        FastingRecord.objects.create(user=self.user, start_time=timezone.now())
+        self.client.login(email='test@example.com', password='testpass123')
+
+    def explain(self, sql):
+        from django.db import connection
+
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute(f'EXPLAIN {sql}')
+            else:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return '\n'.join(str(row) for row in cursor.fetchall())
+
+    def assertFastingQueriesUseIndexes(self, url):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        fasting_queries = [
+            query['sql'] for query in captured.captured_queries
+            if query['sql'].startswith('SELECT') and 'FROM "core_fastingrecord"' in query['sql']
+        ]
+        self.assertTrue(fasting_queries)
+        for sql in fasting_queries:
+            plan = self.explain(sql)
+            self.assertTrue(any(name in plan for name in self.INDEX_NAMES), f'{sql}\n{plan}')
+
+    def test_dashboard_queries_use_indexes(self):
+        self.assertFastingQueriesUseIndexes('/dashboard/')
+
+    def test_history_query_uses_indexes(self):
+        self.assertFastingQueriesUseIndexes('/fasting/history/')
+
+
+class HistoryPaginationTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = CustomUser.objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='Test User'
+        )
+        start = timezone.now() - timedelta(days=120)
+        FastingRecord.objects.bulk_create([
+            FastingRecord(
+                user=self.user,
+                start_time=start + timedelta(days=i),
+                end_time=start + timedelta(days=i, hours=16),
+                duration_hours=16.0,
+                notes=f'jejum {i}'
+            )
+            for i in range(120)
+        ])
+        self.client.login(email='test@example.com', password='testpass123')
+
+    def test_history_walks_all_pages(self):
+        from core.views import HISTORY_PAGE_SIZE
+
+        seen = []
+        url = '/fasting/history/'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            page = response.context['fastings']
+            self.assertLessEqual(len(page), HISTORY_PAGE_SIZE)
+            seen.extend(f.pk for f in page)
+            cursor = response.context['next_cursor']
+            url = f'/fasting/history/?cursor={cursor}' if cursor else None
+
+        expected = list(
+            FastingRecord.objects.filter(user=self.user).order_by('-start_time', '-id').values_list('pk', flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_invalid_cursor_returns_first_page(self):
+        response = self.client.get('/fasting/history/?cursor=invalido')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['fastings']), 50)
+
+    def test_export_csv(self):
+        response = self.client.get('/fasting/export/?format=csv')
+        self.assertEqual(response.status_code, 200)
+        lines = b''.join(response.streaming_content).decode().strip().splitlines()
+        self.assertEqual(lines[0].split(','), ['id', 'start_time', 'end_time', 'duration_hours', 'fasting_type', 'energy_level', 'focus_level', 'mood_level', 'notes'])
+        self.assertEqual(len(lines), 121)
+
+    def test_export_ndjson(self):
+        import json
+
+        response = self.client.get('/fasting/export/?format=ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(len(rows), 120)
+        self.assertEqual(rows[0]['notes'], 'jejum 0')
+
+    def test_export_invalid_format(self):
+        response = self.client.get('/fasting/export/?format=xml')
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(CACHES=SHARED_CACHE)
+class DashboardCacheTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+        self.client = Client()
+        self.user = CustomUser.objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='Test User',
+            fasting_goal_hours=16.0
+        )
+        self.client.login(email='test@example.com', password='testpass123')
+
+    def test_second_hit_is_served_from_cache(self):
+        from core.cache import dashboard_cache_stats
+
+        self.client.get('/dashboard/')
+        # Apenas a sessão: o usuário vem do cache do backend de autenticação.
+        with self.assertNumQueries(1):
+            response = self.client.get('/dashboard/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(dashboard_cache_stats()['hits'], 1)
+        self.assertEqual(dashboard_cache_stats()['misses'], 1)
+
+    def test_fresh_flag_bypasses_and_refreshes_cache(self):
+        self.client.get('/dashboard/')
+        # Escrita que não passou pela invalidação deste processo.
+        FastingRecord.objects.bulk_create([FastingRecord(user=self.user, start_time=timezone.now())])
+
+        self.assertIsNone(self.client.get('/dashboard/').context['active_fasting'])
+        self.assertIsNotNone(self.client.get('/dashboard/?fresh=1').context['active_fasting'])
+        self.assertIsNotNone(self.client.get('/dashboard/').context['active_fasting'])
+
+    def test_sync_reloads_are_capped(self):
+        response = self.client.get('/dashboard/')
+        self.assertContains(response, 'maxReloads = 2')
+        self.assertContains(response, "searchParams.set('fresh', '1')")
+
+    def test_process_local_cache_is_skipped(self):
+        from core.cache import dashboard_cache_stats
+
+        with self.settings(CACHES=LOCAL_CACHE):
+            self.client.get('/dashboard/')
+            FastingRecord.objects.create(user=self.user, start_time=timezone.now())
+            response = self.client.get('/dashboard/')
+
+        self.assertIsNotNone(response.context['active_fasting'])
+        self.assertEqual(dashboard_cache_stats()['misses'], 0)
+
+    def test_fasting_change_invalidates_cache(self):
+        self.client.get('/dashboard/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/fasting/start/')
+
+        response = self.client.get('/dashboard/')
+        self.assertIsNotNone(response.context['active_fasting'])
+
+    def test_goal_change_invalidates_cache(self):
+        self.client.get('/dashboard/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.fasting_goal_hours = 18.0
+            self.user.save()
+
+        response = self.client.get('/dashboard/')
+        self.assertEqual(response.context['goal_hours'], 18.0)
+
+
+class DashboardChartTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+        self.client = Client()
+        self.user = CustomUser.objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='Test User'
+        )
+        self.client.login(email='test@example.com', password='testpass123')
+
+    def chart(self, url):
+        import json
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.context['chart_data'])
+
+    def test_chart_range_is_zero_filled(self):
+        yesterday = timezone.localtime(timezone.now()).replace(hour=1, minute=0) - timedelta(days=1)
+        FastingRecord.objects.create(
+            user=self.user,
+            start_time=yesterday,
+            end_time=yesterday + timedelta(hours=10),
+            fasting_type='intermittent'
+        )
+
+        chart = self.chart('/dashboard/?range=30')
+        self.assertEqual(len(chart), 30)
+        self.assertEqual(chart[-2]['hours'], 10.0)
+        self.assertEqual(sum(day['hours'] for day in chart), 10.0)
+
+    def test_invalid_range_falls_back_to_seven_days(self):
+        self.assertEqual(len(self.chart('/dashboard/?range=12')), 7)
+        self.assertEqual(len(self.chart('/dashboard/?range=abc')), 7)
+
+    def test_query_count_does_not_grow_with_range(self):
+        from django.core.cache import cache
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        counts = []
+        for days in (7, 365):
+            cache.clear()
+            with CaptureQueriesContext(connection) as captured:
+                self.client.get(f'/dashboard/?range={days}')
+            counts.append(len(captured))
+
+        self.assertEqual(counts[0], counts[1])
+
+
+@override_settings(CACHES=SHARED_CACHE)
+class ApiTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+        self.client = Client()
+        self.user = CustomUser.objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='Test User'
+        )
+        self.client.login(email='test@example.com', password='testpass123')
+
+    def test_requires_authentication(self):
+        self.client.logout()
+        response = self.client.get('/api/v1/fastings/')
+        self.assertEqual(response.status_code, 403)
+
+    def test_start_and_end_fasting(self):
+        response = self.client.post('/api/v1/fastings/start/')
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNone(response.json()['end_time'])
+
+        response = self.client.post('/api/v1/fastings/start/')
+        self.assertEqual(response.status_code, 409)
+
+        response = self.client.post('/api/v1/fastings/end/', {'energy_level': 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.json()['duration_hours'])
+        self.assertEqual(response.json()['energy_level'], 3)
+
+        response = self.client.post('/api/v1/fastings/end/')
+        self.assertEqual(response.status_code, 409)
+
+    def test_list_is_cursor_paginated_with_sparse_fields(self):
+        start = timezone.now() - timedelta(days=10)
+        for i in range(3):
+            FastingRecord.objects.create(
+                user=self.user,
+                start_time=start + timedelta(days=i),
+                end_time=start + timedelta(days=i, hours=16),
+            )
+
+        response = self.client.get('/api/v1/fastings/?page_size=2&fields=id,duration_hours')
+        data = response.json()
+        self.assertEqual(len(data['results']), 2)
+        self.assertEqual(set(data['results'][0]), {'id', 'duration_hours'})
+
+        data = self.client.get(data['next']).json()
+        self.assertEqual(len(data['results']), 1)
+        self.assertIsNone(data['next'])
+
+    def test_conditional_get_returns_not_modified(self):
+        response = self.client.get('/api/v1/stats/')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/v1/stats/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/v1/weights/', {'weight': 80, 'reference_month': '2026-01'})
+
+        response = self.client.get('/api/v1/stats/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_no_etag_without_shared_cache(self):
+        etag = self.client.get('/api/v1/stats/')['ETag']
+
+        with self.settings(CACHES=LOCAL_CACHE):
+            response = self.client.get('/api/v1/stats/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_weight_duplicate_month_is_rejected(self):
+        self.client.post('/api/v1/weights/', {'weight': 80, 'reference_month': '2026-01'})
+        response = self.client.post('/api/v1/weights/', {'weight': 81, 'reference_month': '2026-01'})
+        self.assertEqual(response.status_code, 400)
+
+
+class FastingImportTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='Test User'
+        )
+
+    def rows(self, text, import_format='csv'):
+        from io import StringIO
+        from core.importers import read_rows
+        return read_rows(StringIO(text), import_format)
+
+    def test_import_csv_reports_row_errors(self):
+        from datetime import datetime
+        from core.importers import import_fastings
+
+        FastingRecord.objects.create(
+            user=self.user,
+            start_time=timezone.make_aware(datetime(2025, 1, 5, 20, 0)),
+            end_time=timezone.make_aware(datetime(2025, 1, 6, 12, 0)),
+        )
+        content = (
+            'start_time,end_time,fasting_type,energy_level,notes\n'
+            '2025-01-01T20:00,2025-01-02T12:00,intermittent,3,primeiro\n'
+            '2025-01-02T10:00,2025-01-02T14:00,intermittent,,sobrepõe a linha 2\n'
+            '2025-01-06T10:00,2025-01-06T14:00,intermittent,,sobrepõe o banco\n'
+            '03/01/2025 20:00,04/01/2025 12:00,extended,2,\n'
+            '2025-01-08T20:00,2025-01-08T10:00,intermittent,,\n'
+            '2025-01-09T20:00,2025-01-10T12:00,desconhecido,,\n'
+        )
+
+        result = import_fastings(self.user, self.rows(content), batch_size=3)
+
+        self.assertEqual(result.created, 2)
+        self.assertEqual([error['row'] for error in result.errors], [3, 4, 6, 7])
+        self.assertIn('linha 2', result.errors[0]['message'])
+        self.assertIn('05/01/2025 20:00', result.errors[1]['message'])
+
+        imported = FastingRecord.objects.filter(user=self.user, notes='primeiro').get()
+        self.assertEqual(imported.duration_hours, 16.0)
+        self.assertEqual(imported.energy_level, 3)
+        self.assertTrue(self.user.daily_summaries.filter(date='2025-01-02').exists())
+
+    def test_invalid_values_become_row_errors(self):
+        import json
+        from core.importers import import_fastings
+
+        valid = {'start_time': '2025-02-01T20:00', 'end_time': '2025-02-02T12:00'}
+        rows = [
+            {'start_time': '2025-13-01T20:00', 'end_time': '2025-13-02T12:00'},
+            {'start_time': 5, 'end_time': '2025-02-02T12:00'},
+            {**valid, 'fasting_type': 5},
+            {**valid, 'notes': 5},
+            {**valid, 'energy_level': [1]},
+            {**valid, 'energy_level': 2.5},
+            [1, 2],
+            {**valid, 'energy_level': '2'},
+        ]
+        content = '\n'.join(json.dumps(row) for row in rows)
+
+        result = import_fastings(self.user, self.rows(content, 'json'))
+
+        self.assertEqual(result.created, 1)
+        self.assertEqual([error['row'] for error in result.errors], list(range(1, 8)))
+        self.assertIn('Início inválido', result.errors[0]['message'])
+        self.assertIn('Início deve ser texto', result.errors[1]['message'])
+        self.assertIn('Tipo de jejum deve ser texto', result.errors[2]['message'])
+        self.assertIn('Observações deve ser texto', result.errors[3]['message'])
+        self.assertEqual(FastingRecord.objects.get(user=self.user).energy_level, 2)
+
+    def test_api_import_reports_out_of_range_date(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        client = Client()
+        client.login(email='test@example.com', password='testpass123')
+        upload = SimpleUploadedFile(
+            'jejuns.csv', b'start_time,end_time\n2025-13-01T20:00,2025-13-02T12:00\n2025-02-01T20:00,2025-02-02T12:00\n'
+        )
+
+        response = client.post('/api/v1/fastings/import/', {'file': upload})
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['created'], 1)
+        self.assertEqual(response.json()['errors'][0]['row'], 2)
+
+    def test_import_ndjson_round_trip_with_export(self):
+        from core.importers import import_fastings
+
+        content = '\n'.join([
+            '{"start_time": "2025-02-01T20:00:00-03:00", "end_time": "2025-02-02T12:00:00-03:00", "mood_level": 1}',
+            'isto não é json',
+        ])
+        result = import_fastings(self.user, self.rows(content, 'json'))
+
+        self.assertEqual(result.created, 1)
+        self.assertEqual(result.errors, [{'row': 2, 'message': 'Linha inválida.'}])
+
+    def test_dry_run_does_not_write(self):
+        from core.importers import import_fastings
+
+        content = 'start_time,end_time\n2025-01-01T20:00,2025-01-02T12:00\n'
+        result = import_fastings(self.user, self.rows(content), dry_run=True)
+
+        self.assertEqual(result.created, 1)
+        self.assertFalse(FastingRecord.objects.exists())
+
+    def test_import_view(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        client = Client()
+        client.login(email='test@example.com', password='testpass123')
+        upload = SimpleUploadedFile('jejuns.csv', b'start_time,end_time\n2025-01-01T20:00,2025-01-02T12:00\n')
+
+        response = client.post('/fasting/import/', {'file': upload, 'format': 'csv'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['result'].created, 1)
+        self.assertEqual(FastingRecord.objects.filter(user=self.user).count(), 1)
+
+
+class BenchmarkSuiteTest(TestCase):
+    def test_run_and_compare(self):
+        from core.benchmarks import compare_benchmarks, run_benchmarks
+
+        report = run_benchmarks([20], repeat=2, scenarios=['dashboard', 'calculate_streak'], max_user_history=10)
+
+        self.assertEqual([r['scenario'] for r in report['results']], ['dashboard', 'calculate_streak'])
+        self.assertEqual(report['results'][1]['queries'], 1)
+        self.assertFalse(CustomUser.objects.filter(email__startswith='benchmark').exists())
+
+        slower = {'results': [dict(r, p50_ms=r['p50_ms'] * 3) for r in report['results']]}
+        rows, regressions = compare_benchmarks(slower, report)
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(len(regressions), 2)
+
+
+class PerformanceMiddlewareTest(TestCase):
+    def setUp(self):
+        from core.middleware import registry
+        registry.reset()
+
+        self.user = CustomUser.objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='Test User',
+            is_staff=True
+        )
+
+    def test_disabled_by_default(self):
+        client = Client()
+        response = client.get('/login/')
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(client.get('/metrics/').status_code, 404)
+
+    def test_server_timing_and_metrics(self):
+        from django.test import override_settings
+
+        with override_settings(PERF_INSTRUMENTATION=True):
+            client = Client()
+            client.login(email='test@example.com', password='testpass123')
+            response = client.get('/dashboard/')
+            self.assertIn('db;dur=', response['Server-Timing'])
+            self.assertIn('tpl;dur=', response['Server-Timing'])
+
+            metrics = client.get('/metrics/').content.decode()
+            self.assertIn('fasting_http_requests_total{view="dashboard"} 1', metrics)
+            self.assertIn('fasting_dashboard_cache_total{result="miss"}', metrics)
+
+    def test_query_budget_warning(self):
+        from django.test import override_settings
+
+        with override_settings(PERF_INSTRUMENTATION=True, PERF_QUERY_BUDGETS={'dashboard': 1}):
+            client = Client()
+            client.login(email='test@example.com', password='testpass123')
+            with self.assertLogs('core.performance', level='WARNING') as logs:
+                client.get('/dashboard/')
+
+        self.assertIn('dashboard', logs.output[0])
+
+    async def test_async_chain_stays_async(self):
+        from asgiref.sync import iscoroutinefunction
+        from django.http import HttpResponse
+        from django.test import RequestFactory, override_settings
+        from core.middleware import PerformanceMiddleware
+
+        async def get_response(request):
+            await CustomUser.objects.filter(pk=self.user.pk).aexists()
+            return HttpResponse()
+
+        with override_settings(PERF_INSTRUMENTATION=True):
+            middleware = PerformanceMiddleware(get_response)
+            self.assertTrue(iscoroutinefunction(middleware))
+            response = await middleware(RequestFactory().get('/'))
+            self.assertFalse(iscoroutinefunction(PerformanceMiddleware(lambda request: HttpResponse())))
+
+        self.assertIn('desc="1 queries"', response['Server-Timing'])
+
+    def test_metrics_requires_staff_or_token(self):
+        from django.test import override_settings
+
+        with override_settings(PERF_INSTRUMENTATION=True, PERF_METRICS_TOKEN='segredo'):
+            client = Client()
+            self.assertEqual(client.get('/metrics/').status_code, 403)
+            response = client.get('/metrics/', HTTP_AUTHORIZATION='Bearer segredo')
+            self.assertEqual(response.status_code, 200)
+
+
+class RecordingBroadcaster:
+    events = []
+
+    def publish(self, user_id, event):
+        self.events.append((user_id, event))
+
+
+class LiveUpdatesTest(TestCase):
+    def setUp(self):
+        RecordingBroadcaster.events.clear()
+
+        self.user = CustomUser.objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='Test User'
+        )
+
+    def test_start_and_end_are_published_after_commit(self):
+        from django.test import override_settings
+
+        with override_settings(LIVE_UPDATES_BACKEND='core.tests.RecordingBroadcaster'):
+            with self.captureOnCommitCallbacks(execute=True):
+                fasting = FastingRecord.objects.create(user=self.user, start_time=timezone.now() - timedelta(hours=2))
+            self.assertEqual(RecordingBroadcaster.events[-1][1]['type'], 'fasting_started')
+
+            fasting = FastingRecord.objects.get(pk=fasting.pk)
+            fasting.notes = 'sem mudança de estado'
+            with self.captureOnCommitCallbacks(execute=True):
+                fasting.save()
+            self.assertEqual(len(RecordingBroadcaster.events), 1)
+
+            fasting.end_time = timezone.now()
+            with self.captureOnCommitCallbacks(execute=True):
+                fasting.save()
+
+        user_id, event = RecordingBroadcaster.events[-1]
+        self.assertEqual(user_id, self.user.pk)
+        self.assertEqual(event['type'], 'fasting_ended')
+        self.assertEqual(event['duration_hours'], 2.0)
+
+    async def test_in_process_broadcaster_routes_by_user(self):
+        import asyncio
+        from core.live import InProcessBroadcaster
+
+        broadcaster = InProcessBroadcaster()
+        subscription = broadcaster.subscribe(1)
+        broadcaster.publish(2, {'type': 'fasting_started'})
+        broadcaster.publish(1, {'type': 'fasting_ended'})
+
+        event = await asyncio.wait_for(subscription.get(), 1)
+        self.assertEqual(event['type'], 'fasting_ended')
+        self.assertTrue(subscription.queue.empty())
+
+        broadcaster.unsubscribe(subscription)
+        self.assertEqual(broadcaster.connection_count(), 0)
+
+    async def test_stream_sends_snapshot_and_goal_reached(self):
+        from core.live import event_stream
+
+        await FastingRecord.objects.acreate(user=self.user, start_time=timezone.now() - timedelta(hours=20))
+
+        stream = event_stream(self.user)
+        snapshot = await stream.__anext__()
+        goal = await stream.__anext__()
+        await stream.aclose()
+
+        self.assertIn('event: snapshot', snapshot)
+        self.assertIn('"type": "fasting_started"', snapshot)
+        self.assertIn('event: goal_reached', goal)
+
+    def test_wsgi_request_is_told_to_stop_reconnecting(self):
+        client = Client()
+        self.assertEqual(client.get('/fasting/live/').status_code, 401)
+
+        client.login(email='test@example.com', password='testpass123')
+        self.assertEqual(client.get('/fasting/live/').status_code, 204)
+
+
+@override_settings(CACHES=SHARED_CACHE)
+class AsyncViewsTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+        self.user = CustomUser.objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='Test User'
+        )
+        now = timezone.now()
+        for days_ago in range(1, 4):
+            start = now - timedelta(days=days_ago, hours=18)
+            FastingRecord.objects.create(user=self.user, start_time=start, end_time=start + timedelta(hours=17))
+
+    def use_async_urls(self, enabled):
+        import importlib
+        from django.test import override_settings
+        from django.urls import clear_url_caches
+        import fasting_life.urls
+
+        with override_settings(ASYNC_VIEWS=enabled):
+            importlib.reload(fasting_life.urls)
+        clear_url_caches()
+
+    async def test_dashboard_context_matches_sync_version(self):
+        from asgiref.sync import sync_to_async
+        from core.async_views import abuild_dashboard_context
+        from core.views import build_dashboard_context
+
+        expected = await sync_to_async(build_dashboard_context)(self.user, 30)
+        self.assertEqual(await abuild_dashboard_context(self.user, 30), expected)
+        self.assertEqual(expected['days_above_goal'], 3)
+
+    async def test_async_fasting_flow(self):
+        from django.test import AsyncClient
+
+        self.use_async_urls(True)
+        self.addCleanup(self.use_async_urls, False)
+
+        client = AsyncClient()
+        response = await client.get('/dashboard/')
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('/login/', response.url)
+
+        await client.alogin(email='test@example.com', password='testpass123')
+        response = await client.get('/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context['active_fasting'])
+
+        response = await client.post('/fasting/start/')
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(await FastingRecord.objects.filter(user=self.user, end_time__isnull=True).aexists())
+
+        response = await client.post('/fasting/end/', {'energy_level': '2'})
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(await FastingRecord.objects.filter(user=self.user, end_time__isnull=True).aexists())
+
+        response = await client.get('/fasting/history/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['fastings']), 4)
+
+    async def test_async_history_loads_page_only_on_fragment_miss(self):
+        from unittest import mock
+        from django.test import AsyncClient
+        from core.archive import ahistory_page
+
+        self.use_async_urls(True)
+        self.addCleanup(self.use_async_urls, False)
+        client = AsyncClient()
+        await client.alogin(email='test@example.com', password='testpass123')
+
+        with mock.patch('core.async_views.ahistory_page', wraps=ahistory_page) as load:
+            first = await client.get('/fasting/history/')
+            second = await client.get('/fasting/history/')
+
+        self.assertEqual(load.call_count, 1)
+        self.assertContains(first, 'bi-pencil', count=3)
+        self.assertContains(second, 'bi-pencil', count=3)
+
+
+class AtomicStartEndTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='Test User'
+        )
+
+    def statements(self, func):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as captured:
+            result = func()
+        sql = [query['sql'] for query in captured.captured_queries]
+        skipped = ('SAVEPOINT', 'pg_advisory_xact_lock')
+        return result, [statement for statement in sql if not any(word in statement for word in skipped)]
+
+    def test_start_is_a_single_conditional_insert(self):
+        fasting, sql = self.statements(lambda: FastingRecord.start_now(self.user))
+
+        self.assertEqual(len(sql), 1)
+        self.assertIn('NOT EXISTS', sql[0])
+        self.assertEqual(FastingRecord.objects.get(user=self.user, end_time__isnull=True).pk, fasting.pk)
+
+    def test_start_conflicts(self):
+        from core.models import FastingConflict
+
+        FastingRecord.start_now(self.user)
+        with self.assertRaisesMessage(FastingConflict, 'Já existe um jejum ativo'):
+            FastingRecord.start_now(self.user)
+        self.assertEqual(FastingRecord.objects.filter(user=self.user).count(), 1)
+
+        FastingRecord.end_active(self.user)
+        FastingRecord.objects.filter(user=self.user).update(end_time=timezone.now() + timedelta(hours=1))
+        with self.assertRaises(FastingConflict):
+            FastingRecord.start_now(self.user)
+
+    def test_end_is_a_conditional_update(self):
+        from core.models import DailyFastingSummary, FastingConflict
+
+        FastingRecord.objects.create(user=self.user, start_time=timezone.now() - timedelta(hours=16))
+
+        fasting, sql = self.statements(lambda: FastingRecord.end_active(self.user, energy_level=3, notes='ok'))
+
+        self.assertIn('UPDATE', sql[1])
+        self.assertIn('IS NULL', sql[1])
+        fasting.refresh_from_db()
+        self.assertEqual(fasting.duration_hours, 16.0)
+        self.assertEqual(fasting.energy_level, 3)
+        self.assertTrue(DailyFastingSummary.objects.filter(user=self.user).exists())
+
+        with self.assertRaisesMessage(FastingConflict, 'Não há jejum ativo para encerrar.'):
+            FastingRecord.end_active(self.user)
+
+    def test_end_validates_levels(self):
+        FastingRecord.objects.create(user=self.user, start_time=timezone.now() - timedelta(hours=16))
+
+        with self.assertRaises(ValidationError):
+            FastingRecord.end_active(self.user, mood_level=5)
+        self.assertTrue(FastingRecord.objects.filter(user=self.user, end_time__isnull=True).exists())
+
+    def test_start_and_end_publish_live_events(self):
+        from django.test import override_settings
+
+        RecordingBroadcaster.events.clear()
+        with override_settings(LIVE_UPDATES_BACKEND='core.tests.RecordingBroadcaster'):
+            with self.captureOnCommitCallbacks(execute=True):
+                FastingRecord.start_now(self.user)
+            with self.captureOnCommitCallbacks(execute=True):
+                FastingRecord.end_active(self.user)
+
+        self.assertEqual([event['type'] for _, event in RecordingBroadcaster.events], ['fasting_started', 'fasting_ended'])
+
+
+@override_settings(CACHES=SHARED_CACHE)
+class UserStatisticsTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+        self.user = CustomUser.objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='Test User',
+            fasting_goal_hours=16.0
+        )
+        self.client = Client()
+        self.client.login(email='test@example.com', password='testpass123')
+
+        noon = timezone.now().replace(hour=12, minute=0, second=0, microsecond=0)
+        for days_ago, hours, energy in [(3, 18, 3), (4, 14, 1), (5, 17, 3), (40, 12, 1), (41, 20, 3)]:
+            start = noon - timedelta(days=days_ago, hours=hours)
+            FastingRecord.objects.create(
+                user=self.user, start_time=start, end_time=start + timedelta(hours=hours), energy_level=energy
+            )
+        for month, weight in [('2026-01', 90.0), ('2026-02', 89.0), ('2026-03', 88.0)]:
+            WeightRecord.objects.create(user=self.user, reference_month=month, weight=weight)
+
+    def test_compute_statistics(self):
+        from core.analytics import refresh_user_statistics
+
+        stats = refresh_user_statistics(self.user)
+
+        self.assertEqual(stats.fasting_count, 5)
+        self.assertEqual(stats.avg_hours_30, round((18 + 14 + 17) / 3, 2))
+        self.assertEqual(stats.goal_rate_30, round(2 / 3, 3))
+        self.assertEqual(stats.avg_hours_90, round((18 + 14 + 17 + 12 + 20) / 5, 2))
+        self.assertGreater(stats.energy_correlation, 0.9)
+        self.assertIsNone(stats.focus_correlation)
+        self.assertEqual(stats.latest_weight, 88.0)
+        self.assertEqual(stats.weight_trend, -1.0)
+
+    def test_pearson_matches_statistics_module(self):
+        import statistics
+        from core.analytics import pearson
+
+        xs = [1, 2, 3, 2, 1, 3]
+        ys = [12.0, 16.5, 20.0, 15.0, 13.0, 18.0]
+        sums = (len(xs), sum(xs), sum(ys), sum(x * y for x, y in zip(xs, ys)),
+                sum(x * x for x in xs), sum(y * y for y in ys))
+        self.assertAlmostEqual(pearson(*sums), statistics.correlation(xs, ys), places=3)
+
+    def test_refreshed_on_record_change(self):
+        from core.analytics import get_user_statistics, refresh_user_statistics
+        from core.models import UserStatistics
+
+        refresh_user_statistics(self.user)
+        # A escrita só marca a linha; o recálculo fica para a próxima leitura.
+        with self.captureOnCommitCallbacks(execute=True):
+            start = timezone.now() - timedelta(days=1, hours=20)
+            FastingRecord.objects.create(user=self.user, start_time=start, end_time=start + timedelta(hours=20))
+
+        row = UserStatistics.objects.get(user=self.user)
+        self.assertEqual((row.fasting_count, row.stale), (5, True))
+        stats = get_user_statistics(self.user)
+        self.assertEqual(stats.fasting_count, 6)
+        self.assertFalse(stats.stale)
+
+    def test_stale_only_command_includes_stale_rows(self):
+        from django.core.management import call_command
+        from io import StringIO
+        from core.analytics import mark_statistics_stale, refresh_user_statistics
+
+        refresh_user_statistics(self.user)
+        out = StringIO()
+        call_command('refresh_statistics', '--stale-only', stdout=out)
+        self.assertIn('0 usuário', out.getvalue())
+
+        mark_statistics_stale(self.user.pk)
+        call_command('refresh_statistics', '--stale-only', stdout=out)
+        self.assertIn('1 usuário', out.getvalue())
+
+    def test_page_and_api_read_precomputed_row(self):
+        from core.analytics import refresh_user_statistics
+
+        refresh_user_statistics(self.user)
+
+        with self.assertNumQueries(3):
+            response = self.client.get('/stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Melhor sequência')
+
+        response = self.client.get('/api/v1/stats/trends/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['fasting_count'], 5)
+
+    def test_refresh_command(self):
+        from django.core.management import call_command
+        from io import StringIO
+        from core.models import UserStatistics
+
+        out = StringIO()
+        call_command('refresh_statistics', stdout=out)
+        self.assertIn('1 usuário', out.getvalue())
+        self.assertTrue(UserStatistics.objects.filter(user=self.user).exists())
+
+
+@override_settings(CACHES=SHARED_CACHE)
+class StreakModuleTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+        self.user = CustomUser.objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='Test User',
+            fasting_goal_hours=16.0
+        )
+        self.today = timezone.localdate()
+
+    def at(self, days_ago, hour):
+        from core.summaries import local_midnight
+        return local_midnight(self.today - timedelta(days=days_ago)) + timedelta(hours=hour)
+
+    def test_tracker_splits_at_midnight_and_merges_overlaps(self):
+        from core.streaks import StreakTracker
+
+        tracker = StreakTracker(goal_hours=16.0)
+        # 20h -> 12h todos os dias: 4h na noite + 12h na manhã seguinte = 16h por dia.
+        for days_ago in range(5, 0, -1):
+            tracker.add(self.at(days_ago, 20), self.at(days_ago - 1, 12))
+        # Intervalo sobreposto não conta duas vezes.
+        tracker.add(self.at(1, 21), self.at(0, 10))
+
+        summary = tracker.summary(self.today)
+        self.assertEqual(summary['runs'][0]['start'], self.today - timedelta(days=4))
+        self.assertEqual(summary['longest'], 4)
+        self.assertEqual(summary['current'], 4)
+
+    def test_runs_and_longest(self):
+        from core.streaks import StreakTracker
+
+        tracker = StreakTracker(goal_hours=16.0)
+        for days_ago in (10, 9, 8, 5, 4):
+            tracker.add(self.at(days_ago, 2), self.at(days_ago, 20))
+
+        summary = tracker.summary(self.today)
+        self.assertEqual([run['days'] for run in summary['runs']], [3, 2])
+        self.assertEqual(summary['longest'], 3)
+        self.assertEqual(summary['current'], 0)
+
+    def test_closing_a_fast_extends_cached_streaks(self):
+        from core.streaks import build_tracker, get_streaks
+
+        for days_ago in (3, 2):
+            FastingRecord.objects.create(user=self.user, start_time=self.at(days_ago, 2), end_time=self.at(days_ago, 20))
+        self.assertEqual(get_streaks(self.user, self.today)['current'], 0)
+
+        FastingRecord.objects.create(user=self.user, start_time=self.at(1, 2))
+        with self.captureOnCommitCallbacks(execute=True):
+            FastingRecord.end_active(self.user)
+
+        with self.assertNumQueries(0):
+            cached = get_streaks(self.user, self.today)
+        self.assertEqual(cached, build_tracker(self.user).summary(self.today))
+        self.assertEqual(cached['current'], 3)
+
+    def test_editing_history_invalidates_cache(self):
+        from core.streaks import get_streaks
+
+        records = [
+            FastingRecord.objects.create(user=self.user, start_time=self.at(days_ago, 2), end_time=self.at(days_ago, 20))
+            for days_ago in (3, 2, 1)
+        ]
+        self.assertEqual(get_streaks(self.user, self.today)['longest'], 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            records[1].delete()
+
+        self.assertEqual(get_streaks(self.user, self.today)['longest'], 1)
+
+    def test_cache_follows_data_version(self):
+        from core.cache import bump_user_data_version
+        from core.streaks import get_streaks
+
+        FastingRecord.objects.create(user=self.user, start_time=self.at(2, 2), end_time=self.at(2, 20))
+        self.assertEqual(get_streaks(self.user, self.today)['longest'], 1)
+
+        # Escrita sem sinais (como em outro processo): basta a nova versão para o cache antigo deixar de valer.
+        FastingRecord.objects.bulk_create([
+            FastingRecord(user=self.user, start_time=self.at(1, 2), end_time=self.at(1, 20), duration_hours=18.0)
+        ])
+        bump_user_data_version(self.user.pk)
+
+        self.assertEqual(get_streaks(self.user, self.today)['longest'], 2)
+
+    def test_streaks_api(self):
+        FastingRecord.objects.create(user=self.user, start_time=self.at(1, 2), end_time=self.at(1, 20))
+
+        client = Client()
+        client.login(email='test@example.com', password='testpass123')
+        response = client.get('/api/v1/stats/streaks/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['current'], 1)
+
+
+class AdminChangelistTest(TestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_superuser(
+            email='admin@example.com',
+            password='testpass123',
+            name='Admin'
+        )
+        self.client = Client()
+        self.client.login(email='admin@example.com', password='testpass123')
+
+        start = timezone.now() - timedelta(days=30)
+        for i in range(5):
+            user = CustomUser.objects.create_user(email=f'user{i}@example.com', password=None, name=f'User {i}')
+            for day in range(3):
+                FastingRecord.objects.create(
+                    user=user,
+                    start_time=start + timedelta(days=day),
+                    end_time=start + timedelta(days=day, hours=16)
+                )
+            WeightRecord.objects.create(user=user, weight=80, reference_month='2026-01')
+
+    def test_fasting_changelist_query_count_does_not_grow_with_rows(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get('/admin/core/fastingrecord/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['cl'].result_count, 15)
+        self.assertLess(len(captured), 15)
+        self.assertNotContains(response, 'user3@example.com</a></li>')
+
+    def test_user_email_filter(self):
+        response = self.client.get('/admin/core/fastingrecord/', {'user_email': 'user2@example.com'})
+
+        self.assertEqual(response.context['cl'].result_count, 3)
+        self.assertContains(response, 'value="user2@example.com"')
+
+        response = self.client.get('/admin/core/weightrecord/', {'user_email': 'user2@example.com'})
+        self.assertEqual(response.context['cl'].result_count, 1)
+
+    def test_estimated_count_falls_back_to_exact_count(self):
+        from core.pagination import EstimatedCountPaginator
+
+        paginator = EstimatedCountPaginator(FastingRecord.objects.order_by('pk'), 10)
+        self.assertEqual(paginator.count, 15)
+
+    def test_user_autocomplete(self):
+        response = self.client.get('/admin/autocomplete/', {
+            'app_label': 'core', 'model_name': 'fastingrecord', 'field_name': 'user', 'term': 'user4',
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['text'] for result in response.json()['results']], ['user4@example.com'])
+
+
+@override_settings(CACHES=SHARED_CACHE)
+class CachedAuthenticationTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+        self.client = Client()
+        self.user = CustomUser.objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='Test User'
+        )
+        self.client.login(email='test@example.com', password='testpass123')
+
+    def test_cached_fragments_skip_page_queries(self):
+        FastingRecord.objects.create(
+            user=self.user, start_time=timezone.now() - timedelta(hours=20), end_time=timezone.now() - timedelta(hours=2)
+        )
+        WeightRecord.objects.create(user=self.user, reference_month='2026-01', weight=80)
+
+        for url, text in (('/fasting/history/', 'Editar'), ('/weight/', '80')):
+            self.client.get(url)
+            # Só a sessão: o fragmento em cache dispensa a página de registros.
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            self.assertContains(response, text)
+
+    def test_user_is_loaded_from_cache(self):
+        self.client.get('/dashboard/')
+
+        # Sessão + página do histórico; nenhum SELECT do usuário.
+        with self.assertNumQueries(2):
+            response = self.client.get('/fasting/history/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.wsgi_request.user, self.user)
+
+    def test_profile_change_invalidates_cached_user(self):
+        self.client.get('/dashboard/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.name = 'Novo Nome'
+            self.user.save()
+
+        response = self.client.get('/dashboard/')
+        self.assertEqual(response.wsgi_request.user.name, 'Novo Nome')
+
+    def test_password_change_logs_out_other_sessions(self):
+        self.client.get('/dashboard/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password('outrasenha123')
+            self.user.save()
+
+        response = self.client.get('/dashboard/')
+        self.assertRedirects(response, '/login/?next=/dashboard/')
+
+    def test_inactive_user_is_logged_out(self):
+        self.client.get('/dashboard/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save(update_fields=['is_active'])
+
+        response = self.client.get('/dashboard/')
+        self.assertEqual(response.status_code, 302)
+
+    def test_signed_cookie_sessions_skip_the_database(self):
+        with self.settings(SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies'):
+            client = Client()
+            client.login(email='test@example.com', password='testpass123')
+            client.get('/fasting/history/')
+
+            # Sessão no cookie, usuário e tabela no cache: nenhuma consulta.
+            with self.assertNumQueries(0):
+                response = client.get('/fasting/history/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_process_local_cache_reads_the_database(self):
+        self.client.get('/dashboard/')
+
+        with self.settings(CACHES=LOCAL_CACHE):
+            CustomUser.objects.filter(pk=self.user.pk).update(is_active=False)
+            response = self.client.get('/dashboard/')
+        self.assertEqual(response.status_code, 302)
+
+
+class WeightSeriesTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+        self.client = Client()
+        self.user = CustomUser.objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='Test User'
+        )
+        self.client.login(email='test@example.com', password='testpass123')
+        for month, weight in [('2025-11', 92.0), ('2026-01', 90.0), ('2025-12', 91.0), ('2026-02', 86.0)]:
+            WeightRecord.objects.create(user=self.user, reference_month=month, weight=weight)
+
+    def test_reference_date_follows_reference_month(self):
+        from datetime import date
+
+        record = WeightRecord.objects.get(user=self.user, reference_month='2026-01')
+        self.assertEqual(record.reference_date, date(2026, 1, 1))
+
+        record.reference_month = '2026-03'
+        record.save(update_fields=['reference_month'])
+        record.refresh_from_db()
+        self.assertEqual(record.reference_date, date(2026, 3, 1))
+
+    def test_invalid_month_is_rejected(self):
+        record = WeightRecord(user=self.user, reference_month='2026-13', weight=80)
+        with self.assertRaises(ValidationError):
+            record.full_clean()
+
+    def test_series_is_columnar_and_smoothed(self):
+        response = self.client.get('/api/v1/weights/series/', {'window': 2})
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['months'], ['2025-11', '2025-12', '2026-01', '2026-02'])
+        self.assertEqual(data['weights'], [92.0, 91.0, 90.0, 86.0])
+        self.assertEqual(data['moving_average'], [92.0, 91.5, 90.5, 88.0])
+        self.assertEqual(data['slope'], -1.9)
+        self.assertEqual(data['trend'], [92.6, 90.7, 88.8, 86.9])
+
+    def test_series_uses_a_single_query(self):
+        from core.analytics import weight_series
+
+        with self.assertNumQueries(1):
+            series = weight_series(self.user)
+        self.assertEqual(len(series['months']), 4)
+
+    def test_single_record_has_no_trend(self):
+        from core.analytics import weight_series
+
+        other = CustomUser.objects.create_user(email='other@example.com', password='testpass123', name='Other')
+        WeightRecord.objects.create(user=other, reference_month='2026-01', weight=70)
+
+        series = weight_series(other)
+        self.assertEqual(series['moving_average'], [70.0])
+        self.assertIsNone(series['trend'])
+        self.assertIsNone(series['slope'])
+
+    def test_weight_page_shows_changes_and_chart(self):
+        response = self.client.get('/weight/')
+
+        self.assertContains(response, 'id="weightChart"')
+        self.assertContains(response, '/api/v1/weights/series/')
+        changes = [weight.change for weight in response.context['weights']]
+        self.assertEqual(changes, [-4.0, -1.0, -1.0, None])
+
+
+class StaticAssetsTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = CustomUser.objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='Test User'
+        )
+        self.client.login(email='test@example.com', password='testpass123')
+
+    def test_assets_are_self_hosted(self):
+        response = self.client.get('/fasting/history/')
+
+        self.assertNotContains(response, 'cdn.jsdelivr.net')
+        self.assertContains(response, '/static/vendor/bootstrap/css/bootstrap.min.css')
+
+    def test_chart_js_only_on_chart_pages(self):
+        chart = '/static/vendor/chart.js/chart.umd.min.js'
+
+        self.assertContains(self.client.get('/dashboard/'), chart)
+        self.assertContains(self.client.get('/weight/'), chart)
+        self.assertNotContains(self.client.get('/fasting/history/'), chart)
+
+    def test_missing_manifest_falls_back_to_original_name(self):
+        from django.templatetags.static import static
+
+        self.assertEqual(static('vendor/chart.js/chart.umd.min.js'), '/static/vendor/chart.js/chart.umd.min.js')
+
+    def call_vendor_static(self, directory, body, pins):
+        import io
+        from unittest import mock
+        from django.core.management import call_command
+        from core.management.commands import vendor_static
+
+        assets = {path: (url, pins(path)) for path, (url, _) in vendor_static.VENDOR_ASSETS.items()}
+        stderr = io.StringIO()
+        with self.settings(STATICFILES_DIRS=[directory]), mock.patch.dict(vendor_static.VENDOR_ASSETS, assets):
+            with mock.patch('urllib.request.urlopen', lambda url, timeout: io.BytesIO(body)):
+                call_command('vendor_static', stdout=io.StringIO(), stderr=stderr)
+        return stderr.getvalue()
+
+    def test_vendor_static_downloads_and_strips_source_maps(self):
+        from pathlib import Path
+        from core.management.commands.vendor_static import VENDOR_ASSETS, sri_digest
+
+        body = b'body{}\n/*# sourceMappingURL=bootstrap.min.css.map */'
+        with tempfile.TemporaryDirectory() as directory:
+            warnings = self.call_vendor_static(directory, body, lambda path: sri_digest(body))
+
+            css = Path(directory, 'vendor', 'bootstrap', 'css', 'bootstrap.min.css')
+            self.assertEqual(css.read_bytes(), b'body{}')
+            files = [path for path in Path(directory, 'vendor').rglob('*') if path.is_file()]
+            self.assertEqual(len(files), len(VENDOR_ASSETS))
+            self.assertEqual(warnings, '')
+
+    def test_vendor_static_refuses_asset_with_wrong_hash(self):
+        from pathlib import Path
+        from django.core.management.base import CommandError
+        from core.management.commands.vendor_static import sri_digest
+
+        with tempfile.TemporaryDirectory() as directory:
+            with self.assertRaisesMessage(CommandError, 'não confere com o hash fixado'):
+                self.call_vendor_static(directory, b'alert(1)', lambda path: sri_digest(b'body{}'))
+
+            self.assertFalse(Path(directory, 'vendor').exists())
+
+    def test_vendor_static_warns_about_unpinned_asset(self):
+        from core.management.commands.vendor_static import sri_digest
+
+        with tempfile.TemporaryDirectory() as directory:
+            warnings = self.call_vendor_static(directory, b'body{}', lambda path: None)
+
+        self.assertIn(f'sem hash fixado em VENDOR_ASSETS; baixado com {sri_digest(b"body{}")}', warnings)
+
+    def test_vendor_assets_have_sri_pins(self):
+        from core.management.commands.vendor_static import VENDOR_ASSETS
+
+        for url, expected in VENDOR_ASSETS.values():
+            if expected is not None:
+                self.assertRegex(expected, r'^sha384-[A-Za-z0-9+/]{64}$', url)
+
+
+@override_settings(CACHES=SHARED_CACHE)
+class HtmlRenderingTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+        self.client = Client()
+        self.user = CustomUser.objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='Test User'
+        )
+        self.client.login(email='test@example.com', password='testpass123')
+        start = timezone.now() - timedelta(days=2)
+        self.fasting = FastingRecord.objects.create(
+            user=self.user, start_time=start, end_time=start + timedelta(hours=16), notes='primeiro'
+        )
+
+    def test_cached_template_loader_is_used(self):
+        from django.template import engines
+        from django.template.loaders.cached import Loader
+
+        self.assertIsInstance(engines['django'].engine.template_loaders[0], Loader)
+
+    def test_history_rows_are_cached_until_data_changes(self):
+        self.assertContains(self.client.get('/fasting/history/'), '16,0h')
+
+        # update() não dispara sinais: a versão não muda e o fragmento continua valendo.
+        FastingRecord.objects.filter(pk=self.fasting.pk).update(duration_hours=17.5)
+        self.assertContains(self.client.get('/fasting/history/'), '16,0h')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.fasting.refresh_from_db()
+            self.fasting.end_time = self.fasting.start_time + timedelta(hours=18)
+            self.fasting.save()
+        self.assertContains(self.client.get('/fasting/history/'), '18,0h')
+
+    def test_weight_table_is_cached_until_data_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            WeightRecord.objects.create(user=self.user, reference_month='2026-01', weight=80)
+        self.assertContains(self.client.get('/weight/'), '80,0 kg')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            WeightRecord.objects.create(user=self.user, reference_month='2026-02', weight=79)
+        self.assertContains(self.client.get('/weight/'), '79,0 kg')
+
+    def test_html_is_compressed_with_brotli_or_gzip(self):
+        import brotli
+        import gzip
+
+        response = self.client.get('/fasting/history/', HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertIn('16,0h'.encode(), brotli.decompress(response.content))
+
+        response = self.client.get('/fasting/history/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('16,0h'.encode(), gzip.decompress(response.content))
+
+        response = self.client.get('/fasting/history/')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_json_is_not_compressed(self):
+        response = self.client.get('/api/v1/fastings/', HTTP_ACCEPT_ENCODING='gzip, br')
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.json()['results'][0]['id'], self.fasting.pk)
+
+
+@override_settings(CACHES=SHARED_CACHE)
+class BackgroundJobTest(TestCase):
+    def setUp(self):
+        import tempfile
+        from django.core.cache import cache
+        cache.clear()
+
+        exports_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(exports_dir.cleanup)
+        storages_setting = self.settings(STORAGES={
+            'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+            'staticfiles': {'BACKEND': 'core.storage.StaticFilesStorage'},
+            'exports': {
+                'BACKEND': 'django.core.files.storage.FileSystemStorage',
+                'OPTIONS': {'location': exports_dir.name},
+            },
+        })
+        storages_setting.enable()
+        self.addCleanup(storages_setting.disable)
+
+        self.client = Client()
+        self.user = CustomUser.objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='Test User'
+        )
+        self.client.login(email='test@example.com', password='testpass123')
+        start = timezone.now() - timedelta(days=2)
+        FastingRecord.objects.create(user=self.user, start_time=start, end_time=start + timedelta(hours=16))
+
+    def register_task(self, name, func, max_attempts=3):
+        from core.jobs import TASKS, task
+
+        task(name, max_attempts)(func)
+        self.addCleanup(TASKS.pop, name)
+
+    def test_export_job_end_to_end(self):
+        from core.jobs import run_pending
+
+        response = self.client.post('/jobs/export/', {'format': 'csv'})
+        self.assertEqual(response.status_code, 202)
+        status_url = response.json()['status_url']
+        self.assertEqual(self.client.get(status_url).json()['status'], 'pending')
+
+        self.assertEqual(run_pending(), 1)
+
+        with self.assertNumQueries(2):
+            status = self.client.get(status_url).json()
+        self.assertEqual(status['status'], 'succeeded')
+
+        response = self.client.get(status['download_url'])
+        content = b''.join(response.streaming_content).decode()
+        self.assertTrue(content.startswith('id,start_time,end_time'))
+        self.assertEqual(len(content.strip().splitlines()), 2)
+
+    def test_jobs_are_private(self):
+        from core.jobs import enqueue
+
+        other = CustomUser.objects.create_user(email='other@example.com', password='testpass123', name='Other')
+        job = enqueue('export_fastings', user_id=other.pk)
+
+        self.assertEqual(self.client.get(f'/jobs/{job.pk}/').status_code, 404)
+        self.assertEqual(self.client.get(f'/jobs/{job.pk}/download/').status_code, 404)
+
+    def test_failed_job_is_retried_with_backoff(self):
+        from core.jobs import enqueue, run_pending
+        from core.models import Job
+
+        calls = []
+
+        def flaky(job):
+            calls.append(job.attempts)
+            if len(calls) < 2:
+                raise RuntimeError('temporário')
+            return {'ok': True}
+
+        self.register_task('flaky', flaky)
+        job = enqueue('flaky', user_id=self.user.pk)
+
+        run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.PENDING)
+        self.assertIn('RuntimeError: temporário', job.error)
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=20))
+
+        # Ainda no backoff: nada a executar.
+        self.assertEqual(run_pending(), 0)
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertEqual(job.result, {'ok': True})
+        self.assertEqual(calls, [1, 2])
+
+    def test_job_fails_after_max_attempts(self):
+        from core.jobs import enqueue, run_pending
+        from core.models import Job
+
+        def broken(job):
+            raise ValueError('sempre')
+
+        self.register_task('broken', broken, max_attempts=1)
+        job = enqueue('broken', user_id=self.user.pk)
+        run_pending()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(self.client.get(f'/jobs/{job.pk}/').json()['error'], 'ValueError: sempre')
+
+    def test_priority_and_per_user_limit(self):
+        from core.jobs import claim_next, enqueue
+
+        other = CustomUser.objects.create_user(email='other@example.com', password='testpass123', name='Other')
+        self.register_task('noop', lambda job: None)
+        low = enqueue('noop', user_id=self.user.pk)
+        high = enqueue('noop', user_id=self.user.pk, priority=10)
+        other_job = enqueue('noop', user_id=other.pk)
+
+        self.assertEqual(claim_next('w1', per_user_limit=1).pk, high.pk)
+        # O usuário já tem um job executando: o próximo é o de outro usuário.
+        self.assertEqual(claim_next('w2', per_user_limit=1).pk, other_job.pk)
+        self.assertIsNone(claim_next('w3', per_user_limit=1))
+        self.assertEqual(claim_next('w3', per_user_limit=2).pk, low.pk)
+
+    def test_unique_enqueue_reuses_pending_job(self):
+        from core.jobs import enqueue
+
+        first = enqueue('refresh_statistics', user_id=self.user.pk, unique=True)
+        second = enqueue('refresh_statistics', user_id=self.user.pk, unique=True)
+        self.assertEqual(first.pk, second.pk)
+
+    def test_statistics_refresh_can_move_to_background(self):
+        from core.jobs import run_pending
+        from core.models import Job, UserStatistics
+
+        with self.settings(STATISTICS_IN_BACKGROUND=True), self.captureOnCommitCallbacks(execute=True):
+            WeightRecord.objects.create(user=self.user, reference_month='2026-01', weight=80)
+
+        self.assertFalse(UserStatistics.objects.filter(user=self.user).exists())
+        self.assertEqual(Job.objects.filter(task='refresh_statistics', user=self.user).count(), 1)
+
+        run_pending()
+        self.assertEqual(UserStatistics.objects.get(user=self.user).latest_weight, 80)
+
+    def test_stale_running_jobs_are_requeued(self):
+        from core.jobs import enqueue, requeue_stale_jobs
+        from core.models import Job
+
+        job = enqueue('refresh_statistics', user_id=self.user.pk)
+        Job.objects.filter(pk=job.pk).update(status=Job.RUNNING, locked_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(requeue_stale_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.PENDING)
+
+    def test_stale_job_out_of_attempts_fails(self):
+        from core.jobs import enqueue, requeue_stale_jobs
+        from core.models import Job
+
+        job = enqueue('refresh_statistics', user_id=self.user.pk)
+        # O worker morreu na última tentativa: o job não volta para derrubar outro.
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.RUNNING, attempts=job.max_attempts, locked_at=timezone.now() - timedelta(hours=1)
+        )
+
+        self.assertEqual(requeue_stale_jobs(), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_export_enqueue_is_deduplicated(self):
+        first = self.client.post('/jobs/export/', {'format': 'csv'}).json()
+        second = self.client.post('/jobs/export/', {'format': 'csv'}).json()
+        other_format = self.client.post('/jobs/export/', {'format': 'ndjson'}).json()
+
+        self.assertEqual(first['id'], second['id'])
+        self.assertNotEqual(first['id'], other_format['id'])
+
+    def test_expired_exports_and_old_jobs_are_purged(self):
+        from django.core.files.storage import storages
+        from core.jobs import enqueue, housekeeping, run_pending
+        from core.models import Job
+
+        job = enqueue('export_fastings', user_id=self.user.pk)
+        run_pending()
+        job.refresh_from_db()
+        name = job.result['file']
+        self.assertTrue(storages['exports'].exists(name))
+
+        Job.objects.filter(pk=job.pk).update(finished_at=timezone.now() - timedelta(days=2))
+        status = self.client.get(f'/jobs/{job.pk}/').json()
+        self.assertNotIn('download_url', status)
+        self.assertEqual(self.client.get(f'/jobs/{job.pk}/download/').status_code, 410)
+
+        self.assertEqual(housekeeping(), {'requeued': 0, 'exports_removed': 1, 'jobs_deleted': 0})
+        self.assertFalse(storages['exports'].exists(name))
+
+        Job.objects.filter(pk=job.pk).update(finished_at=timezone.now() - timedelta(days=8))
+        self.assertEqual(housekeeping()['jobs_deleted'], 1)
+        self.assertFalse(Job.objects.filter(pk=job.pk).exists())
+
+
+class GunicornConfigTest(TestCase):
+    def load_config(self, **env):
+        import os
+        import runpy
+        from unittest import mock
+        from django.conf import settings
+
+        with mock.patch.dict(os.environ, env):
+            return runpy.run_path(str(settings.BASE_DIR / 'gunicorn.conf.py'))
+
+    def test_defaults_use_preloaded_gthread_workers(self):
+        import multiprocessing
+
+        config = self.load_config()
+        self.assertEqual(config['worker_class'], 'gthread')
+        self.assertEqual(config['wsgi_app'], 'fasting_life.wsgi:application')
+        self.assertEqual(config['workers'], multiprocessing.cpu_count() * 2 + 1)
+        self.assertEqual(config['threads'], 4)
+        self.assertTrue(config['preload_app'])
+        self.assertGreater(config['max_requests_jitter'], 0)
+        self.assertNotIn('config', config)
+
+    def test_uvicorn_worker_serves_asgi_app(self):
+        config = self.load_config(GUNICORN_WORKER_CLASS='uvicorn.workers.UvicornWorker', GUNICORN_WORKERS='2')
+        self.assertEqual(config['wsgi_app'], 'fasting_life.asgi:application')
+        self.assertEqual(config['workers'], 2)
+        self.assertEqual(config['threads'], 1)
+
+    def test_asgi_disables_persistent_connections(self):
+        import os
+        import subprocess
+        import sys
+        from django.conf import settings
+
+        code = 'import fasting_life.asgi; from django.conf import settings; print(settings.DATABASES["default"]["CONN_MAX_AGE"])'
+        result = subprocess.run(
+            [sys.executable, '-c', code], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+            env={**os.environ, 'DB_CONN_MAX_AGE': '60'},
+        )
+        self.assertEqual(result.stdout.strip(), '0')
+
+    def test_compare_rejects_unknown_profile(self):
+        from django.core.management import CommandError, call_command
+
+        with self.assertRaises(CommandError):
+            call_command('compare_gunicorn', email='a@b.c', password='x', profiles='sync,meinheld')
+
+
+def use_temporary_archive(test):
+    """Aponta o storage `archive` para um diretório temporário durante o teste."""
+    import tempfile
+
+    archive_dir = tempfile.TemporaryDirectory()
+    test.addCleanup(archive_dir.cleanup)
+    storages_setting = test.settings(STORAGES={
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'core.storage.StaticFilesStorage'},
+        'archive': {
+            'BACKEND': 'django.core.files.storage.FileSystemStorage',
+            'OPTIONS': {'location': archive_dir.name},
+        },
+    })
+    storages_setting.enable()
+    test.addCleanup(storages_setting.disable)
+
+
+class FastingArchiveTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        use_temporary_archive(self)
+
+        self.client = Client()
+        self.user = CustomUser.objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='Test User'
+        )
+        self.client.login(email='test@example.com', password='testpass123')
+
+        from core.archive import label_start
+
+        rows = []
+        for days in range(1, 4):
+            start = timezone.now() - timedelta(days=days)
+            rows.append(FastingRecord(user=self.user, start_time=start, end_time=start + timedelta(hours=16), duration_hours=16))
+        for day in range(5, 9):
+            start = label_start('2024-01') + timedelta(days=day, hours=20)
+            rows.append(FastingRecord(user=self.user, start_time=start, end_time=start + timedelta(hours=18), duration_hours=18))
+        FastingRecord.objects.bulk_create(rows)
+        self.expected = list(FastingRecord.objects.filter(user=self.user).order_by('-start_time', '-id').values_list('pk', flat=True))
+
+    def archive_january(self, expected_count=4):
+        from core.archive import label_start, mark_archived, write_archives
+
+        start, end = label_start('2024-01'), label_start('2024-02')
+        with self.captureOnCommitCallbacks(execute=True):
+            counts = write_archives(start, end, '2024-01')
+            # No PostgreSQL a partição é desanexada e removida; aqui basta apagar as linhas.
+            FastingRecord.objects.filter(start_time__gte=start, start_time__lt=end).delete()
+            mark_archived(list(counts), end)
+        self.assertEqual(counts, {self.user.pk: expected_count})
+        self.user.refresh_from_db()
+
+    def test_history_continues_into_archive(self):
+        self.archive_january()
+        self.assertEqual(FastingRecord.objects.filter(user=self.user).count(), 3)
+
+        response = self.client.get('/fasting/history/')
+        fastings = response.context['fastings']
+        self.assertEqual([fasting.pk for fasting in fastings], self.expected)
+        self.assertEqual([getattr(fasting, 'archived', False) for fasting in fastings], [False] * 3 + [True] * 4)
+        self.assertContains(response, 'Arquivado', count=4)
+        self.assertContains(response, '18,0h', count=4)
+
+    def test_history_pages_through_archive(self):
+        from core.archive import history_page
+
+        self.archive_january()
+        seen, cursor = [], None
+        while True:
+            page, cursor = history_page(self.user, cursor, 2)
+            seen.extend(fasting.pk for fasting in page)
+            if cursor is None:
+                break
+        self.assertEqual(seen, self.expected)
+
+    def test_export_includes_archived_rows(self):
+        import json
+
+        self.archive_january()
+
+        response = self.client.get('/fasting/export/?format=ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['id'] for row in rows], self.expected[::-1])
+        self.assertEqual(rows[0]['duration_hours'], 18)
+
+    def test_aggregates_keep_archived_rows(self):
+        from core.analytics import compute_user_statistics
+        from core.models import DailyFastingSummary
+        from core.streaks import build_tracker, get_streaks
+        from core.summaries import rebuild_daily_summaries
+
+        def summaries():
+            days = DailyFastingSummary.objects.filter(user=self.user).order_by('date')
+            return list(days.values_list('date', 'total_hours'))
+
+        rebuild_daily_summaries(self.user)
+        before = (build_tracker(self.user).summary(), compute_user_statistics(self.user), summaries())
+        self.assertEqual(before[0]['longest'], 3)
+
+        self.archive_january()
+        rebuild_daily_summaries(self.user)
+
+        self.assertEqual((get_streaks(self.user), compute_user_statistics(self.user), summaries()), before)
+
+    def test_hot_paths_read_archived_totals_not_files(self):
+        from unittest import mock
+        from core.analytics import compute_user_statistics
+        from core.archive import archived_totals
+        from core.models import ArchivedFastingTotals
+        from core.streaks import build_tracker
+        from core.summaries import rebuild_daily_summaries
+
+        rebuild_daily_summaries(self.user)
+        self.archive_january()
+        totals = ArchivedFastingTotals.objects.get(user=self.user)
+        self.assertEqual((totals.fasting_count, totals.total_hours), (4, 72.0))
+
+        start = timezone.now() - timedelta(days=6)
+        with mock.patch('core.archive._read') as read:
+            self.assertEqual(build_tracker(self.user).summary()['longest'], 3)
+            self.assertEqual(compute_user_statistics(self.user)['fasting_count'], 7)
+            FastingRecord.objects.create(user=self.user, start_time=start, end_time=start + timedelta(hours=16))
+        read.assert_not_called()
+
+        # Usuários arquivados antes da tabela de totais: a linha é montada uma vez a partir dos arquivos.
+        totals.delete()
+        rebuilt = archived_totals(self.user)
+        self.assertEqual((rebuilt.fasting_count, rebuilt.total_hours), (4, 72.0))
+        self.assertEqual(rebuilt.latest_fasting['id'], self.expected[3])
+
+    def test_archived_period_is_read_only(self):
+        from core.archive import label_start
+        from core.importers import import_fastings
+
+        # Jejum do fim de janeiro que termina já em fevereiro, fora do período arquivado.
+        crossing = label_start('2024-02') - timedelta(hours=4)
+        FastingRecord.objects.create(user=self.user, start_time=crossing, end_time=crossing + timedelta(hours=16))
+        self.archive_january(expected_count=5)
+
+        january = label_start('2024-01')
+        with self.assertRaisesMessage(ValidationError, 'arquivados'):
+            FastingRecord.objects.create(user=self.user, start_time=january, end_time=january + timedelta(hours=16))
+        with self.assertRaisesMessage(ValidationError, 'se sobrepõe'):
+            FastingRecord.objects.create(
+                user=self.user, start_time=crossing + timedelta(hours=6), end_time=crossing + timedelta(hours=20)
+            )
+
+        rows = [
+            (1, {'start_time': '2024-01-20T20:00', 'end_time': '2024-01-21T12:00'}),
+            (2, {'start_time': '2024-02-01T08:00', 'end_time': '2024-02-01T18:00'}),
+            (3, {'start_time': '2024-02-03T08:00', 'end_time': '2024-02-03T18:00'}),
+        ]
+        result = import_fastings(self.user, rows)
+        self.assertEqual(result.created, 1)
+        self.assertIn('arquivados', result.errors[0]['message'])
+        self.assertIn('se sobrepõe', result.errors[1]['message'])
+
+    def test_users_without_archive_never_read_it(self):
+        from unittest import mock
+
+        with mock.patch('core.archive._read') as read:
+            self.client.get('/fasting/history/')
+            b''.join(self.client.get('/fasting/export/?format=csv').streaming_content)
+        read.assert_not_called()
+
+    def test_partition_periods(self):
+        from core.archive import label_start, period_label
+        from core.partitioning import next_period, period_start
+
+        december = label_start('2025-12')
+        self.assertEqual(period_label(next_period(december, 'month'), 'month'), '2026-01')
+        self.assertEqual(period_label(next_period(december, 'year'), 'year'), '2026')
+        self.assertEqual(period_start(december + timedelta(days=20), 'month'), december)
+        self.assertEqual(period_start(december, 'year'), label_start('2025'))
+
+    def test_partition_command_requires_postgresql(self):
+        from django.core.management import CommandError, call_command
+        from django.db import connection
+
+        if connection.vendor == 'postgresql':
+            self.skipTest('O comando só recusa bancos que não são PostgreSQL.')
+        with self.assertRaisesMessage(CommandError, 'PostgreSQL'):
+            call_command('partition_fastings', 'status')
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Particionamento exige PostgreSQL.')
+class FastingPartitionTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from core.archive import label_start
+        cache.clear()
+        use_temporary_archive(self)
+
+        self.user = CustomUser.objects.create_user(email='test@example.com', password='testpass123', name='Test User')
+        rows = []
+        for label in ('2024-01', '2024-02'):
+            for day in range(3):
+                start = label_start(label) + timedelta(days=day, hours=20)
+                rows.append(FastingRecord(user=self.user, start_time=start, end_time=start + timedelta(hours=16), duration_hours=16))
+        start = timezone.now() - timedelta(days=2)
+        rows.append(FastingRecord(user=self.user, start_time=start, end_time=start + timedelta(hours=16), duration_hours=16))
+        FastingRecord.objects.bulk_create(rows)
+
+    def convert(self, ahead=1):
+        from core.partitioning import convert_to_partitioned
+
+        copied, created = convert_to_partitioned('month', ahead)
+        self.assertEqual(copied, 7)
+        return created
+
+    def rows_in(self, table):
+        from core.partitioning import qn
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM {qn(table)}')
+            return cursor.fetchone()[0]
+
+    def test_convert_copies_rows_into_monthly_partitions(self):
+        from core.partitioning import DEFAULT_PARTITION, is_partitioned, list_partitions, partition_name
+
+        self.assertFalse(is_partitioned())
+        created = self.convert()
+
+        self.assertTrue(is_partitioned())
+        labels = [partition['label'] for partition in list_partitions()]
+        self.assertEqual(labels[:2], ['2024-01', '2024-02'])
+        self.assertEqual(created, [partition_name(label) for label in labels])
+        self.assertEqual(self.rows_in(partition_name('2024-01')), 3)
+        self.assertEqual(self.rows_in(DEFAULT_PARTITION), 0)
+        self.assertEqual(FastingRecord.objects.filter(user=self.user).count(), 7)
+
+        # A sequência nova continua do maior id copiado.
+        latest_pk = FastingRecord.objects.order_by('-pk').values_list('pk', flat=True)[0]
+        self.assertGreater(FastingRecord.start_now(self.user).pk, latest_pk)
+
+    def test_create_moves_rows_out_of_default(self):
+        from core.archive import period_label
+        from core.partitioning import DEFAULT_PARTITION, ensure_partitions, next_period, partition_name, period_start
+
+        self.convert(ahead=1)
+        later = period_start(timezone.now(), 'month')
+        for _ in range(4):
+            later = next_period(later, 'month')
+        FastingRecord.objects.bulk_create([
+            FastingRecord(user=self.user, start_time=later, end_time=later + timedelta(hours=16), duration_hours=16)
+        ])
+        self.assertEqual(self.rows_in(DEFAULT_PARTITION), 1)
+
+        created = ensure_partitions('month', 4)
+
+        name = partition_name(period_label(later, 'month'))
+        self.assertIn(name, created)
+        self.assertEqual(self.rows_in(DEFAULT_PARTITION), 0)
+        self.assertEqual(self.rows_in(name), 1)
+
+    def test_archive_detaches_old_partitions(self):
+        from core.archive import history_page, label_start
+        from core.models import ArchivedFastingTotals
+        from core.partitioning import archive_partitions, list_partitions
+
+        self.convert()
+        other = CustomUser.objects.create_user(email='other@example.com', password='testpass123', name='Other')
+        # Jejum em andamento que começou em fevereiro de 2024: a partição dele fica no banco.
+        FastingRecord.objects.bulk_create([FastingRecord(user=other, start_time=label_start('2024-02') + timedelta(days=10))])
+
+        archived, skipped = archive_partitions(label_start('2024-03'))
+
+        self.assertEqual((archived, skipped), ([('2024-01', 3)], ['2024-02']))
+        self.assertNotIn('2024-01', [partition['label'] for partition in list_partitions()])
+        self.assertEqual(FastingRecord.objects.filter(user=self.user).count(), 4)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.archived_until, label_start('2024-02'))
+        self.assertEqual(ArchivedFastingTotals.objects.get(user=self.user).fasting_count, 3)
+        self.assertEqual(len(history_page(self.user, None, 20)[0]), 7)
+
+    def test_archive_refuses_recent_partitions(self):
+        from core.partitioning import archive_partitions, period_start
+
+        self.convert()
+        with self.assertRaisesMessage(ValueError, 'mais de um ano'):
+            archive_partitions(period_start(timezone.now(), 'month'))
+
+    def test_active_fasting_in_another_partition_blocks_start(self):
+        from core.archive import label_start
+        from core.models import FastingConflict
+
+        self.convert()
+        # O índice único de jejum ativo é de cada partição e não enxerga este jejum de fevereiro de 2024.
+        FastingRecord.objects.bulk_create([
+            FastingRecord(user=self.user, start_time=label_start('2024-02') + timedelta(days=10))
+        ])
+        with self.assertRaisesMessage(FastingConflict, 'Já existe um jejum ativo'):
+            FastingRecord.start_now(self.user)
+
+    def test_active_fasting_lock_serializes_starts(self):
+        from django.db import OperationalError
+        from core.archive import label_start
+        from core.models import ACTIVE_FASTING_LOCK
+
+        self.convert()
+        old_start = label_start('2024-02') + timedelta(days=10)
+        # Com o lock do usuário preso por outra conexão, os dois caminhos de início esperam por ele.
+        other = connection.copy()
+        self.addCleanup(other.close)
+        other.set_autocommit(False)
+        with other.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s, %s)', [ACTIVE_FASTING_LOCK, self.user.pk])
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL lock_timeout = '200ms'")
+        with self.assertRaisesMessage(OperationalError, 'lock timeout'):
+            FastingRecord.start_now(self.user)
+        with self.assertRaisesMessage(OperationalError, 'lock timeout'):
+            FastingRecord.objects.create(user=self.user, start_time=old_start)
+
+        other.rollback()
+        self.assertIsNotNone(FastingRecord.start_now(self.user).pk)
+
+
+class SharedCacheCheckTest(TestCase):
+    LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    REDIS = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://localhost:6379/1'}}
+
+    def test_local_cache_is_never_shared(self):
+        from core.cache import cache_is_shared
+        from core.checks import shared_cache_check
+
+        # Mesmo com um processo web, comandos e o run_workers gravam em outros processos.
+        with self.settings(CACHES=self.LOCMEM, WEB_CONCURRENCY=1):
+            self.assertFalse(cache_is_shared())
+            self.assertEqual(shared_cache_check(None), [])
+
+    def test_local_cache_with_several_workers_warns(self):
+        from core.cache import cache_is_shared
+        from core.checks import shared_cache_check
+
+        with self.settings(CACHES=self.LOCMEM, WEB_CONCURRENCY=3):
+            self.assertFalse(cache_is_shared())
+            self.assertEqual([warning.id for warning in shared_cache_check(None)], ['core.W001'])
+        with self.settings(CACHES=self.REDIS, WEB_CONCURRENCY=3):
+            self.assertTrue(cache_is_shared())
+
+    def test_gunicorn_config_exports_worker_count(self):
+        import os
+        import runpy
+        from unittest import mock
+        from django.conf import settings
+
+        with mock.patch.dict(os.environ, {'GUNICORN_WORKERS': '5'}):
+            runpy.run_path(str(settings.BASE_DIR / 'gunicorn.conf.py'))
+            self.assertEqual(os.environ['WEB_CONCURRENCY'], '5')
@@ -1,12 +1,48 @@
+import csv
+import heapq
+import itertools
+import json
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.files.storage import storages
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, HttpResponseGone,
+    HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse,
+)
+from django.urls import reverse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils import timezone
-from django.db.models import Q, Avg, Count
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+from django.db.models import Q, Avg, Count, Sum
+from django.db.models.functions import TruncDate
 from datetime import datetime, timedelta
-from .models import CustomUser, FastingRecord, WeightRecord
-from .forms import CustomUserCreationForm, CustomAuthenticationForm, FastingRecordForm, WeightRecordForm
+from .analytics import WINDOWS, get_user_statistics
+from .archive import archived_values, history_page
+from .cache import fragment_cache_context, get_dashboard_context
+from .jobs import enqueue, export_expires_at
+from .models import CustomUser, FastingConflict, FastingRecord, Job, WeightRecord
+from .summaries import daily_hours, local_midnight
+from .forms import CustomUserCreationForm, CustomAuthenticationForm, FastingRecordForm, WeightRecordForm, FastingImportForm
+from .importers import import_fastings, read_rows
+from .live import event_stream
+from .middleware import render_prometheus
+from .streaks import get_streaks
+
+
+HISTORY_PAGE_SIZE = 50
+
+CHART_RANGES = (7, 30, 90, 365)
+
+EXPORT_FIELDS = [
+    'id', 'start_time', 'end_time', 'duration_hours', 'fasting_type',
+    'energy_level', 'focus_level', 'mood_level', 'notes',
+]
 
 
 def register_view(request):
@@ -52,110 +88,270 @@ def logout_view(request):
     return redirect('login')
 
 
-@login_required
-def dashboard_view(request):
-    import json
-
-    active_fasting = FastingRecord.objects.filter(user=request.user, end_time__isnull=True).first()
-
+def recent_fastings(user):
     seven_days_ago = timezone.now() - timedelta(days=7)
-    recent_fastings = FastingRecord.objects.filter(
-        user=request.user,
+    return FastingRecord.objects.filter(
+        user=user,
         start_time__gte=seven_days_ago,
         end_time__isnull=False
     )
 
-    avg_duration = recent_fastings.aggregate(Avg('duration_hours'))['duration_hours__avg'] or 0
-
-    goal_hours = request.user.fasting_goal_hours
-    days_above_goal = recent_fastings.filter(duration_hours__gte=goal_hours).count()
 
-    streak = calculate_streak(request.user)
-
-    chart_data = []
-    for i in range(6, -1, -1):
-        day = timezone.now() - timedelta(days=i)
-        day_fastings = FastingRecord.objects.filter(
-            user=request.user,
-            start_time__date=day.date(),
-            end_time__isnull=False
-        )
-        total_hours = sum([f.duration_hours for f in day_fastings])
-        chart_data.append({
-            'date': day.strftime('%d/%m'),
-            'hours': round(total_hours, 2)
-        })
+def make_dashboard_context(user, chart_days, active_fasting, avg_duration, days_above_goal, streak, daily):
+    chart_data = [{'date': day.strftime('%d/%m'), 'hours': round(hours, 2)} for day, hours in daily]
 
-    context = {
+    return {
         'active_fasting': active_fasting,
-        'avg_duration': round(avg_duration, 2),
+        'avg_duration': round(avg_duration or 0, 2),
         'days_above_goal': days_above_goal,
         'streak': streak,
-        'goal_hours': goal_hours,
+        'goal_hours': user.fasting_goal_hours,
         'chart_data': json.dumps(chart_data),
+        'chart_days': chart_days,
+        'chart_ranges': CHART_RANGES,
     }
 
+
+def chart_period(chart_days):
+    today = timezone.localdate()
+    return today - timedelta(days=chart_days - 1), today
+
+
+def parse_chart_days(request):
+    try:
+        chart_days = int(request.GET.get('range', CHART_RANGES[0]))
+    except ValueError:
+        chart_days = CHART_RANGES[0]
+    return chart_days if chart_days in CHART_RANGES else CHART_RANGES[0]
+
+
+def build_dashboard_context(user, chart_days=CHART_RANGES[0]):
+    recent = recent_fastings(user)
+
+    return make_dashboard_context(
+        user,
+        chart_days,
+        active_fasting=FastingRecord.objects.filter(user=user, end_time__isnull=True).first(),
+        avg_duration=recent.aggregate(Avg('duration_hours'))['duration_hours__avg'],
+        days_above_goal=recent.filter(duration_hours__gte=user.fasting_goal_hours).count(),
+        streak=calculate_streak(user),
+        daily=daily_hours(user, *chart_period(chart_days)),
+    )
+
+
+@login_required
+def dashboard_view(request):
+    context = get_dashboard_context(
+        request.user, build_dashboard_context, parse_chart_days(request), refresh='fresh' in request.GET
+    )
     return render(request, 'dashboard/dashboard.html', context)
 
 
 @login_required
 def start_fasting_view(request):
     if request.method == 'POST':
-        active_fasting = FastingRecord.objects.filter(user=request.user, end_time__isnull=True).first()
-        if active_fasting:
-            messages.error(request, 'Você já tem um jejum ativo. Encerre-o antes de iniciar um novo.')
-            return redirect('dashboard')
-
         try:
-            fasting = FastingRecord.objects.create(
-                user=request.user,
-                start_time=timezone.now(),
-                fasting_type='intermittent'
-            )
+            FastingRecord.start_now(request.user)
             messages.success(request, 'Jejum iniciado com sucesso!')
+        except FastingConflict as e:
+            messages.error(request, e.messages[0])
         except Exception as e:
             messages.error(request, f'Erro ao iniciar jejum: {str(e)}')
 
     return redirect('dashboard')
 
 
-@login_required
-def end_fasting_view(request):
-    active_fasting = FastingRecord.objects.filter(user=request.user, end_time__isnull=True).first()
+def end_fasting_fields(data):
+    fields = {name: int(data[name]) for name in ('energy_level', 'focus_level', 'mood_level') if data.get(name)}
+    fields['notes'] = data.get('notes', '')
+    return fields
 
-    if not active_fasting:
-        messages.error(request, 'Não há jejum ativo para encerrar.')
-        return redirect('dashboard')
 
+@login_required
+def end_fasting_view(request):
     if request.method == 'POST':
-        energy_level = request.POST.get('energy_level')
-        focus_level = request.POST.get('focus_level')
-        mood_level = request.POST.get('mood_level')
-        notes = request.POST.get('notes', '')
-
         try:
-            active_fasting.end_time = timezone.now()
-            if energy_level:
-                active_fasting.energy_level = int(energy_level)
-            if focus_level:
-                active_fasting.focus_level = int(focus_level)
-            if mood_level:
-                active_fasting.mood_level = int(mood_level)
-            if notes:
-                active_fasting.notes = notes
-            active_fasting.save()
-            messages.success(request, f'Jejum encerrado! Duração: {active_fasting.duration_hours:.2f} horas')
+            fasting = FastingRecord.end_active(request.user, **end_fasting_fields(request.POST))
+            messages.success(request, f'Jejum encerrado! Duração: {fasting.duration_hours:.2f} horas')
+            return redirect('dashboard')
+        except FastingConflict as e:
+            messages.error(request, e.messages[0])
             return redirect('dashboard')
         except Exception as e:
             messages.error(request, f'Erro ao encerrar jejum: {str(e)}')
 
+    active_fasting = FastingRecord.objects.filter(user=request.user, end_time__isnull=True).first()
+    if not active_fasting:
+        messages.error(request, 'Não há jejum ativo para encerrar.')
+        return redirect('dashboard')
+
     return render(request, 'fasting/end_fasting.html', {'active_fasting': active_fasting})
 
 
+async def live_updates_view(request):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponse(status=401)
+
+    if not isinstance(request, ASGIRequest):
+        # Sob WSGI o fluxo infinito prenderia um worker; 204 faz o EventSource parar de reconectar.
+        return HttpResponse(status=204)
+
+    response = StreamingHttpResponse(event_stream(user), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @login_required
 def history_view(request):
-    fastings = FastingRecord.objects.filter(user=request.user, end_time__isnull=False).order_by('-start_time')
-    return render(request, 'fasting/history.html', {'fastings': fastings})
+    return render(request, 'fasting/history.html', history_context(request))
+
+
+def history_context(request):
+    """Contexto do histórico; a página só é buscada se o template renderizar a tabela (fora do cache)."""
+    cursor = request.GET.get('cursor')
+    page = SimpleLazyObject(lambda: history_page(request.user, cursor, HISTORY_PAGE_SIZE))
+    return {
+        'fastings': SimpleLazyObject(lambda: page[0]),
+        'next_cursor': SimpleLazyObject(lambda: page[1]),
+        'is_first_page': not cursor,
+        **fragment_cache_context(request.user.pk),
+    }
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def _export_rows(user):
+    rows = (
+        dict(zip(EXPORT_FIELDS, row))
+        for row in FastingRecord.objects.filter(user=user)
+        .order_by('start_time', 'id')
+        .values_list(*EXPORT_FIELDS)
+        .iterator(chunk_size=2000)
+    )
+    if user.archived_until is not None:
+        rows = heapq.merge(archived_values(user.pk, ascending=True), rows, key=itemgetter('start_time', 'id'))
+    for values in rows:
+        values = {field: values[field] for field in EXPORT_FIELDS}
+        for field in ('start_time', 'end_time'):
+            if values[field]:
+                values[field] = timezone.localtime(values[field]).isoformat()
+        yield values
+
+
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def export_lines(user, export_format):
+    """Linhas do arquivo de exportação, geradas sob demanda (usado pelo streaming e pelo job em segundo plano)."""
+    if export_format == 'ndjson':
+        return (json.dumps(values, ensure_ascii=False) + '\n' for values in _export_rows(user))
+    writer = csv.writer(Echo())
+    return itertools.chain(
+        [writer.writerow(EXPORT_FIELDS)],
+        (writer.writerow([values[field] for field in EXPORT_FIELDS]) for values in _export_rows(user)),
+    )
+
+
+@login_required
+def export_fastings_view(request):
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_CONTENT_TYPES:
+        return HttpResponseBadRequest('Formato inválido. Use csv ou ndjson.')
+
+    response = StreamingHttpResponse(
+        export_lines(request.user, export_format), content_type=EXPORT_CONTENT_TYPES[export_format]
+    )
+    response['Content-Disposition'] = f'attachment; filename="jejuns.{export_format}"'
+    return response
+
+
+def job_status(job):
+    status = {
+        'id': job.pk,
+        'task': job.task,
+        'status': job.status,
+        'attempts': job.attempts,
+        'created_at': job.created_at.isoformat(),
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'status_url': reverse('job_status', args=[job.pk]),
+    }
+    if job.status == Job.FAILED:
+        status['error'] = job.error.strip().splitlines()[-1] if job.error else ''
+    if job.status == Job.SUCCEEDED and job.task == 'export_fastings':
+        expires_at = export_expires_at(job)
+        status['expires_at'] = expires_at.isoformat()
+        if expires_at > timezone.now():
+            status['download_url'] = reverse('job_download', args=[job.pk])
+    return status
+
+
+@login_required
+def enqueue_export_view(request):
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+
+    export_format = request.POST.get('format', 'csv')
+    if export_format not in EXPORT_CONTENT_TYPES:
+        return HttpResponseBadRequest('Formato inválido. Use csv ou ndjson.')
+
+    # Cliques repetidos reaproveitam a exportação ainda na fila.
+    job = enqueue(
+        'export_fastings', user_id=request.user.pk, payload={'format': export_format}, priority=10, unique=True
+    )
+    return JsonResponse(job_status(job), status=202)
+
+
+@login_required
+def job_status_view(request, pk):
+    job = get_object_or_404(Job.objects.defer('payload', 'result'), pk=pk, user=request.user)
+    return JsonResponse(job_status(job))
+
+
+@login_required
+def job_download_view(request, pk):
+    job = get_object_or_404(Job, pk=pk, user=request.user, task='export_fastings', status=Job.SUCCEEDED)
+    if export_expires_at(job) <= timezone.now() or 'file' not in job.result:
+        return HttpResponseGone('Exportação expirada. Gere o arquivo novamente.')
+    export_format = job.result['format']
+    return FileResponse(
+        storages['exports'].open(job.result['file']),
+        as_attachment=True,
+        filename=f'jejuns.{export_format}',
+        content_type=EXPORT_CONTENT_TYPES[export_format],
+    )
+
+
+@login_required
+def import_fastings_view(request):
+    result = None
+
+    if request.method == 'POST':
+        form = FastingImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            try:
+                result = import_fastings(
+                    request.user,
+                    read_rows(form.cleaned_data['file'].file, form.cleaned_data['format']),
+                )
+            except ValueError as e:
+                messages.error(request, f'Erro ao ler o arquivo: {str(e)}')
+            else:
+                if result.created:
+                    messages.success(request, f'{result.created} jejum(ns) importado(s) com sucesso!')
+                if result.errors:
+                    messages.warning(request, f'{len(result.errors)} linha(s) não foram importadas.')
+    else:
+        form = FastingImportForm()
+
+    return render(request, 'fasting/import.html', {'form': form, 'result': result})
 
 
 @login_required
@@ -194,31 +390,82 @@ def weight_view(request):
         current_month = timezone.now().strftime('%Y-%m')
         form = WeightRecordForm(initial={'reference_month': current_month})
 
-    weights = WeightRecord.objects.filter(user=request.user).order_by('-reference_month')
-    return render(request, 'weight/weight.html', {'form': form, 'weights': weights})
+    context = {
+        'form': form,
+        'weights': SimpleLazyObject(lambda: weights_with_changes(request.user)),
+        **fragment_cache_context(request.user.pk),
+    }
+    return render(request, 'weight/weight.html', context)
 
 
-def calculate_streak(user):
-    today = timezone.now().date()
-    streak = 0
-    current_date = today
+def weights_with_changes(user):
+    weights = list(WeightRecord.objects.filter(user=user).order_by('-reference_date'))
+    for current, previous in zip(weights, weights[1:] + [None]):
+        current.change = round(current.weight - previous.weight, 1) if previous else None
+    return weights
 
-    while True:
-        day_fastings = FastingRecord.objects.filter(
+
+@login_required
+def statistics_view(request):
+    stats = get_user_statistics(request.user)
+    windows = [
+        (days, getattr(stats, f'avg_hours_{days}'), getattr(stats, f'goal_rate_{days}'))
+        for days in WINDOWS
+    ]
+    streaks = get_streaks(request.user)
+    longest_runs = sorted(streaks['runs'], key=lambda run: run['days'], reverse=True)[:5]
+    return render(request, 'stats/statistics.html', {
+        'stats': stats,
+        'windows': windows,
+        'current_streak': streaks['current'],
+        'longest_runs': longest_runs,
+    })
+
+
+def metrics_view(request):
+    if not settings.PERF_INSTRUMENTATION:
+        raise Http404
+
+    token = settings.PERF_METRICS_TOKEN
+    authorization = request.headers.get('Authorization', '')
+    if not (request.user.is_staff or (token and constant_time_compare(authorization, f'Bearer {token}'))):
+        return HttpResponseForbidden()
+
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def streak_totals(user, today):
+    window_start = today - timedelta(days=365)
+    return (
+        FastingRecord.objects.filter(
             user=user,
-            start_time__date=current_date,
+            start_time__gte=local_midnight(window_start),
+            start_time__lt=local_midnight(today + timedelta(days=1)),
             end_time__isnull=False
         )
+        .annotate(day=TruncDate('start_time'))
+        .order_by()
+        .values('day')
+        .annotate(total_hours=Sum('duration_hours'))
+        .values_list('day', 'total_hours')
+    )
 
-        total_hours = sum([f.duration_hours for f in day_fastings])
 
-        if total_hours >= user.fasting_goal_hours:
+def count_streak(daily_totals, today, goal_hours):
+    window_start = today - timedelta(days=365)
+    streak = 0
+    current_date = today
+
+    while current_date >= window_start:
+        if (daily_totals.get(current_date) or 0) >= goal_hours:
             streak += 1
             current_date -= timedelta(days=1)
         else:
             break
 
-        if streak > 365:
-            break
-
     return streak
+
+
+def calculate_streak(user):
+    today = timezone.now().date()
+    return count_streak(dict(streak_totals(user, today)), today, user.fasting_goal_hours)
@@ -3,6 +3,18 @@ ASGI config for fasting_life project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Modo ASGI (necessário para as atualizações ao vivo em /fasting/live/):
+
+    ASYNC_VIEWS=True gunicorn -k uvicorn.workers.UvicornWorker --workers 3 \
+        --bind 0.0.0.0:4000 fasting_life.asgi:application
+
+Com ASYNC_VIEWS=True o dashboard, início/fim de jejum e histórico usam as views de
+core/async_views.py. Veja a comparação de carga em DOCKER.md.
+
+Sob ASGI as conexões persistentes ficam desligadas (DB_CONN_MAX_AGE=0), como recomenda a
+documentação do Django: o código síncrono roda em threads diferentes a cada requisição e uma
+conexão aberta em uma delas nunca seria reaproveitada nem fechada por close_old_connections.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
@@ -12,5 +24,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'fasting_life.settings')
+os.environ['DB_CONN_MAX_AGE'] = '0'
 
 application = get_asgi_application()
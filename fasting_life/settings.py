@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 
 from pathlib import Path
 import os
+import warnings
 from decouple import config, Csv
 import dj_database_url
 
@@ -47,7 +48,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -58,6 +62,8 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'fasting_life.urls'
 
+# Sem 'loaders' explícito o Django 5 já envolve filesystem/app_directories no cached.Loader (com recarga
+# automática no runserver), então cada template é compilado uma vez por processo.
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -83,9 +89,102 @@ WSGI_APPLICATION = 'fasting_life.wsgi.application'
 DATABASE_URL = config('DATABASE_URL', default=f'sqlite:///{BASE_DIR / "db.sqlite3"}')
 
 DATABASES = {
-    'default': dj_database_url.parse(DATABASE_URL)
+    'default': dj_database_url.parse(
+        DATABASE_URL,
+        conn_max_age=config('DB_CONN_MAX_AGE', default=60, cast=int),
+        conn_health_checks=config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
+    )
 }
 
+# O índice de histórico é "covering" (INCLUDE) no PostgreSQL; no SQLite as colunas extras são ignoradas.
+SILENCED_SYSTEM_CHECKS = ['models.W040']
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# Ex.: django.core.cache.backends.filebased.FileBasedCache (LOCATION=/var/tmp/fasting_cache)
+#      django.core.cache.backends.redis.RedisCache (LOCATION=redis://redis:6379/1, requer o pacote redis)
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='fasting-life'),
+    }
+}
+
+# Processos do servidor web; o gunicorn.conf.py exporta o número de workers. Com LocMemCache uma invalidação
+# não alcança os outros processos (workers, comandos, run_workers): os caches por usuário ficam desligados
+# (core.cache) e, com mais de um worker, o check core.W001 avisa.
+WEB_CONCURRENCY = config('WEB_CONCURRENCY', default=1, cast=int)
+
+DASHBOARD_CACHE_TIMEOUT = config('DASHBOARD_CACHE_TIMEOUT', default=300, cast=int)
+# Blocos {% cache %} das tabelas de histórico e peso; a chave já muda quando os dados do usuário mudam.
+FRAGMENT_CACHE_TIMEOUT = config('FRAGMENT_CACHE_TIMEOUT', default=600, cast=int)
+
+
+# Sessões e autenticação
+# https://docs.djangoproject.com/en/5.0/topics/http/sessions/#configuring-the-session-engine
+# Ex.: django.contrib.sessions.backends.cached_db (lê do cache e grava também no banco)
+#      django.contrib.sessions.backends.signed_cookies (nenhuma consulta; logout não invalida cópias do cookie)
+
+SESSION_ENGINE = config('SESSION_ENGINE', default='django.contrib.sessions.backends.db')
+
+# O usuário da sessão vem do cache; ModelBackend continua listado para aceitar sessões criadas antes.
+AUTHENTICATION_BACKENDS = [
+    'core.backends.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+AUTH_USER_CACHE_TIMEOUT = config('AUTH_USER_CACHE_TIMEOUT', default=300, cast=int)
+
+
+# Instrumentação de desempenho (Server-Timing, /metrics/ e orçamento de consultas por view)
+
+PERF_INSTRUMENTATION = config('PERF_INSTRUMENTATION', default=False, cast=bool)
+PERF_METRICS_TOKEN = config('PERF_METRICS_TOKEN', default='')
+PERF_DEFAULT_QUERY_BUDGET = config('PERF_DEFAULT_QUERY_BUDGET', default=10, cast=int)
+PERF_QUERY_BUDGETS = {
+    'dashboard': 10,
+    'history': 5,
+    'weight': 5,
+    'job_status': 2,
+}
+
+
+# Atualizações ao vivo do dashboard (Server-Sent Events, apenas sob ASGI)
+
+LIVE_UPDATES_BACKEND = config('LIVE_UPDATES_BACKEND', default='core.live.InProcessBroadcaster')
+
+# Views assíncronas do dashboard e do jejum (use com o servidor ASGI/uvicorn)
+
+ASYNC_VIEWS = config('ASYNC_VIEWS', default=False, cast=bool)
+
+
+# Tarefas em segundo plano (tabela core.Job + `python manage.py run_workers`)
+
+JOBS_PER_USER_LIMIT = config('JOBS_PER_USER_LIMIT', default=1, cast=int)
+JOBS_RETRY_BACKOFF = config('JOBS_RETRY_BACKOFF', default=30, cast=int)
+JOBS_MAX_BACKOFF = config('JOBS_MAX_BACKOFF', default=3600, cast=int)
+JOBS_STALE_AFTER = config('JOBS_STALE_AFTER', default=900, cast=int)
+# Arquivos de exportação podem ser baixados por JOBS_EXPORT_TTL segundos; jobs encerrados somem após JOBS_RETENTION.
+JOBS_EXPORT_TTL = config('JOBS_EXPORT_TTL', default=60 * 60 * 24, cast=int)
+JOBS_RETENTION = config('JOBS_RETENTION', default=60 * 60 * 24 * 7, cast=int)
+JOBS_HOUSEKEEPING_INTERVAL = config('JOBS_HOUSEKEEPING_INTERVAL', default=300, cast=int)
+# Com um worker rodando, o recálculo das estatísticas sai da requisição e vira job.
+STATISTICS_IN_BACKGROUND = config('STATISTICS_IN_BACKGROUND', default=False, cast=bool)
+
+
+# Particionamento dos jejuns (só PostgreSQL, `python manage.py partition_fastings`) e arquivo frio
+
+FASTING_PARTITION_INTERVAL = config('FASTING_PARTITION_INTERVAL', default='month')  # month ou year
+FASTING_PARTITIONS_AHEAD = config('FASTING_PARTITIONS_AHEAD', default=3, cast=int)
+FASTING_ARCHIVE_AFTER_MONTHS = config('FASTING_ARCHIVE_AFTER_MONTHS', default=24, cast=int)
+
+
+# Compressão das respostas HTML (brotli ou gzip, conforme o Accept-Encoding)
+
+RESPONSE_COMPRESSION = config('RESPONSE_COMPRESSION', default=True, cast=bool)
+BROTLI_QUALITY = config('BROTLI_QUALITY', default=5, cast=int)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -125,6 +224,30 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# Arquivos estáticos servidos pelo próprio gunicorn via WhiteNoise: nomes com hash recebem cache de 10 anos
+# (immutable) e as variantes .br/.gz geradas no collectstatic são entregues conforme o Accept-Encoding.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'core.storage.StaticFilesStorage',
+    },
+    # Arquivos gerados pelos jobs (exportações): fora de MEDIA_ROOT, baixados só pela view autenticada.
+    'exports': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        'OPTIONS': {'location': config('EXPORTS_ROOT', default=str(BASE_DIR / 'private' / 'exports'))},
+    },
+    # Partições antigas de jejuns, em NDJSON compactado com gzip (um arquivo por usuário e período).
+    'archive': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        'OPTIONS': {'location': config('ARCHIVE_ROOT', default=str(BASE_DIR / 'private' / 'archive'))},
+    },
+}
+
+# Em desenvolvimento e nos testes o collectstatic não roda; o aviso do WhiteNoise sobre STATIC_ROOT é esperado.
+warnings.filterwarnings('ignore', message='No directory at: ')
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
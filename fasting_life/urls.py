@@ -1,6 +1,10 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
-from core import views
+from core import async_views, views
+
+# Com ASYNC_VIEWS=True (servidor ASGI) o dashboard e as rotas de jejum usam as views assíncronas.
+fasting_views = async_views if settings.ASYNC_VIEWS else views
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -8,10 +12,19 @@ urlpatterns = [
     path('register/', views.register_view, name='register'),
     path('login/', views.login_view, name='login'),
     path('logout/', views.logout_view, name='logout'),
-    path('dashboard/', views.dashboard_view, name='dashboard'),
-    path('fasting/start/', views.start_fasting_view, name='start_fasting'),
-    path('fasting/end/', views.end_fasting_view, name='end_fasting'),
-    path('fasting/history/', views.history_view, name='history'),
+    path('dashboard/', fasting_views.dashboard_view, name='dashboard'),
+    path('fasting/start/', fasting_views.start_fasting_view, name='start_fasting'),
+    path('fasting/end/', fasting_views.end_fasting_view, name='end_fasting'),
+    path('fasting/live/', views.live_updates_view, name='live_updates'),
+    path('fasting/history/', fasting_views.history_view, name='history'),
+    path('fasting/export/', views.export_fastings_view, name='export_fastings'),
+    path('fasting/import/', views.import_fastings_view, name='import_fastings'),
     path('fasting/edit/<int:pk>/', views.edit_fasting_view, name='edit_fasting'),
+    path('jobs/export/', views.enqueue_export_view, name='enqueue_export'),
+    path('jobs/<int:pk>/', views.job_status_view, name='job_status'),
+    path('jobs/<int:pk>/download/', views.job_download_view, name='job_download'),
     path('weight/', views.weight_view, name='weight'),
+    path('stats/', views.statistics_view, name='statistics'),
+    path('api/v1/', include('core.api')),
+    path('metrics/', views.metrics_view, name='metrics'),
 ]
@@ -0,0 +1,67 @@
+"""Configuração do gunicorn, toda ajustável por variáveis de ambiente (ou .env).
+
+    gunicorn -c gunicorn.conf.py
+
+GUNICORN_WORKER_CLASS escolhe o modo: gthread (padrão, WSGI com threads), sync ou
+uvicorn.workers.UvicornWorker (ASGI; use com ASYNC_VIEWS=True).
+"""
+import multiprocessing
+import os
+import sys
+
+import decouple  # não importar `config` direto: o gunicorn leria o nome como a opção -c
+
+
+worker_class = decouple.config('GUNICORN_WORKER_CLASS', default='gthread')
+is_asgi = 'uvicorn' in worker_class.lower()
+
+wsgi_app = 'fasting_life.asgi:application' if is_asgi else 'fasting_life.wsgi:application'
+bind = decouple.config('GUNICORN_BIND', default='0.0.0.0:4000')
+
+# 2 x CPUs + 1 é o ponto de partida recomendado pelo gunicorn; com gthread cada worker ainda tem suas threads.
+workers = decouple.config('GUNICORN_WORKERS', default=multiprocessing.cpu_count() * 2 + 1, cast=int)
+threads = decouple.config('GUNICORN_THREADS', default=4 if worker_class == 'gthread' else 1, cast=int)
+# O Django lê WEB_CONCURRENCY para saber se um cache local (LocMemCache) seria visto por todos os workers.
+os.environ['WEB_CONCURRENCY'] = str(workers)
+
+# Importa o Django uma vez no processo mestre: workers sobem mais rápido e compartilham memória (copy-on-write).
+preload_app = decouple.config('GUNICORN_PRELOAD', default=True, cast=bool)
+
+timeout = decouple.config('GUNICORN_TIMEOUT', default=30, cast=int)
+graceful_timeout = decouple.config('GUNICORN_GRACEFUL_TIMEOUT', default=30, cast=int)
+keepalive = decouple.config('GUNICORN_KEEPALIVE', default=5, cast=int)
+
+# Recicla cada worker após N requisições; o jitter evita que todos reiniciem ao mesmo tempo.
+max_requests = decouple.config('GUNICORN_MAX_REQUESTS', default=1000, cast=int)
+max_requests_jitter = decouple.config('GUNICORN_MAX_REQUESTS_JITTER', default=100, cast=int)
+
+accesslog = decouple.config('GUNICORN_ACCESS_LOG', default='-')
+errorlog = '-'
+loglevel = decouple.config('GUNICORN_LOG_LEVEL', default='info')
+
+
+def _close_database_connections():
+    # Só há conexões se o Django já foi carregado neste processo (preload_app).
+    if 'django.db' not in sys.modules:
+        return
+    from django.db import connections
+
+    for connection in connections.all(initialized_only=True):
+        connection.close()
+
+
+def on_starting(server):
+    server.log.info(
+        'Configuração: %s, %d worker(s) x %d thread(s), preload=%s, max_requests=%d (+%d)',
+        worker_class, workers, threads, preload_app, max_requests, max_requests_jitter,
+    )
+
+
+def pre_fork(server, worker):
+    # Uma conexão aberta no mestre durante o preload seria herdada (mesmo socket) por todos os workers.
+    _close_database_connections()
+
+
+def post_fork(server, worker):
+    # Garante que o worker comece sem conexões herdadas; o Django abre a sua na primeira consulta.
+    _close_database_connections()